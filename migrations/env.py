@@ -1,4 +1,6 @@
 import asyncio
+import os
+import time
 from logging.config import fileConfig
 
 from sqlalchemy import pool
@@ -7,20 +9,52 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
+import src.models.user  # noqa: F401  (регистрирует модели в Base.metadata)
+from src.core.config import cfg
+from src.core.db.backfill import CHECKPOINT_TABLE
+from src.core.db.migrations import (  # регистрирует op.create_index_concurrently и др.
+    concurrent_index_rewriter,
+    configure_timeouts,
+    is_lock_timeout,
+    reset_timeouts,
+)
+from src.models.base import Base
+from src.services.logger import get_logger
+
+logger = get_logger()
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# (настройки alembic лежат в pyproject.toml, alembic.ini может не быть)
+if config.config_file_name is not None and os.path.exists(config.config_file_name):
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+# URL берётся из конфига приложения, если не задан в alembic.ini
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option(
+        "sqlalchemy.url",
+        cfg.database.async_database_url.replace("%", "%%"),
+    )
+
+# Метаданные моделей для autogenerate, включая partial-индексы
+# SoftDeleteMixin-моделей (`postgresql_where=deleted_at IS NULL`)
+target_metadata = Base.metadata
+
+
+def include_object(
+    obj: object,
+    name: str | None,
+    type_: str,
+    reflected: bool,
+    compare_to: object,
+) -> bool:
+    # Таблицу прогресса backfill создаёт сам хелпер, autogenerate её не трогает
+    return not (type_ == "table" and name == CHECKPOINT_TABLE)
+
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -46,6 +80,14 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        transaction_per_migration=True,
+        on_version_apply=reset_timeouts,
+    )
+    configure_timeouts(
+        context.get_context(),
+        cfg.migrations.lock_timeout,
+        cfg.migrations.statement_timeout,
     )
 
     with context.begin_transaction():
@@ -53,10 +95,46 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # Каждая ревизия — в своей транзакции: блокировки отпускаются сразу после
+    # неё, а повтор после lock_timeout начинается с первой непримененной.
+    # Autogenerate переписывает индексы существующих таблиц в CONCURRENTLY
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        transaction_per_migration=True,
+        process_revision_directives=concurrent_index_rewriter,
+        on_version_apply=reset_timeouts,
+    )
 
-    with context.begin_transaction():
-        context.run_migrations()
+    attempt = 0
+    while True:
+        configure_timeouts(
+            context.get_context(),
+            cfg.migrations.lock_timeout,
+            cfg.migrations.statement_timeout,
+        )
+        # SET действует на всю сессию; транзакции ревизий открывает alembic
+        connection.commit()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+            return
+        except Exception as exc:
+            if connection.in_transaction():
+                connection.rollback()
+            if not is_lock_timeout(exc) or attempt >= cfg.migrations.lock_retries:
+                raise
+            attempt += 1
+            delay = cfg.migrations.lock_retry_delay * 2 ** (attempt - 1)
+            logger.warning(
+                "Migration lock timeout, retrying",
+                attempt=attempt,
+                retries=cfg.migrations.lock_retries,
+                delay=delay,
+                error=str(exc),
+            )
+            time.sleep(delay)
 
 
 async def run_async_migrations() -> None:
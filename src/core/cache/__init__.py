@@ -1,6 +1,8 @@
+from .lru import LRUCache
 from .redis import create_redis_pool, create_redis_client
 
 __all__ = [
+	"LRUCache",
 	"create_redis_pool",
 	"create_redis_client",
-]
\ No newline at end of file
+]
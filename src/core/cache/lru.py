@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from src.schemas.dataclasses import CacheStatsDTO
+
+
+class LRUCache[K: Hashable, V]:
+	"""
+	Ограниченный in-process LRU-кеш с TTL.
+
+	Не потокобезопасен: рассчитан на использование из одного event loop.
+	Просроченные записи удаляются лениво при обращении и при вытеснении.
+	"""
+
+	def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+		"""
+		:param maxsize: максимальное количество записей
+		:param ttl: время жизни записи в секундах (None — без ограничения)
+		"""
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: K) -> V | None:
+		entry = self._data.get(key)
+		if entry is None:
+			self.misses += 1
+			return None
+
+		value, expires_at = entry
+		if expires_at < time.monotonic():
+			del self._data[key]
+			self.expirations += 1
+			self.misses += 1
+			return None
+
+		self._data.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def set(self, key: K, value: V) -> None:
+		expires_at = (
+			time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+		)
+		self._data[key] = (value, expires_at)
+		self._data.move_to_end(key)
+
+		while len(self._data) > self.maxsize:
+			self._data.popitem(last=False)
+			self.evictions += 1
+
+	def delete(self, key: K) -> None:
+		self._data.pop(key, None)
+
+	def clear(self) -> None:
+		self._data.clear()
+
+	def stats(self) -> CacheStatsDTO:
+		return CacheStatsDTO(
+			hits=self.hits,
+			misses=self.misses,
+			evictions=self.evictions,
+			expirations=self.expirations,
+			size=len(self._data),
+			maxsize=self.maxsize,
+		)
@@ -1,6 +1,8 @@
 from redis.asyncio import Redis, ConnectionPool
 
 from src.core.config import cfg
+from src.core.metrics import track_redis_pool
+from src.core.tracing import TracedRedis
 
 
 def create_redis_pool() -> ConnectionPool:
@@ -8,7 +10,7 @@ def create_redis_pool() -> ConnectionPool:
 	Создает connection pool для Redis.
 	Аналог create_engine для SQLAlchemy.
 	"""
-	return ConnectionPool(
+	pool = ConnectionPool(
 		host=cfg.redis.redis_host,
 		port=cfg.redis.redis_port,
 		db=cfg.redis.redis_db,
@@ -18,10 +20,14 @@ def create_redis_pool() -> ConnectionPool:
 		socket_connect_timeout=cfg.redis.redis_socket_connect_timeout,
 		decode_responses=True,
 	)
+	track_redis_pool(pool)
+	return pool
 
 
 async def create_redis_client(pool: ConnectionPool) -> Redis:
 	"""
 	Создает Redis клиент из pool.
 	"""
-	return Redis(connection_pool=pool)
\ No newline at end of file
+	if cfg.tracing.enabled:
+		return TracedRedis(connection_pool=pool)
+	return Redis(connection_pool=pool)
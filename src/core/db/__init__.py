@@ -1,6 +1,67 @@
-from .connection import create_engine, create_session_factory
+from .autotune import PoolAutotuner
+from .backfill import backfill, replication_lag
+from .connection import (
+	create_engine,
+	create_pool_autotuner,
+	create_replica_router,
+	create_session_factory,
+)
+from .index_advisor import IndexUsageRecorder, extract_patterns
+from .loader import BatchLoader, ModelLoaders, can_batch, match_any
+from .nplusone import (
+	NPlusOneError,
+	QueryCounter,
+	count_queries,
+	current_query_counter,
+	detach_query_counter,
+	detect_n_plus_one,
+)
+from .pagination import estimate_count, exact_count
+from .pool import resize_supported
+from .query_stats import (
+	QueryStatsCollector,
+	fingerprint,
+	query_stats,
+	track_queries,
+)
+from .routing import ReplicaRouter, RoutingSession, dialect_name, pin_primary
+from .session import finish_session, mark_write, session_usage_stats
+from .upsert import UpsertBuffer, build_upsert
 
 __all__ = [
 	"create_engine",
 	"create_session_factory",
+	"create_replica_router",
+	"create_pool_autotuner",
+	"PoolAutotuner",
+	"resize_supported",
+	"backfill",
+	"replication_lag",
+	"IndexUsageRecorder",
+	"extract_patterns",
+	"BatchLoader",
+	"ModelLoaders",
+	"can_batch",
+	"match_any",
+	"ReplicaRouter",
+	"RoutingSession",
+	"pin_primary",
+	"dialect_name",
+	"finish_session",
+	"mark_write",
+	"session_usage_stats",
+	"QueryStatsCollector",
+	"fingerprint",
+	"query_stats",
+	"track_queries",
+	"NPlusOneError",
+	"QueryCounter",
+	"count_queries",
+	"current_query_counter",
+	"detach_query_counter",
+	"detect_n_plus_one",
+	"UpsertBuffer",
+	"build_upsert",
+	"estimate_count",
+	"exact_count",
 ]
@@ -0,0 +1,166 @@
+import asyncio
+import traceback
+from contextlib import suppress
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import greenlet_spawn
+
+from src.core.db.pool import InstrumentedAsyncQueuePool, PoolWindow
+from src.core.metrics import DB_POOL_RESIZES
+from src.schemas.dataclasses import PoolAutotunerStatsDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+
+class PoolAutotuner:
+	"""
+	Подстраивает `pool_size` engine'а под нагрузку.
+
+	Раз в `interval` забирает у пула счётчики окна и принимает решение:
+
+	- grow: были тайм-ауты, среднее ожидание соединения выше
+	  `wait_threshold` или понадобились overflow-соединения (они
+	  открываются и закрываются на каждый запрос) — пул растёт на `step`;
+	- shrink: `shrink_after` окон подряд пик занятых соединений меньше
+	  размера пула хотя бы на `step` — пул уменьшается до пика, но не
+	  больше чем на `step` за раз;
+	- hold: иначе.
+
+	Размер не выходит за `min_size`–`max_size`, `max_overflow` не меняется.
+	Каждое решение логируется вместе с причиной и счётчиками окна.
+	"""
+
+	def __init__(
+		self,
+		engine: AsyncEngine,
+		min_size: int,
+		max_size: int,
+		step: int = 2,
+		interval: float = 10.0,
+		wait_threshold: float = 0.05,
+		shrink_after: int = 3,
+	) -> None:
+		pool = engine.pool
+		if not isinstance(pool, InstrumentedAsyncQueuePool):
+			raise TypeError(
+				f"Автотюнинг нужен InstrumentedAsyncQueuePool, а не {type(pool).__name__}",
+			)
+		if not 0 < min_size <= max_size:
+			raise ValueError("Нужно 0 < min_size <= max_size")
+
+		self.pool = pool
+		self.min_size = min_size
+		self.max_size = max_size
+		self.step = max(step, 1)
+		self.interval = interval
+		self.wait_threshold = wait_threshold
+		self.shrink_after = shrink_after
+
+		self.resizes = 0
+		self.last_decision = "hold"
+		self.last_reason = "started"
+		self._last_window = PoolWindow()
+		self._idle_windows = 0
+		self._task: asyncio.Task[None] | None = None
+
+	def start(self) -> None:
+		"""Запускает фоновый цикл. Вызывать внутри event loop."""
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def close(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			with suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+
+	async def tick(self) -> str:
+		"""Одно решение по текущему окну. :return: grow / shrink / hold"""
+		window = self.pool.take_window()
+		size = self.pool.size()
+		decision, reason, target = self._decide(window, size)
+
+		self._last_window = window
+		self.last_decision = decision
+		self.last_reason = reason
+		log = {
+			"decision": decision,
+			"reason": reason,
+			"pool_size": size,
+			"wait_avg": round(window.wait_avg, 4),
+			"wait_max": round(window.wait_max, 4),
+			"timeouts": window.timeouts,
+			"checkouts": window.checkouts,
+			"peak_checked_out": window.peak_checked_out,
+			"peak_overflow": window.peak_overflow,
+		}
+
+		if target == size:
+			logger.debug("DB pool autotune", **log)
+			return decision
+
+		await greenlet_spawn(self.pool.resize, target)
+		self.resizes += 1
+		DB_POOL_RESIZES.labels(decision).inc()
+		logger.info("DB pool resized", new_pool_size=target, **log)
+		return decision
+
+	def _decide(self, window: PoolWindow, size: int) -> tuple[str, str, int]:
+		if window.timeouts:
+			reason = "timeouts"
+		elif window.wait_avg > self.wait_threshold:
+			reason = "wait"
+		elif window.peak_overflow > 0:
+			reason = "overflow"
+		else:
+			reason = ""
+
+		if reason:
+			self._idle_windows = 0
+			if size >= self.max_size:
+				return "hold", f"{reason}, at max_size", size
+			return "grow", reason, min(size + self.step, self.max_size)
+
+		if window.peak_checked_out + self.step > size or size <= self.min_size:
+			self._idle_windows = 0
+			return "hold", "busy" if size > self.min_size else "at min_size", size
+
+		self._idle_windows += 1
+		if self._idle_windows < self.shrink_after:
+			return "hold", f"idle {self._idle_windows}/{self.shrink_after}", size
+
+		self._idle_windows = 0
+		target = max(size - self.step, window.peak_checked_out, self.min_size)
+		return "shrink", "idle", target
+
+	def stats(self) -> PoolAutotunerStatsDTO:
+		window = self._last_window
+		return PoolAutotunerStatsDTO(
+			pool_size=self.pool.size(),
+			min_size=self.min_size,
+			max_size=self.max_size,
+			max_overflow=self.pool._max_overflow,
+			checked_out=self.pool.checkedout(),
+			resizes=self.resizes,
+			last_decision=self.last_decision,
+			last_reason=self.last_reason,
+			wait_avg=window.wait_avg,
+			wait_max=window.wait_max,
+			timeouts=window.timeouts,
+			peak_checked_out=window.peak_checked_out,
+			peak_overflow=window.peak_overflow,
+		)
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self.interval)
+			try:
+				await self.tick()
+			except Exception as exc:
+				logger.error(
+					"DB pool autotune failed",
+					error=str(exc),
+					traceback=traceback.format_exc(),
+				)
@@ -0,0 +1,320 @@
+"""
+Пакетное заполнение данных (backfill) вместо одного большого UPDATE.
+
+Таблица обходится кусками по первичному ключу, каждый кусок обновляется
+в своей короткой транзакции вместе с записью прогресса в
+`backfill_checkpoints`. После прерывания повторный запуск с тем же `name`
+продолжает с последнего закоммиченного куска, а завершённый — сразу
+возвращается, поэтому вызов безопасно оставлять в ревизии alembic:
+
+	def upgrade() -> None:
+		op.add_column("users", sa.Column("language", sa.String(8)))
+		with op.get_context().autocommit_block():
+			backfill(
+				op.get_bind(),
+				User,
+				{"language": "ru"},
+				where=User.language.is_(None),
+				name="users_language",
+			)
+
+Из командной строки — `tools/backfill.py`.
+"""
+import hashlib
+import time
+from collections.abc import Mapping
+from typing import Any
+
+from sqlalchemy import (
+	BigInteger,
+	Boolean,
+	Column,
+	ColumnElement,
+	Connection,
+	DateTime,
+	Engine,
+	MetaData,
+	String,
+	Table,
+	func,
+	insert,
+	inspect,
+	select,
+	text,
+	update,
+)
+
+from src.core.config import cfg
+from src.schemas.dataclasses import BackfillResultDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+CHECKPOINT_TABLE = "backfill_checkpoints"
+# Как часто перепроверять отставание реплик во время паузы, сек
+LAG_POLL_INTERVAL = 1.0
+
+# Служебная таблица создаётся самим хелпером и не входит в Base.metadata
+checkpoints = Table(
+	CHECKPOINT_TABLE,
+	MetaData(),
+	Column("name", String(128), primary_key=True),
+	Column("last_key", String(256), nullable=True),
+	Column("rows", BigInteger, nullable=False, default=0),
+	Column("completed", Boolean, nullable=False, default=False),
+	Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+
+def _table_of(table: Table | type) -> Table:
+	return table if isinstance(table, Table) else inspect(table).local_table
+
+
+def _primary_key(table: Table) -> Column[Any]:
+	columns = list(table.primary_key.columns)
+	if len(columns) != 1:
+		raise ValueError(
+			f"{table.name}: для backfill нужен первичный ключ из одной колонки, "
+			f"а их {len(columns)}",
+		)
+	return columns[0]
+
+
+def _default_name(
+	engine: Engine,
+	table: Table,
+	values: Mapping[str, Any],
+	where: ColumnElement[bool] | None,
+) -> str:
+	"""
+	Имя прогресса по умолчанию: таблица, колонки и хеш самого UPDATE —
+	backfill той же колонки с другими значениями или условием не примет
+	чужой завершённый прогресс за свой.
+	"""
+	stmt = update(table).values(**values)
+	if where is not None:
+		stmt = stmt.where(where)
+	compiled = stmt.compile(dialect=engine.dialect)
+	params = sorted((key, repr(value)) for key, value in compiled.params.items())
+	digest = hashlib.sha1(f"{compiled}{params}".encode(), usedforsecurity=False).hexdigest()
+	return f"{table.name}:{','.join(sorted(values))}:{digest[:12]}"
+
+
+def _decode_key(column: Column[Any], value: str | None) -> Any:  # noqa: ANN401
+	if value is None:
+		return None
+	try:
+		return column.type.python_type(value)
+	except NotImplementedError:
+		return value
+
+
+def replication_lag(connection: Connection) -> float:
+	"""
+	Наибольшее отставание реплик от primary, сек (`pg_stat_replication`).
+	Без реплик, вне PostgreSQL или без прав на `replay_lag` (нужна роль
+	`pg_monitor`) — 0.
+	"""
+	if connection.dialect.name != "postgresql":
+		return 0.0
+	lag = connection.execute(
+		text("SELECT EXTRACT(EPOCH FROM max(replay_lag)) FROM pg_stat_replication"),
+	).scalar()
+	return float(lag or 0.0)
+
+
+def _wait_for_replicas(engine: Engine, name: str, max_lag: float) -> None:
+	if max_lag <= 0:
+		return
+	while True:
+		with engine.connect() as conn:
+			lag = replication_lag(conn)
+		if lag <= max_lag:
+			return
+		logger.info("Backfill paused: replication lag", name=name, lag=round(lag, 2), max_lag=max_lag)
+		time.sleep(LAG_POLL_INTERVAL)
+
+
+def _chunk_upper(
+	conn: Connection,
+	pk: Column[Any],
+	lower: Any,  # noqa: ANN401
+	where: ColumnElement[bool] | None,
+	size: int,
+) -> Any:  # noqa: ANN401
+	"""Ключ последней строки куска из `size` строк после `lower` или None, если строк нет."""
+	query = select(pk.label("key")).order_by(pk).limit(size)
+	if lower is not None:
+		query = query.where(pk > lower)
+	if where is not None:
+		query = query.where(where)
+	chunk = query.subquery()
+	return conn.execute(select(func.max(chunk.c.key))).scalar()
+
+
+def _save_checkpoint(
+	conn: Connection,
+	name: str,
+	last_key: Any,  # noqa: ANN401
+	rows: int,
+	completed: bool,
+) -> None:
+	conn.execute(
+		update(checkpoints)
+		.where(checkpoints.c.name == name)
+		.values(
+			last_key=None if last_key is None else str(last_key),
+			rows=rows,
+			completed=completed,
+			updated_at=func.now(),
+		),
+	)
+
+
+def backfill(
+	bind: Engine | Connection,
+	table: Table | type,
+	values: Mapping[str, Any],
+	where: ColumnElement[bool] | None = None,
+	name: str | None = None,
+	reset: bool = False,
+	chunk_size: int | None = None,
+	min_chunk_size: int | None = None,
+	max_chunk_size: int | None = None,
+	target_chunk_time: float | None = None,
+	sleep_ratio: float | None = None,
+	max_replication_lag: float | None = None,
+) -> BackfillResultDTO:
+	"""
+	`UPDATE table SET values [WHERE where]` кусками по первичному ключу.
+
+	Размер куска подстраивается так, чтобы транзакция длилась около
+	`target_chunk_time`; после куска — пауза `sleep_ratio` × его длительность
+	и ожидание, пока отставание реплик не станет меньше `max_replication_lag`.
+	Не заданные параметры берутся из `[backfill]`; границы из конфига
+	расширяются так, чтобы включать явно переданный `chunk_size`.
+
+	:param bind: Engine или соединение (например, `op.get_bind()`) — куски
+		выполняются в собственных соединениях его Engine, поэтому открытая
+		транзакция соединения должна быть закоммичена (`autocommit_block`)
+	:param table: Table или ORM-модель с одноколоночным первичным ключом
+	:param values: колонка → значение или SQL-выражение (`User.first_name`)
+	:param where: какие строки обновлять; обновлённые строки лучше
+		исключать (`User.language.is_(None)`) — тогда повтор куска безопасен
+	:param name: ключ прогресса в `backfill_checkpoints` (по умолчанию —
+		таблица, колонки и хеш значений и условия); в ревизиях alembic
+		лучше задавать явно
+	:param reset: начать заново, забыв сохранённый прогресс
+	"""
+	settings = cfg.backfill
+	if min_chunk_size is None:
+		min_chunk_size = min(settings.min_chunk_size, chunk_size or settings.min_chunk_size)
+	if max_chunk_size is None:
+		max_chunk_size = max(settings.max_chunk_size, chunk_size or settings.max_chunk_size)
+	if not 0 < min_chunk_size <= max_chunk_size:
+		raise ValueError(
+			f"Нужно 0 < min_chunk_size <= max_chunk_size, "
+			f"получено {min_chunk_size} и {max_chunk_size}",
+		)
+	chunk_size = min(max(chunk_size or settings.chunk_size, min_chunk_size), max_chunk_size)
+	target_chunk_time = target_chunk_time or settings.target_chunk_time
+	sleep_ratio = settings.sleep_ratio if sleep_ratio is None else sleep_ratio
+	max_replication_lag = (
+		settings.max_replication_lag if max_replication_lag is None else max_replication_lag
+	)
+
+	table = _table_of(table)
+	pk = _primary_key(table)
+	engine = bind.engine if isinstance(bind, Connection) else bind
+	name = name or _default_name(engine, table, values, where)
+
+	with engine.begin() as conn:
+		checkpoints.create(conn, checkfirst=True)
+		if reset:
+			conn.execute(checkpoints.delete().where(checkpoints.c.name == name))
+		saved = conn.execute(
+			select(checkpoints.c.last_key, checkpoints.c.rows, checkpoints.c.completed)
+			.where(checkpoints.c.name == name),
+		).first()
+		if saved is None:
+			conn.execute(insert(checkpoints).values(name=name, rows=0, completed=False))
+
+	resumed_from = saved.last_key if saved is not None else None
+	total_rows = saved.rows if saved is not None else 0
+	if saved is not None and saved.completed:
+		logger.info("Backfill already completed", name=name, rows=total_rows)
+		return BackfillResultDTO(
+			name=name,
+			table=table.name,
+			rows=0,
+			chunks=0,
+			elapsed=0.0,
+			last_key=resumed_from,
+			skipped=True,
+			resumed_from=resumed_from,
+		)
+	if resumed_from is not None:
+		logger.info("Backfill resumed", name=name, last_key=resumed_from, rows=total_rows)
+
+	last_key = _decode_key(pk, resumed_from)
+	size = chunk_size
+	rows = chunks = 0
+	started = last_report = time.monotonic()
+	while True:
+		_wait_for_replicas(engine, name, max_replication_lag)
+
+		chunk_started = time.perf_counter()
+		with engine.begin() as conn:
+			upper = _chunk_upper(conn, pk, last_key, where, size)
+			if upper is None:
+				_save_checkpoint(conn, name, last_key, total_rows + rows, completed=True)
+				break
+			condition = pk <= upper
+			if last_key is not None:
+				condition &= pk > last_key
+			if where is not None:
+				condition &= where
+			result = conn.execute(update(table).where(condition).values(**values))
+			rows += max(result.rowcount, 0)
+			last_key = upper
+			_save_checkpoint(conn, name, last_key, total_rows + rows, completed=False)
+		duration = time.perf_counter() - chunk_started
+		chunks += 1
+
+		if duration > 0:
+			scale = min(max(target_chunk_time / duration, 0.5), 2.0)
+			size = int(min(max(size * scale, min_chunk_size), max_chunk_size))
+
+		now = time.monotonic()
+		if now - last_report >= settings.progress_interval:
+			last_report = now
+			logger.info(
+				"Backfill progress",
+				name=name,
+				rows=rows,
+				chunks=chunks,
+				chunk_size=size,
+				last_key=str(last_key),
+				rows_per_second=round(rows / (now - started), 1),
+			)
+		time.sleep(duration * sleep_ratio)
+
+	result = BackfillResultDTO(
+		name=name,
+		table=table.name,
+		rows=rows,
+		chunks=chunks,
+		elapsed=time.monotonic() - started,
+		last_key=None if last_key is None else str(last_key),
+		skipped=False,
+		resumed_from=resumed_from,
+	)
+	logger.info(
+		"Backfill completed",
+		name=name,
+		rows=result.rows,
+		chunks=result.chunks,
+		elapsed=round(result.elapsed, 2),
+		rows_per_second=round(result.rows_per_second, 1),
+	)
+	return result
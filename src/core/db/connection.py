@@ -1,18 +1,30 @@
+from typing import Any
+
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession, AsyncEngine
 
 from src.core.config import cfg
+from src.core.db.autotune import PoolAutotuner
+from src.core.db.pool import InstrumentedAsyncQueuePool
+from src.core.db.nplusone import detect_n_plus_one
+from src.core.db.query_stats import track_queries
+from src.core.db.routing import ReplicaRouter, RoutingSession
+from src.core.db.session import track_session_usage
 from src.core.db.soft_delete import filter_soft_deleted
+from src.core.tracing import trace_engine
 
 
-def create_engine() -> AsyncEngine:
+def create_engine(url: str | None = None) -> AsyncEngine:
 	"""
 	Создает async engine для PostgreSQL.
 	Живет на весь lifecycle приложения.
+
+	:param url: адрес БД; по умолчанию primary из конфига
 	"""
-	return create_async_engine(
-		url=cfg.database.async_database_url,
+	engine = create_async_engine(
+		url=url or cfg.database.async_database_url,
 		echo=cfg.database.echo,
+		poolclass=InstrumentedAsyncQueuePool,
 		pool_size=cfg.database.pool_size,
 		max_overflow=cfg.database.max_overflow,
 		pool_pre_ping=cfg.database.pool_pre_ping,
@@ -21,22 +33,70 @@ def create_engine() -> AsyncEngine:
 		pool_timeout=cfg.database.pool_timeout,
 		connect_args={"ssl": False},
 	)
+	if cfg.tracing.enabled:
+		trace_engine(engine)
+	if cfg.query_stats.enabled:
+		track_queries(engine)
+	return engine
+
+
+def create_pool_autotuner(engine: AsyncEngine) -> PoolAutotuner:
+	"""Автотюнер пула engine'а с границами из конфига."""
+	return PoolAutotuner(
+		engine,
+		min_size=cfg.database.autotune_min_size,
+		max_size=cfg.database.autotune_max_size,
+		step=cfg.database.autotune_step,
+		interval=cfg.database.autotune_interval,
+		wait_threshold=cfg.database.autotune_wait_threshold,
+		shrink_after=cfg.database.autotune_shrink_after,
+	)
+
+
+def create_replica_router() -> ReplicaRouter:
+	"""
+	Создает engine на каждую реплику из `database.replica_urls`.
+	Без реплик роутер пустой и сессии работают только с primary.
+	"""
+	return ReplicaRouter(
+		[create_engine(url) for url in cfg.database.replica_urls],
+		strategy=cfg.database.replica_strategy,
+		health_interval=cfg.database.replica_health_interval,
+		health_timeout=cfg.database.replica_health_timeout,
+	)
 
 
 def create_session_factory(
 	engine: AsyncEngine,
+	router: ReplicaRouter | None = None,
 ) -> async_sessionmaker[AsyncSession]:
 	"""
 	Создает фабрику сессий.
 	Используется для создания новых сессий на каждый запрос.
+
+	:param router: реплики для чтения; сессии отправляют на них SELECT
+		вне пишущих транзакций (см. `RoutingSession`)
 	"""
+	routing: dict[str, Any] = {}
+	if router is not None and router.replicas:
+		routing = {"sync_session_class": RoutingSession, "router": router}
+
 	factory = async_sessionmaker(
 		bind=engine,
 		class_=AsyncSession,
 		expire_on_commit=False,
 		autoflush=False,
 		autocommit=False,
+		**routing,
+	)
+	# ORM-события вешаются на синхронный Session, которым управляет AsyncSession
+	event.listen(
+		factory.class_.sync_session_class,
+		"do_orm_execute",
+		filter_soft_deleted,
 	)
-	event.listen(factory.class_, "do_orm_execute", filter_soft_deleted)
+	track_session_usage(factory.class_.sync_session_class)
+	if cfg.n_plus_one.enabled:
+		detect_n_plus_one(factory.class_.sync_session_class)
 	return factory
 
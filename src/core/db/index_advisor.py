@@ -0,0 +1,555 @@
+import asyncio
+import json
+import traceback
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from dataclasses import asdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import (
+	BinaryExpression,
+	ColumnClause,
+	Join,
+	Select,
+	Table,
+	UniqueConstraint,
+	event,
+	text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.orm import DeclarativeBase, ORMExecuteState, Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import Grouping, Label, Tuple, UnaryExpression
+
+from src.schemas.dataclasses import (
+	AccessPatternDTO,
+	IndexDefDTO,
+	IndexReportDTO,
+	MissingIndexDTO,
+	RedundantIndexDTO,
+)
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+_EQUALITY = {operators.eq, operators.in_op, operators.is_}
+_RANGE = {
+	operators.lt,
+	operators.le,
+	operators.gt,
+	operators.ge,
+	operators.between_op,
+	operators.like_op,
+	operators.startswith_op,
+}
+
+type PatternKey = tuple[str, tuple[str, ...], tuple[str, ...], tuple[str, ...]]
+
+
+# ========== Разбор запросов ==========
+def _table_columns(element: Any) -> Iterator[tuple[str, str]]:  # noqa: ANN401
+	"""(таблица, колонка) для колонки, её алиаса/сортировки или кортежа колонок."""
+	while isinstance(element, (UnaryExpression, Label, Grouping)):
+		element = element.element
+	if isinstance(element, Tuple):
+		for clause in element.clauses:
+			yield from _table_columns(clause)
+		return
+	if isinstance(element, ColumnClause) and element.table is not None:
+		# Колонка алиаса (`aliased(User)`) ссылается на Alias, а он — на таблицу
+		table = getattr(element.table, "element", element.table)
+		if isinstance(table, Table):
+			yield table.name, element.name
+
+
+def _join_conditions(from_: Any) -> Iterator[Any]:  # noqa: ANN401
+	if isinstance(from_, Join):
+		yield from _join_conditions(from_.left)
+		yield from _join_conditions(from_.right)
+		yield from_.onclause
+
+
+def extract_patterns(statement: Any) -> list[PatternKey]:  # noqa: ANN401
+	"""
+	Шаблоны доступа SELECT'а по таблицам: колонки сравнений на равенство
+	(`=`, `IN`, `IS`), диапазонов (`<`, `BETWEEN`, `LIKE 'x%'`) из WHERE
+	и условий JOIN, и колонки ORDER BY. Остальные операторы (`!=`, функции
+	от колонок) индексом по колонке не обслуживаются и не учитываются.
+	"""
+	if not isinstance(statement, Select):
+		return []
+
+	usage: dict[str, tuple[set[str], set[str], list[str]]] = {}
+	conditions = [statement.whereclause]
+	for from_ in statement.get_final_froms():
+		conditions.extend(_join_conditions(from_))
+
+	for condition in conditions:
+		if condition is None:
+			continue
+		for node in visitors.iterate(condition):
+			if not isinstance(node, BinaryExpression):
+				continue
+			if node.operator in _EQUALITY:
+				slot = 0
+			elif node.operator in _RANGE:
+				slot = 1
+			else:
+				continue
+			for side in (node.left, node.right):
+				for table, column in _table_columns(side):
+					usage.setdefault(table, (set(), set(), []))[slot].add(column)
+
+	for clause in statement._order_by_clauses:
+		for table, column in _table_columns(clause):
+			order = usage.setdefault(table, (set(), set(), []))[2]
+			if column not in order:
+				order.append(column)
+
+	return [
+		(table, tuple(sorted(equality)), tuple(sorted(range_ - equality)), tuple(order))
+		for table, (equality, range_, order) in usage.items()
+	]
+
+
+def _sample_sql(statement: Any) -> str | None:  # noqa: ANN401
+	try:
+		return str(
+			statement.compile(
+				dialect=postgresql.dialect(),
+				compile_kwargs={"literal_binds": True},
+			),
+		)
+	except Exception:
+		# Не у всех типов есть литеральное представление
+		return None
+
+
+# ========== Запись ==========
+class IndexUsageRecorder:
+	"""
+	Собирает шаблоны доступа ORM-запросов (`extract_patterns`) за окно
+	в `window` секунд и дописывает окно одной JSON-строкой в `path`.
+	Отчёт по накопленным окнам строит `tools/index_advisor.py`.
+
+	:param explain_samples: хранить первый запрос шаблона с подставленными
+		значениями для EXPLAIN (в файл попадают значения из запросов)
+	"""
+
+	def __init__(
+		self,
+		path: str | Path,
+		window: float = 3600.0,
+		max_patterns: int = 1000,
+		explain_samples: bool = False,
+	) -> None:
+		self.path = Path(path)
+		self.window = window
+		self.max_patterns = max_patterns
+		self.explain_samples = explain_samples
+
+		self.queries = 0
+		self.dropped = 0
+		self._started_at = datetime.now(UTC)
+		self._patterns: dict[PatternKey, AccessPatternDTO] = {}
+		self._listener = self._on_execute
+		self._task: asyncio.Task[None] | None = None
+
+	def install(self, session_class: type[Session]) -> None:
+		"""Подписывает сессии класса на запись шаблонов."""
+		if not event.contains(session_class, "do_orm_execute", self._listener):
+			event.listen(session_class, "do_orm_execute", self._listener)
+
+	def record(self, statement: Any) -> None:  # noqa: ANN401
+		self.queries += 1
+		for key in extract_patterns(statement):
+			pattern = self._patterns.get(key)
+			if pattern is None:
+				if len(self._patterns) >= self.max_patterns:
+					self.dropped += 1
+					continue
+				table, equality, range_, order = key
+				pattern = self._patterns[key] = AccessPatternDTO(
+					table=table,
+					equality=list(equality),
+					range=list(range_),
+					order=list(order),
+					sample_sql=_sample_sql(statement) if self.explain_samples else None,
+				)
+			pattern.count += 1
+
+	def _on_execute(self, execute_state: ORMExecuteState) -> None:
+		if execute_state.is_select:
+			self.record(execute_state.statement)
+
+	def take_window(self) -> dict[str, Any]:
+		"""Забирает накопленное окно и начинает новое."""
+		finished_at = datetime.now(UTC)
+		window = {
+			"started_at": self._started_at.isoformat(),
+			"finished_at": finished_at.isoformat(),
+			"queries": self.queries,
+			"dropped": self.dropped,
+			"patterns": [asdict(pattern) for pattern in self._patterns.values()],
+		}
+		self._started_at = finished_at
+		self._patterns = {}
+		self.queries = 0
+		self.dropped = 0
+		return window
+
+	async def flush(self) -> None:
+		window = self.take_window()
+		if not window["queries"]:
+			return
+		line = json.dumps(window, ensure_ascii=False) + "\n"
+		await asyncio.to_thread(self._append, line)
+		logger.info(
+			"Index usage window written",
+			path=str(self.path),
+			queries=window["queries"],
+			patterns=len(window["patterns"]),
+		)
+
+	def _append(self, line: str) -> None:
+		with self.path.open("a", encoding="utf-8") as file:
+			file.write(line)
+
+	def start(self) -> None:
+		"""Запускает запись окон. Вызывать внутри event loop."""
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def close(self) -> None:
+		"""Останавливает запись и сохраняет незавершённое окно."""
+		if self._task is not None:
+			self._task.cancel()
+			with suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		await self.flush()
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self.window)
+			try:
+				await self.flush()
+			except Exception as exc:
+				logger.error(
+					"Index usage flush failed",
+					error=str(exc),
+					traceback=traceback.format_exc(),
+				)
+
+
+def load_usage(paths: Iterable[str | Path]) -> tuple[list[AccessPatternDTO], int]:
+	"""
+	Сводит окна из файлов `IndexUsageRecorder` в один список шаблонов.
+
+	:return: (шаблоны по убыванию числа запросов, всего запросов)
+	"""
+	patterns: dict[PatternKey, AccessPatternDTO] = {}
+	queries = 0
+	for path in paths:
+		with Path(path).open(encoding="utf-8") as file:
+			for line in file:
+				if not line.strip():
+					continue
+				window = json.loads(line)
+				queries += window["queries"]
+				for raw in window["patterns"]:
+					pattern = AccessPatternDTO(**raw)
+					key = (
+						pattern.table,
+						tuple(pattern.equality),
+						tuple(pattern.range),
+						tuple(pattern.order),
+					)
+					merged = patterns.get(key)
+					if merged is None:
+						patterns[key] = pattern
+						continue
+					merged.count += pattern.count
+					merged.sample_sql = merged.sample_sql or pattern.sample_sql
+	return sorted(patterns.values(), key=lambda p: p.count, reverse=True), queries
+
+
+# ========== Индексы ==========
+def declared_indexes(base: type[DeclarativeBase]) -> list[IndexDefDTO]:
+	"""
+	Индексы, объявленные в моделях: первичные ключи, атрибуты `*_INDEX`
+	и уникальные `*_CONSTRAINT` (`Base.get_indexes()`/`get_constraints()`),
+	а также прочие индексы и уникальные ограничения таблиц.
+	"""
+	indexes: list[IndexDefDTO] = []
+	for mapper in base.registry.mappers:
+		cls = mapper.class_
+		table = mapper.local_table
+		if not isinstance(table, Table):
+			continue
+		seen: set[int] = set()
+
+		primary_key = table.primary_key
+		indexes.append(
+			IndexDefDTO(
+				table=table.name,
+				name=primary_key.name or f"{table.name}_pkey",
+				columns=[column.name for column in primary_key.columns],
+				unique=True,
+				source="primary_key",
+			),
+		)
+
+		get_indexes = getattr(cls, "get_indexes", None)
+		for attr_name, info in (get_indexes() if get_indexes else {}).items():
+			seen.add(id(info.index))
+			indexes.append(
+				IndexDefDTO(
+					table=table.name,
+					name=info.name or attr_name,
+					columns=[
+						getattr(expression, "name", None) or str(expression)
+						for expression in info.expressions
+					],
+					unique=bool(info.unique),
+					partial=info.postgresql_where is not None,
+					source=f"{cls.__name__}.{attr_name}",
+				),
+			)
+
+		get_constraints = getattr(cls, "get_constraints", None)
+		for attr_name, info in (get_constraints() if get_constraints else {}).items():
+			if not isinstance(info.constraint, UniqueConstraint):
+				continue
+			seen.add(id(info.constraint))
+			indexes.append(
+				IndexDefDTO(
+					table=table.name,
+					name=info.name or attr_name,
+					columns=[column.name for column in info.constraint.columns],
+					unique=True,
+					source=f"{cls.__name__}.{attr_name}",
+				),
+			)
+
+		for index in table.indexes:
+			if id(index) in seen:
+				continue
+			indexes.append(
+				IndexDefDTO(
+					table=table.name,
+					name=index.name or "",
+					columns=[
+						getattr(expression, "name", None) or str(expression)
+						for expression in index.expressions
+					],
+					unique=bool(index.unique),
+					partial=index.dialect_options["postgresql"]["where"] is not None,
+					source="table",
+				),
+			)
+		for constraint in table.constraints:
+			if isinstance(constraint, UniqueConstraint) and id(constraint) not in seen:
+				indexes.append(
+					IndexDefDTO(
+						table=table.name,
+						name=constraint.name or "",
+						columns=[column.name for column in constraint.columns],
+						unique=True,
+						source="table",
+					),
+				)
+	return indexes
+
+
+_INDEX_STATS = text(
+	"""
+	SELECT
+		s.relname AS table_name,
+		s.indexrelname AS index_name,
+		s.idx_scan AS scans,
+		i.indisunique AS is_unique,
+		i.indpred IS NOT NULL AS is_partial,
+		ARRAY(
+			SELECT a.attname::text
+			FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, position)
+			JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+			ORDER BY k.position
+		) AS columns
+	FROM pg_stat_user_indexes s
+	JOIN pg_index i ON i.indexrelid = s.indexrelid
+	""",
+)
+
+
+async def database_indexes(conn: AsyncConnection) -> list[IndexDefDTO]:
+	"""
+	Индексы из `pg_stat_user_indexes` с числом сканирований с последнего
+	сброса статистики. Вне PostgreSQL — пустой список.
+	"""
+	if conn.dialect.name != "postgresql":
+		return []
+	result = await conn.execute(_INDEX_STATS)
+	return [
+		IndexDefDTO(
+			table=row.table_name,
+			name=row.index_name,
+			columns=list(row.columns),
+			unique=row.is_unique,
+			partial=row.is_partial,
+			scans=row.scans,
+		)
+		for row in result
+	]
+
+
+async def explain(conn: AsyncConnection, sql: str) -> str:
+	"""План запроса (`EXPLAIN`, на SQLite — `EXPLAIN QUERY PLAN`) текстом."""
+	prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+	result = await conn.exec_driver_sql(prefix + sql)
+	return "\n".join(str(row[-1]) for row in result)
+
+
+# ========== Анализ ==========
+def _usable(index: IndexDefDTO, pattern: AccessPatternDTO) -> bool:
+	"""Может ли B-tree индекс обслужить шаблон: подходит ли первая колонка."""
+	if not index.columns:
+		return False
+	first = index.columns[0]
+	if first in pattern.equality or first in pattern.range:
+		return True
+	return not pattern.equality and not pattern.range and pattern.order[:1] == [first]
+
+
+def _touches(index: IndexDefDTO, pattern: AccessPatternDTO) -> bool:
+	"""Первая колонка индекса встречается в шаблоне — планировщик может его взять."""
+	return bool(index.columns) and (
+		index.columns[0] in pattern.equality
+		or index.columns[0] in pattern.range
+		or index.columns[0] in pattern.order
+	)
+
+
+def _suggest(pattern: AccessPatternDTO) -> list[str]:
+	"""Равенства, затем первый диапазон или сортировка — порядок колонок B-tree."""
+	columns = list(pattern.equality)
+	if pattern.range:
+		columns.append(pattern.range[0])
+	else:
+		columns.extend(column for column in pattern.order if column not in columns)
+	return columns
+
+
+def _merge_indexes(
+	declared: list[IndexDefDTO],
+	database: list[IndexDefDTO],
+) -> list[IndexDefDTO]:
+	"""Индексы БД с источником из моделей; без статистики БД — объявленные."""
+	if not database:
+		return declared
+	by_name = {(index.table, index.name): index for index in declared}
+	merged = []
+	for index in database:
+		model_index = by_name.get((index.table, index.name))
+		if model_index is not None:
+			index.source = model_index.source
+		merged.append(index)
+	return merged
+
+
+def analyze(
+	patterns: list[AccessPatternDTO],
+	queries: int,
+	declared: list[IndexDefDTO],
+	database: list[IndexDefDTO] | None = None,
+) -> IndexReportDTO:
+	"""
+	Сопоставляет шаблоны доступа с индексами:
+
+	- missing — шаблоны, которые не обслуживает ни один индекс таблицы,
+	  с предлагаемым составом колонок;
+	- unused — неуникальные индексы с нулём сканирований по статистике БД;
+	- unobserved — объявленные неуникальные индексы, первая колонка которых
+	  не встречается ни в одном записанном шаблоне своей таблицы;
+	- redundant — индексы, чьи колонки — префикс другого индекса.
+	"""
+	indexes = _merge_indexes(declared, database or [])
+	by_table: dict[str, list[IndexDefDTO]] = {}
+	for index in indexes:
+		by_table.setdefault(index.table, []).append(index)
+	patterns_by_table: dict[str, list[AccessPatternDTO]] = {}
+	for pattern in patterns:
+		patterns_by_table.setdefault(pattern.table, []).append(pattern)
+
+	missing = [
+		MissingIndexDTO(pattern=pattern, suggested=_suggest(pattern))
+		for pattern in patterns
+		if not any(_usable(index, pattern) for index in by_table.get(pattern.table, []))
+	]
+	unused = [
+		index
+		for index in indexes
+		if index.scans == 0 and not index.unique
+	]
+	unobserved = [
+		index
+		for index in indexes
+		if index.source not in ("db", "primary_key")
+		and not index.unique
+		and index.table in patterns_by_table
+		and not any(_touches(index, p) for p in patterns_by_table[index.table])
+	]
+
+	redundant = []
+	for table_indexes in by_table.values():
+		for index in table_indexes:
+			if index.unique or not index.columns:
+				continue
+			for other in table_indexes:
+				if (
+					other is not index
+					and other.partial == index.partial
+					and other.columns[:len(index.columns)] == index.columns
+					# Из двух одинаковых лишним считается второй
+					and (
+						len(other.columns) > len(index.columns)
+						or other.unique
+						or table_indexes.index(other) < table_indexes.index(index)
+					)
+				):
+					redundant.append(RedundantIndexDTO(index=index, covered_by=other))
+					break
+
+	return IndexReportDTO(
+		missing=missing,
+		unused=unused,
+		unobserved=unobserved,
+		redundant=redundant,
+		queries=queries,
+	)
+
+
+async def advise(
+	conn: AsyncConnection,
+	patterns: list[AccessPatternDTO],
+	queries: int,
+	base: type[DeclarativeBase],
+	explain_top: int = 5,
+) -> IndexReportDTO:
+	"""
+	`analyze` со статистикой индексов из БД и планами EXPLAIN
+	для `explain_top` самых частых шаблонов без индекса.
+	"""
+	report = analyze(patterns, queries, declared_indexes(base), await database_indexes(conn))
+	for missing in report.missing[:explain_top]:
+		sql = missing.pattern.sample_sql
+		if sql is None:
+			continue
+		try:
+			missing.plan = await explain(conn, sql)
+		except Exception as exc:
+			missing.plan = f"EXPLAIN failed: {exc}"
+	return report
@@ -0,0 +1,173 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import Any
+
+from sqlalchemy import ColumnElement, any_, bindparam, inspect, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.core.db.nplusone import detach_query_counter
+from src.core.db.routing import PRIMARY_PIN, dialect_name
+from src.core.db.session import WRITES
+
+
+def match_any(
+	column: ColumnElement[Any] | InstrumentedAttribute[Any],
+	values: Iterable[Any],
+	dialect_name: str,
+) -> ColumnElement[bool]:
+	"""
+	Условие «колонка равна одному из `values`»: `= ANY(:ids)` на PostgreSQL
+	(один prepared statement для любого числа значений), `IN (...)`
+	на остальных СУБД.
+	"""
+	values = list(values)
+	if dialect_name == "postgresql":
+		return column == any_(bindparam("ids", values, type_=ARRAY(column.type)))
+	return column.in_(values)
+
+
+class BatchLoader[K, V]:
+	"""
+	Склеивает одновременные загрузки по ключу в один пакетный запрос.
+
+	Ключи, запрошенные в одной итерации event loop'а, собираются вместе,
+	повторы схлопываются, и `batch_fn` вызывается один раз на каждые
+	`max_batch` ключей. Каждый вызывающий получает своё значение
+	или `None`, ошибка пакета уходит всем его участникам.
+
+	Состояние привязано к текущему event loop: при смене loop'а
+	(тесты, воркеры) незавершённые ключи старого loop'а не переносятся.
+	"""
+
+	def __init__(
+		self,
+		batch_fn: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+		max_batch: int = 500,
+	) -> None:
+		self.batch_fn = batch_fn
+		self.max_batch = max(max_batch, 1)
+
+		self.requests = 0
+		self.keys = 0
+		self.batches = 0
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self._pending: dict[K, asyncio.Future[V | None]] = {}
+		self._tasks: set[asyncio.Task[None]] = set()
+
+	async def load(self, key: K) -> V | None:
+		loop = asyncio.get_running_loop()
+		if loop is not self._loop:
+			self._loop = loop
+			self._pending = {}
+			self._tasks = set()
+
+		self.requests += 1
+		future = self._pending.get(key)
+		if future is None:
+			future = self._pending[key] = loop.create_future()
+			if len(self._pending) == 1:
+				# Отправка — в следующей итерации: к этому моменту свои ключи
+				# успеют добавить все задачи, готовые в текущей
+				loop.call_soon(self._dispatch)
+		# Отмена одного вызывающего не должна отменять общий future
+		return await asyncio.shield(future)
+
+	async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+		return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+	def _dispatch(self) -> None:
+		pending, self._pending = self._pending, {}
+		items = list(pending.items())
+		for start in range(0, len(items), self.max_batch):
+			task = asyncio.create_task(self._run(dict(items[start:start + self.max_batch])))
+			self._tasks.add(task)
+			task.add_done_callback(self._tasks.discard)
+
+	async def _run(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+		# Задача создана из call_soon и унаследовала контекст первого
+		# вызвавшего — пакет с ключами чужих update'ов не его запросы
+		detach_query_counter()
+		self.batches += 1
+		self.keys += len(batch)
+		try:
+			found = await self.batch_fn(list(batch))
+		except Exception as exc:
+			for future in batch.values():
+				if not future.done():
+					future.set_exception(exc)
+			return
+		for key, future in batch.items():
+			if not future.done():
+				future.set_result(found.get(key))
+
+
+class ModelLoaders:
+	"""
+	Загрузчики моделей по колонке (по умолчанию — первичный ключ),
+	общие для всех сессий процесса.
+
+	Пакет читается в собственной короткой сессии из `session_factory`
+	(с репликами — на реплике), объекты возвращаются отсоединёнными;
+	в сессию вызывающего их переносит `session.merge(..., load=False)`
+	без запросов к БД.
+	"""
+
+	def __init__(
+		self,
+		session_factory: async_sessionmaker[AsyncSession],
+		max_batch: int = 500,
+	) -> None:
+		self.session_factory = session_factory
+		self.max_batch = max_batch
+		self._loaders: dict[tuple[type, str], BatchLoader[Any, Any]] = {}
+
+	def get(
+		self,
+		model: type,
+		column: InstrumentedAttribute[Any] | None = None,
+	) -> BatchLoader[Any, Any]:
+		"""
+		Загрузчик `model` по `column`. Колонка должна быть уникальной:
+		на ключ возвращается одна запись.
+		"""
+		if column is None:
+			mapper = inspect(model)
+			column = getattr(model, mapper.get_property_by_column(mapper.primary_key[0]).key)
+		loader = self._loaders.get((model, column.key))
+		if loader is None:
+			loader = self._loaders[(model, column.key)] = BatchLoader(
+				self._make_batch_fn(model, column),
+				self.max_batch,
+			)
+		return loader
+
+	def _make_batch_fn(
+		self,
+		model: type,
+		column: InstrumentedAttribute[Any],
+	) -> Callable[[list[Any]], Awaitable[dict[Any, Any]]]:
+		async def fetch(keys: list[Any]) -> dict[Any, Any]:
+			async with self.session_factory() as session:
+				result = await session.scalars(
+					select(model).where(match_any(column, keys, dialect_name(session))),
+				)
+				return {getattr(instance, column.key): instance for instance in result}
+
+		return fetch
+
+
+def can_batch(session: AsyncSession) -> bool:
+	"""
+	Можно ли читать мимо сессии через общий загрузчик. Нельзя, если сессия
+	уже писала, закреплена за primary или держит несброшенные изменения:
+	чужое соединение не увидит её незакоммиченных записей.
+	"""
+	return not (
+		session.info.get(WRITES)
+		or session.info.get(PRIMARY_PIN)
+		or session.new
+		or session.dirty
+		or session.deleted
+	)
@@ -0,0 +1,475 @@
+"""
+Операции alembic для миграций без долгих блокировок на живой базе.
+
+Регистрируются при импорте модуля (`migrations/env.py`) и доступны
+в ревизиях как `op.<операция>`:
+
+	op.create_index_concurrently(User.USERNAME_INDEX)
+	op.drop_index_concurrently("ix_users_username", "users")
+	op.add_constraint_not_valid(Order.USER_FK_CONSTRAINT)
+	op.validate_constraint("fk_orders_user", "orders")
+	op.add_unique_constraint_concurrently(User.EMAIL_CONSTRAINT)
+	op.set_timeouts(lock_timeout="1s")
+
+Операции `*_concurrently` и `validate_constraint` выполняются вне
+транзакции ревизии (`autocommit_block`) и идемпотентны: после
+повтора миграции из-за lock_timeout уже сделанные шаги пропускаются,
+невалидный индекс от прерванной сборки пересоздаётся.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from alembic.autogenerate import renderers, rewriter
+from alembic.autogenerate.api import AutogenContext
+from alembic.autogenerate.render import _add_index, _drop_index
+from alembic.operations import MigrateOperation, Operations, ops
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+	CheckConstraint,
+	ForeignKeyConstraint,
+	Index,
+	UniqueConstraint,
+	inspect,
+	text,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import AddConstraint, Constraint
+
+# SQLSTATE lock_not_available: сработал lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Таймауты сессии миграций: значения по умолчанию и текущие
+_default_timeouts: dict[str, str] = {}
+_timeouts: dict[str, str] = {}
+
+
+def is_lock_timeout(exc: BaseException) -> bool:
+	orig = getattr(exc, "orig", None)
+	code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+	return isinstance(exc, DBAPIError) and code == LOCK_NOT_AVAILABLE
+
+
+def _apply_timeouts(context: MigrationContext, timeouts: dict[str, str]) -> None:
+	for name, value in timeouts.items():
+		context.execute(f"SET {name} = '{value}'")
+	_timeouts.update(timeouts)
+
+
+def configure_timeouts(
+	context: MigrationContext,
+	lock_timeout: str,
+	statement_timeout: str,
+) -> None:
+	"""
+	Задаёт таймауты по умолчанию для всех ревизий (на уровне сессии, чтобы
+	они действовали и в `autocommit_block`). Вне PostgreSQL ничего не делает.
+	"""
+	if context.dialect.name != "postgresql":
+		return
+	_default_timeouts.clear()
+	_default_timeouts.update(
+		lock_timeout=lock_timeout,
+		statement_timeout=statement_timeout,
+	)
+	_apply_timeouts(context, _default_timeouts)
+
+
+def reset_timeouts(ctx: MigrationContext, **kwargs: Any) -> None:  # noqa: ANN401
+	"""`on_version_apply`: возвращает таймауты по умолчанию после каждой ревизии."""
+	if _timeouts != _default_timeouts:
+		_apply_timeouts(ctx, _default_timeouts)
+
+
+@contextmanager
+def _no_statement_timeout(operations: Operations) -> Iterator[None]:
+	"""Сборка индекса и VALIDATE могут идти долго и никого не блокируют."""
+	previous = _timeouts.get("statement_timeout")
+	if previous in (None, "0"):
+		yield
+		return
+	operations.execute("SET statement_timeout = 0")
+	try:
+		yield
+	finally:
+		operations.execute(f"SET statement_timeout = '{previous}'")
+
+
+def _is_postgresql(operations: Operations) -> bool:
+	return operations.get_context().dialect.name == "postgresql"
+
+
+def _online(operations: Operations) -> bool:
+	"""Можно ли смотреть в каталог: не offline-режим (`--sql`)."""
+	return not operations.get_context().as_sql
+
+
+def _index_state(operations: Operations, name: str, schema: str | None) -> bool | None:
+	"""True — индекс валиден, False — остался невалидным после сбоя, None — нет."""
+	return operations.get_bind().execute(
+		text(
+			"SELECT i.indisvalid FROM pg_index i "
+			"JOIN pg_class c ON c.oid = i.indexrelid "
+			"WHERE c.oid = to_regclass(:name)",
+		),
+		{"name": f"{schema}.{name}" if schema else name},
+	).scalar()
+
+
+def _constraint_exists(operations: Operations, name: str, table: str, schema: str | None) -> bool:
+	return bool(
+		operations.get_bind().execute(
+			text(
+				"SELECT 1 FROM pg_constraint "
+				"WHERE conname = :name AND conrelid = to_regclass(:table)",
+			),
+			{"name": name, "table": f"{schema}.{table}" if schema else table},
+		).scalar(),
+	)
+
+
+# ========== Индексы ==========
+@Operations.register_operation("create_index_concurrently")
+class CreateIndexConcurrentlyOp(ops.CreateIndexOp):
+	"""`CREATE INDEX CONCURRENTLY IF NOT EXISTS` вне транзакции ревизии."""
+
+	@classmethod
+	def create_index_concurrently(
+		cls,
+		operations: Operations,
+		index_name: str | Index,
+		table_name: str | None = None,
+		columns: Any = None,  # noqa: ANN401
+		**kw: Any,  # noqa: ANN401
+	) -> None:
+		"""
+		:param index_name: имя индекса или сам `Index` — например, атрибут
+			модели `User.USERNAME_INDEX` (с его колонками, уникальностью
+			и partial-условием)
+		"""
+		if isinstance(index_name, Index):
+			operation = cls.from_index(index_name)
+		else:
+			operation = cls(index_name, table_name, columns, **kw)
+		return operations.invoke(operation)
+
+	def reverse(self) -> "DropIndexConcurrentlyOp":
+		return DropIndexConcurrentlyOp.from_index(self.to_index())
+
+
+@Operations.register_operation("drop_index_concurrently")
+class DropIndexConcurrentlyOp(ops.DropIndexOp):
+	"""`DROP INDEX CONCURRENTLY IF EXISTS` вне транзакции ревизии."""
+
+	@classmethod
+	def drop_index_concurrently(
+		cls,
+		operations: Operations,
+		index_name: str | Index,
+		table_name: str | None = None,
+		**kw: Any,  # noqa: ANN401
+	) -> None:
+		if isinstance(index_name, Index):
+			operation = cls.from_index(index_name)
+		else:
+			operation = cls(index_name, table_name, **kw)
+		return operations.invoke(operation)
+
+	def reverse(self) -> CreateIndexConcurrentlyOp:
+		return CreateIndexConcurrentlyOp.from_index(self.to_index())
+
+
+def _index_kw(kw: dict[str, Any]) -> dict[str, Any]:
+	return {key: value for key, value in kw.items() if key != "postgresql_concurrently"}
+
+
+@Operations.implementation_for(CreateIndexConcurrentlyOp)
+def create_index_concurrently(operations: Operations, operation: CreateIndexConcurrentlyOp) -> None:
+	if not _is_postgresql(operations):
+		operations.create_index(
+			operation.index_name,
+			operation.table_name,
+			operation.columns,
+			schema=operation.schema,
+			unique=operation.unique,
+			**_index_kw(operation.kw),
+		)
+		return
+
+	with operations.get_context().autocommit_block():
+		if _online(operations):
+			state = _index_state(operations, operation.index_name, operation.schema)
+			if state is True:
+				return
+			if state is False:
+				operations.drop_index(
+					operation.index_name,
+					operation.table_name,
+					schema=operation.schema,
+					postgresql_concurrently=True,
+					if_exists=True,
+				)
+		with _no_statement_timeout(operations):
+			operations.create_index(
+				operation.index_name,
+				operation.table_name,
+				operation.columns,
+				schema=operation.schema,
+				unique=operation.unique,
+				if_not_exists=True,
+				postgresql_concurrently=True,
+				**_index_kw(operation.kw),
+			)
+
+
+@Operations.implementation_for(DropIndexConcurrentlyOp)
+def drop_index_concurrently(operations: Operations, operation: DropIndexConcurrentlyOp) -> None:
+	if not _is_postgresql(operations):
+		operations.drop_index(
+			operation.index_name,
+			operation.table_name,
+			schema=operation.schema,
+		)
+		return
+
+	with operations.get_context().autocommit_block():
+		operations.drop_index(
+			operation.index_name,
+			operation.table_name,
+			schema=operation.schema,
+			if_exists=True,
+			postgresql_concurrently=True,
+		)
+
+
+@renderers.dispatch_for(CreateIndexConcurrentlyOp)
+def _render_create_index(autogen_context: AutogenContext, op: CreateIndexConcurrentlyOp) -> str:
+	return _add_index(autogen_context, op).replace(
+		"create_index(",
+		"create_index_concurrently(",
+		1,
+	)
+
+
+@renderers.dispatch_for(DropIndexConcurrentlyOp)
+def _render_drop_index(autogen_context: AutogenContext, op: DropIndexConcurrentlyOp) -> str:
+	return _drop_index(autogen_context, op).replace(
+		"drop_index(",
+		"drop_index_concurrently(",
+		1,
+	)
+
+
+# ========== Ограничения ==========
+def _constraint_table(constraint: Constraint) -> tuple[str, str | None]:
+	table = constraint.table
+	return table.name, table.schema
+
+
+@Operations.register_operation("add_constraint_not_valid")
+class AddConstraintNotValidOp(MigrateOperation):
+	"""
+	`ALTER TABLE ... ADD CONSTRAINT ... NOT VALID`: FOREIGN KEY или CHECK
+	без проверки существующих строк — блокировка на миг, а не на обход
+	таблицы. Новые строки проверяются сразу; старые — `validate_constraint`.
+	"""
+
+	def __init__(self, constraint: ForeignKeyConstraint | CheckConstraint) -> None:
+		self.constraint = constraint
+
+	@classmethod
+	def add_constraint_not_valid(
+		cls,
+		operations: Operations,
+		constraint: ForeignKeyConstraint | CheckConstraint,
+	) -> None:
+		"""
+		:param constraint: ограничение, привязанное к таблице, например
+			атрибут модели `Order.USER_FK_CONSTRAINT`
+		"""
+		return operations.invoke(cls(constraint))
+
+	def reverse(self) -> ops.DropConstraintOp:
+		return ops.DropConstraintOp.from_constraint(self.constraint)
+
+
+@Operations.implementation_for(AddConstraintNotValidOp)
+def add_constraint_not_valid(operations: Operations, operation: AddConstraintNotValidOp) -> None:
+	constraint = operation.constraint
+	table, schema = _constraint_table(constraint)
+	if not _is_postgresql(operations):
+		operations.execute(AddConstraint(constraint))
+		return
+	if _online(operations) and _constraint_exists(operations, constraint.name, table, schema):
+		return
+	sql = AddConstraint(constraint).compile(dialect=operations.get_context().dialect)
+	operations.execute(f"{sql} NOT VALID")
+
+
+@Operations.register_operation("validate_constraint")
+class ValidateConstraintOp(MigrateOperation):
+	"""
+	`ALTER TABLE ... VALIDATE CONSTRAINT` вне транзакции ревизии: проверка
+	старых строк под SHARE UPDATE EXCLUSIVE, чтение и запись не блокируются.
+	"""
+
+	def __init__(self, constraint_name: str, table_name: str, schema: str | None = None) -> None:
+		self.constraint_name = constraint_name
+		self.table_name = table_name
+		self.schema = schema
+
+	@classmethod
+	def validate_constraint(
+		cls,
+		operations: Operations,
+		constraint_name: str,
+		table_name: str,
+		schema: str | None = None,
+	) -> None:
+		return operations.invoke(cls(constraint_name, table_name, schema))
+
+
+@Operations.implementation_for(ValidateConstraintOp)
+def validate_constraint(operations: Operations, operation: ValidateConstraintOp) -> None:
+	if not _is_postgresql(operations):
+		return
+	preparer = operations.get_context().dialect.identifier_preparer
+	table = preparer.quote(operation.table_name)
+	if operation.schema:
+		table = f"{preparer.quote_schema(operation.schema)}.{table}"
+	with operations.get_context().autocommit_block(), _no_statement_timeout(operations):
+		# Повторная проверка уже валидного ограничения — no-op
+		operations.execute(
+			f"ALTER TABLE {table} VALIDATE CONSTRAINT "
+			f"{preparer.quote(operation.constraint_name)}",
+		)
+
+
+@Operations.register_operation("add_unique_constraint_concurrently")
+class AddUniqueConstraintConcurrentlyOp(MigrateOperation):
+	"""
+	UNIQUE без блокировки записи: уникальный индекс `CONCURRENTLY`,
+	затем `ADD CONSTRAINT ... UNIQUE USING INDEX` (мгновенно).
+	"""
+
+	def __init__(self, constraint: UniqueConstraint) -> None:
+		self.constraint = constraint
+
+	@classmethod
+	def add_unique_constraint_concurrently(
+		cls,
+		operations: Operations,
+		constraint: UniqueConstraint,
+	) -> None:
+		return operations.invoke(cls(constraint))
+
+	def reverse(self) -> ops.DropConstraintOp:
+		return ops.DropConstraintOp.from_constraint(self.constraint)
+
+
+@Operations.implementation_for(AddUniqueConstraintConcurrentlyOp)
+def add_unique_constraint_concurrently(
+	operations: Operations,
+	operation: AddUniqueConstraintConcurrentlyOp,
+) -> None:
+	constraint = operation.constraint
+	table, schema = _constraint_table(constraint)
+	columns = [column.name for column in constraint.columns]
+	if not _is_postgresql(operations):
+		operations.create_unique_constraint(constraint.name, table, columns, schema=schema)
+		return
+	if _online(operations) and _constraint_exists(operations, constraint.name, table, schema):
+		return
+
+	operations.create_index_concurrently(
+		constraint.name,
+		table,
+		columns,
+		schema=schema,
+		unique=True,
+	)
+	preparer = operations.get_context().dialect.identifier_preparer
+	quoted_table = preparer.quote(table)
+	if schema:
+		quoted_table = f"{preparer.quote_schema(schema)}.{quoted_table}"
+	name = preparer.quote(constraint.name)
+	operations.execute(
+		f"ALTER TABLE {quoted_table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}",
+	)
+
+
+# ========== Таймауты ==========
+@Operations.register_operation("set_timeouts")
+class SetTimeoutsOp(MigrateOperation):
+	"""
+	Таймауты для текущей ревизии (`'5s'`, `'1min'`, `0` — без ограничения).
+	После ревизии возвращаются значения по умолчанию из конфига.
+	"""
+
+	def __init__(self, lock_timeout: str | None, statement_timeout: str | None) -> None:
+		self.lock_timeout = lock_timeout
+		self.statement_timeout = statement_timeout
+
+	@classmethod
+	def set_timeouts(
+		cls,
+		operations: Operations,
+		lock_timeout: str | None = None,
+		statement_timeout: str | None = None,
+	) -> None:
+		return operations.invoke(cls(lock_timeout, statement_timeout))
+
+
+@Operations.implementation_for(SetTimeoutsOp)
+def set_timeouts(operations: Operations, operation: SetTimeoutsOp) -> None:
+	if not _is_postgresql(operations):
+		return
+	timeouts = {
+		name: value
+		for name, value in (
+			("lock_timeout", operation.lock_timeout),
+			("statement_timeout", operation.statement_timeout),
+		)
+		if value is not None
+	}
+	_apply_timeouts(operations.get_context(), timeouts)
+
+
+# ========== Autogenerate ==========
+concurrent_index_rewriter = rewriter.Rewriter()
+
+
+def _table_exists(context: MigrationContext, table_name: str, schema: str | None) -> bool:
+	return context.bind is not None and inspect(context.bind).has_table(table_name, schema)
+
+
+@concurrent_index_rewriter.rewrites(ops.CreateIndexOp)
+def _rewrite_create_index(
+	context: MigrationContext,
+	revision: Any,  # noqa: ANN401
+	op: ops.CreateIndexOp,
+) -> ops.CreateIndexOp:
+	# Индексы новой (пустой) таблицы строятся обычным образом в транзакции
+	if (
+		type(op) is ops.CreateIndexOp
+		and context.dialect.name == "postgresql"
+		and _table_exists(context, op.table_name, op.schema)
+	):
+		return CreateIndexConcurrentlyOp.from_index(op.to_index())
+	return op
+
+
+@concurrent_index_rewriter.rewrites(ops.DropIndexOp)
+def _rewrite_drop_index(
+	context: MigrationContext,
+	revision: Any,  # noqa: ANN401
+	op: ops.DropIndexOp,
+) -> ops.DropIndexOp:
+	if (
+		type(op) is ops.DropIndexOp
+		and context.dialect.name == "postgresql"
+		and op.table_name is not None
+		and _table_exists(context, op.table_name, op.schema)
+	):
+		return DropIndexConcurrentlyOp.from_index(op.to_index())
+	return op
@@ -0,0 +1,189 @@
+import os
+import sys
+import sysconfig
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import FrameType
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from src.core.db.query_stats import fingerprint
+from src.schemas.dataclasses import NPlusOneDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+# Кадры из этих каталогов — не место вызова: SQLAlchemy, asyncio, сам детектор
+_LIBRARY_PATHS = tuple(
+	{
+		sysconfig.get_paths()["stdlib"],
+		sysconfig.get_paths()["purelib"],
+		sysconfig.get_paths()["platlib"],
+		os.path.dirname(__file__),
+	},
+)
+
+_current: ContextVar["QueryCounter | None"] = ContextVar("query_counter", default=None)
+
+
+class NPlusOneError(AssertionError):
+	"""Повторяющиеся запросы сверх порога (при `raise_errors`)."""
+
+	def __init__(self, offenders: list[NPlusOneDTO]) -> None:
+		self.offenders = offenders
+		lines = [
+			f"{o.kind} x{o.count}: {o.fingerprint} (at {o.call_site})"
+			for o in offenders
+		]
+		super().__init__("N+1 queries detected:\n" + "\n".join(lines))
+
+
+class _Pattern:
+	__slots__ = ("kind", "count", "call_site")
+
+	def __init__(self, kind: str, call_site: str) -> None:
+		self.kind = kind
+		self.count = 0
+		self.call_site = call_site
+
+
+class QueryCounter:
+	"""
+	Счётчик ORM-запросов одного update'а (или блока в тесте) по отпечаткам.
+
+	Отпечаток ленивой загрузки — связь (`User.orders`), догрузки колонок —
+	модель, остальных запросов — нормализованный SQL. Место вызова
+	запоминается один раз, при первом запросе отпечатка.
+	"""
+
+	def __init__(self, threshold: int, handler: str | None = None) -> None:
+		self.threshold = threshold
+		self.handler = handler
+		self.total = 0
+		self._patterns: dict[str, _Pattern] = {}
+
+	def record(self, key: str, kind: str) -> None:
+		self.total += 1
+		pattern = self._patterns.get(key)
+		if pattern is None:
+			pattern = self._patterns[key] = _Pattern(kind, _call_site())
+		pattern.count += 1
+
+	def offenders(self) -> list[NPlusOneDTO]:
+		"""Отпечатки, выполненные не меньше `threshold` раз, по убыванию числа."""
+		found = [
+			NPlusOneDTO(
+				fingerprint=key,
+				kind=pattern.kind,
+				count=pattern.count,
+				call_site=pattern.call_site,
+				handler=self.handler,
+			)
+			for key, pattern in self._patterns.items()
+			if pattern.count >= self.threshold
+		]
+		found.sort(key=lambda dto: dto.count, reverse=True)
+		return found
+
+
+def _call_site() -> str:
+	"""
+	Первый кадр кода проекта. Запросы AsyncSession выполняются в дочернем
+	greenlet'е, поэтому после его кадров обходится стек родителя,
+	ожидающего в `greenlet_spawn`.
+	"""
+	frame: FrameType | None = sys._getframe(2)
+	current: greenlet.greenlet | None = greenlet.getcurrent()
+	while current is not None:
+		while frame is not None:
+			filename = frame.f_code.co_filename
+			if not filename.startswith(_LIBRARY_PATHS) and not filename.startswith("<"):
+				return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+			frame = frame.f_back
+		current = current.parent
+		frame = current.gr_frame if current is not None else None
+	return "unknown"
+
+
+def _on_execute(execute_state: ORMExecuteState) -> None:
+	counter = _current.get()
+	if counter is None:
+		return
+
+	if execute_state.is_relationship_load:
+		path = execute_state.loader_strategy_path
+		key = f"lazy load {path[-1] if path else '?'}"
+		kind = "lazy_load"
+	elif execute_state.is_column_load:
+		mapper = execute_state.bind_mapper
+		key = f"column load {mapper.class_.__name__ if mapper else '?'}"
+		kind = "column_load"
+	else:
+		try:
+			key = fingerprint(str(execute_state.statement))
+		except Exception:
+			key = type(execute_state.statement).__name__
+		kind = "query"
+	counter.record(key, kind)
+
+
+def detect_n_plus_one(session_class: type[Session]) -> None:
+	"""
+	Подписывает сессии на учёт запросов в активном `QueryCounter`.
+	Без активного счётчика слушатель сразу возвращается.
+	"""
+	if not event.contains(session_class, "do_orm_execute", _on_execute):
+		event.listen(session_class, "do_orm_execute", _on_execute)
+
+
+def current_query_counter() -> QueryCounter | None:
+	return _current.get()
+
+
+def detach_query_counter() -> None:
+	"""
+	Отвязывает текущую задачу от счётчика, унаследованного с контекстом:
+	её запросы не относятся к update'у, который её породил.
+	"""
+	_current.set(None)
+
+
+@contextmanager
+def count_queries(
+	threshold: int = 5,
+	raise_errors: bool = False,
+	handler: str | None = None,
+) -> Iterator[QueryCounter]:
+	"""
+	Считает ORM-запросы внутри блока и пишет в лог отпечатки, повторённые
+	`threshold` раз и больше («N+1 queries detected»).
+
+	:param raise_errors: после успешного выхода из блока поднять
+		`NPlusOneError` — для тестов на регрессии
+
+	Пример:
+		with count_queries(threshold=3, raise_errors=True):
+			await dp.feed_update(bot, update)
+	"""
+	counter = QueryCounter(threshold, handler)
+	token = _current.set(counter)
+	try:
+		yield counter
+	finally:
+		_current.reset(token)
+		offenders = counter.offenders()
+		for offender in offenders:
+			logger.warning(
+				"N+1 queries detected",
+				handler=offender.handler,
+				kind=offender.kind,
+				fingerprint=offender.fingerprint,
+				count=offender.count,
+				call_site=offender.call_site,
+				total_queries=counter.total,
+			)
+	if offenders and raise_errors:
+		raise NPlusOneError(offenders)
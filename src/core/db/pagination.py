@@ -0,0 +1,236 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import (
+	ClauseElement,
+	ColumnElement,
+	Executable,
+	Select,
+	Table,
+	and_,
+	func,
+	or_,
+	select,
+	text,
+	tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.compiler import SQLCompiler
+
+from src.core.db.routing import dialect_name
+from src.core.db.soft_delete import soft_delete_options
+from src.schemas.enums import SortOrder
+
+# Ниже этого порога оценка ненадёжна, а точный COUNT(*) и так дешёвый
+EXACT_COUNT_THRESHOLD = 1000
+
+type OrderKey = InstrumentedAttribute[Any] | tuple[InstrumentedAttribute[Any], SortOrder]
+
+
+# ========== Курсор ==========
+def normalize_order(
+	order_by: Sequence[OrderKey],
+	tiebreaker: InstrumentedAttribute[Any],
+) -> list[tuple[InstrumentedAttribute[Any], SortOrder]]:
+	"""
+	Приводит ключи сортировки к парам (атрибут, направление) и добавляет
+	в конец `tiebreaker` (первичный ключ), чтобы порядок был строгим.
+	"""
+	keys = [
+		key if isinstance(key, tuple) else (key, SortOrder.ASC)
+		for key in order_by
+	]
+	if not any(attr is tiebreaker for attr, _ in keys):
+		keys.append((tiebreaker, SortOrder.ASC))
+	return keys
+
+
+def _fingerprint(keys: Sequence[tuple[InstrumentedAttribute[Any], SortOrder]]) -> list[str]:
+	return [f"{attr.class_.__name__}.{attr.key}:{order}" for attr, order in keys]
+
+
+def _dump_value(value: Any) -> Any:  # noqa: ANN401
+	# JSON не различает datetime/UUID/Decimal и строки — помечаем тип
+	if isinstance(value, datetime):
+		return {"dt": value.isoformat()}
+	if isinstance(value, date):
+		return {"d": value.isoformat()}
+	if isinstance(value, UUID):
+		return {"u": str(value)}
+	if isinstance(value, Decimal):
+		return {"n": str(value)}
+	return value
+
+
+def _load_value(value: Any) -> Any:  # noqa: ANN401
+	if not isinstance(value, dict):
+		return value
+	(tag, raw), = value.items()
+	match tag:
+		case "dt":
+			return datetime.fromisoformat(raw)
+		case "d":
+			return date.fromisoformat(raw)
+		case "u":
+			return UUID(raw)
+		case "n":
+			return Decimal(raw)
+	raise ValueError(f"Неизвестный тип значения в курсоре: {tag}")
+
+
+def encode_cursor(
+	keys: Sequence[tuple[InstrumentedAttribute[Any], SortOrder]],
+	instance: Any,  # noqa: ANN401
+) -> str:
+	"""
+	Кодирует значения ключей сортировки последней записи страницы
+	в непрозрачную строку (base64url от JSON).
+	"""
+	values = [getattr(instance, attr.key) for attr, _ in keys]
+	if any(value is None for value in values):
+		raise ValueError(
+			"Ключи keyset-пагинации не должны быть NULL: "
+			f"{', '.join(_fingerprint(keys))}",
+		)
+	payload = json.dumps(
+		{"k": _fingerprint(keys), "v": [_dump_value(value) for value in values]},
+		separators=(",", ":"),
+	)
+	return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(
+	keys: Sequence[tuple[InstrumentedAttribute[Any], SortOrder]],
+	cursor: str,
+) -> list[Any]:
+	"""
+	Декодирует курсор, проверяя, что он выдан для той же сортировки.
+
+	:raises ValueError: курсор повреждён или от другой сортировки
+	"""
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+		payload = json.loads(raw)
+		values = [_load_value(value) for value in payload["v"]]
+		fingerprint = payload["k"]
+	except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+		raise ValueError("Некорректный курсор пагинации") from exc
+
+	if fingerprint != _fingerprint(keys) or len(values) != len(keys):
+		raise ValueError("Курсор выдан для другой сортировки")
+	return values
+
+
+def keyset_predicate(
+	keys: Sequence[tuple[InstrumentedAttribute[Any], SortOrder]],
+	values: Sequence[Any],
+) -> ColumnElement[bool]:
+	"""
+	Условие «строго после записи с `values`» для сортировки `keys`.
+
+	При одном направлении у всех ключей — сравнение кортежей
+	`(a, b) > (:a, :b)`, которое PostgreSQL отдаёт индексу целиком.
+	При смешанных направлениях — развёрнутая форма
+	`a > :a OR (a = :a AND b < :b) ...`.
+	"""
+	orders = {order for _, order in keys}
+	if len(orders) == 1:
+		left = tuple_(*(attr for attr, _ in keys))
+		right = tuple_(*values)
+		return left > right if SortOrder.ASC in orders else left < right
+
+	clauses = []
+	for i, (attr, order) in enumerate(keys):
+		equal = [keys[j][0] == values[j] for j in range(i)]
+		after = attr > values[i] if order == SortOrder.ASC else attr < values[i]
+		clauses.append(and_(*equal, after))
+	return or_(*clauses)
+
+
+def order_clauses(
+	keys: Sequence[tuple[InstrumentedAttribute[Any], SortOrder]],
+) -> list[ColumnElement[Any]]:
+	return [
+		attr.asc() if order == SortOrder.ASC else attr.desc()
+		for attr, order in keys
+	]
+
+
+# ========== Подсчёт ==========
+class _ExplainJSON(Executable, ClauseElement):
+	"""`EXPLAIN (FORMAT JSON) <statement>` с параметрами исходного запроса."""
+
+	inherit_cache = False
+
+	def __init__(self, statement: Select[Any]) -> None:
+		self.statement = statement
+
+
+@compiles(_ExplainJSON, "postgresql")
+def _compile_explain(element: _ExplainJSON, compiler: SQLCompiler, **kw: Any) -> str:  # noqa: ANN401
+	return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _count_source(statement: Select[Any]) -> Select[Any]:
+	return statement.order_by(None).limit(None).offset(None)
+
+
+async def exact_count(session: AsyncSession, statement: Select[Any]) -> int:
+	"""Точный `COUNT(*)` по выборке `statement` без сортировки и лимитов."""
+	subquery = _count_source(statement).subquery()
+	return await session.scalar(select(func.count()).select_from(subquery)) or 0
+
+
+async def estimate_count(
+	session: AsyncSession,
+	statement: Select[Any],
+	threshold: int = EXACT_COUNT_THRESHOLD,
+) -> tuple[int, bool]:
+	"""
+	Оценка числа строк выборки без COUNT(*).
+
+	Запрос без условий к одной таблице — `pg_class.reltuples` (обновляется
+	VACUUM/ANALYZE), иначе — число строк верхнего узла `EXPLAIN`.
+	Фильтр мягкого удаления — тоже условие, поэтому для таких моделей
+	используется EXPLAIN. Если статистики нет, не PostgreSQL или оценка
+	меньше `threshold`, считается точно.
+
+	:return: (число строк, оценка ли это)
+	"""
+	if dialect_name(session) != "postgresql":
+		return await exact_count(session, statement), False
+
+	source = _count_source(statement)
+	plan = soft_delete_options(source)
+	froms = source.get_final_froms()
+	single_table = len(froms) == 1 and isinstance(froms[0], Table)
+	unfiltered = single_table and source.whereclause is None and (
+		not plan or "deleted_at" not in froms[0].c
+	)
+
+	estimate: int | None = None
+	if unfiltered:
+		reltuples = await session.scalar(
+			text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+			{"name": froms[0].fullname},
+		)
+		# -1: таблицу ещё ни разу не анализировали
+		if reltuples is not None and reltuples >= 0:
+			estimate = int(reltuples)
+	else:
+		rows = await session.scalar(_ExplainJSON(source.options(*plan)))
+		if isinstance(rows, str):
+			rows = json.loads(rows)
+		estimate = int(rows[0]["Plan"]["Plan Rows"])
+
+	if estimate is None or estimate < threshold:
+		return await exact_count(session, statement), False
+	return estimate, True
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from sqlalchemy.util.queue import Empty
+
+from src.core.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT, track_db_pool
+from src.core.tracing import end_span, start_span
+
+# resize() меняет внутренние поля QueuePool и asyncio.Queue — проверено
+# на этих минорных версиях SQLAlchemy, на остальных автотюнинг выключается
+RESIZE_SQLALCHEMY_VERSIONS = ("2.0", "2.1")
+
+
+@dataclass(slots=True)
+class PoolWindow:
+	"""Счётчики пула за одно окно наблюдения автотюнера."""
+
+	checkouts: int = 0
+	wait_total: float = 0.0
+	wait_max: float = 0.0
+	timeouts: int = 0
+	peak_checked_out: int = 0
+	peak_overflow: int = 0
+
+	@property
+	def wait_avg(self) -> float:
+		return self.wait_total / self.checkouts if self.checkouts else 0.0
+
+
+def resize_supported() -> bool:
+	"""
+	Можно ли менять размер пула на лету: версия SQLAlchemy из проверенных
+	и на месте все внутренние поля, которые трогает `resize`.
+	"""
+	version = ".".join(sqlalchemy.__version__.split(".")[:2])
+	if version not in RESIZE_SQLALCHEMY_VERSIONS:
+		return False
+	# creator не вызывается: соединения не открываются
+	pool = AsyncAdaptedQueuePool(lambda: None, pool_size=1)
+	return (
+		isinstance(getattr(pool, "_overflow", None), int)
+		and hasattr(pool, "_overflow_lock")
+		and isinstance(getattr(pool._pool, "maxsize", None), int)
+		and isinstance(getattr(asyncio.Queue(), "_maxsize", None), int)
+	)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+	"""
+	Стандартный пул async engine с замером времени получения соединения.
+	Состояние пула (checked out, overflow) читается метриками при запросе.
+
+	Размер пула можно менять на лету (`resize`), счётчики текущего окна
+	забирает `PoolAutotuner` (`take_window`).
+	"""
+
+	def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+		super().__init__(*args, **kwargs)
+		self.window = PoolWindow()
+		track_db_pool(self)
+
+	def _do_get(self) -> ConnectionPoolEntry:
+		started_at = time.perf_counter()
+		span = start_span("db.pool.acquire")
+		try:
+			record = super()._do_get()
+		except PoolTimeoutError as exc:
+			DB_POOL_TIMEOUTS.inc()
+			self.window.timeouts += 1
+			end_span(span, exc)
+			raise
+		finally:
+			end_span(span)
+			wait = time.perf_counter() - started_at
+			DB_POOL_WAIT.observe(wait)
+		self._record_checkout(wait)
+		return record
+
+	def _record_checkout(self, wait: float) -> None:
+		window = self.window
+		window.checkouts += 1
+		window.wait_total += wait
+		window.wait_max = max(window.wait_max, wait)
+		window.peak_checked_out = max(window.peak_checked_out, self.checkedout())
+		window.peak_overflow = max(window.peak_overflow, self._overflow)
+
+	def take_window(self) -> PoolWindow:
+		"""Возвращает счётчики окна и начинает новое с текущего состояния."""
+		window = self.window
+		self.window = PoolWindow(
+			peak_checked_out=self.checkedout(),
+			peak_overflow=max(self._overflow, 0),
+		)
+		return window
+
+	def resize(self, pool_size: int) -> None:
+		"""
+		Меняет число постоянных соединений, не трогая `max_overflow`:
+		всего соединений становится не больше `pool_size + max_overflow`.
+		Лишние простаивающие соединения закрываются сразу, занятые —
+		при возврате в пул.
+
+		Закрытие соединения async-драйвера требует greenlet-контекста:
+		из корутины вызывайте через `greenlet_spawn(pool.resize, size)`.
+		Опирается на внутренние поля пула — перед использованием
+		проверяйте `resize_supported()`.
+		"""
+		with self._overflow_lock:
+			delta = pool_size - self._pool.maxsize
+			self._pool.maxsize = pool_size
+			# asyncio.Queue создаётся лениво и хранит лимит у себя
+			if "_queue" in vars(self._pool):
+				self._pool._queue._maxsize = pool_size
+			# Общее число соединений = maxsize + _overflow — сохраняем его
+			self._overflow -= delta
+
+		while self._pool.qsize() > pool_size:
+			try:
+				record = self._pool.get(False)
+			except Empty:
+				break
+			try:
+				record.close()
+			finally:
+				self._dec_overflow()
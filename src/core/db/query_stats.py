@@ -0,0 +1,235 @@
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import cfg
+from src.schemas.dataclasses import QueryStatDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+OTHER_FINGERPRINT = "<other>"
+# Сколько bind-параметров показывать в логе медленного запроса
+MAX_SHAPE_PARAMS = 20
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_TUPLES = re.compile(rf"{_TUPLE}(?:\s*,\s*{_TUPLE})+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+	"""
+	Отпечаток запроса: литералы и плейсхолдеры заменены на `?`, списки
+	IN и строки multi-row VALUES свёрнуты — запросы, отличающиеся только
+	значениями или размером пачки, получают один отпечаток.
+
+	SQLAlchemy отдаёт один и тот же текст для одного и того же запроса,
+	поэтому результат кешируется по строке.
+	"""
+	text = _STRING.sub("?", statement)
+	text = _PLACEHOLDER.sub("?", text)
+	text = _NUMBER.sub("?", text)
+	text = _IN_LIST.sub("IN (...)", text)
+	text = _TUPLES.sub("(...), ...", text)
+	return _SPACE.sub(" ", text).strip()
+
+
+def _value_shape(value: Any) -> str:  # noqa: ANN401
+	if value is None:
+		return "null"
+	if isinstance(value, (str, bytes, list, tuple, dict, set)):
+		return f"{type(value).__name__}[{len(value)}]"
+	return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:  # noqa: ANN401
+	"""
+	Форма bind-параметров для лога: типы и размеры без значений
+	(в значениях могут быть персональные данные).
+	"""
+	if executemany:
+		first = parameters[0] if parameters else None
+		return {"rows": len(parameters), "first": parameter_shape(first)}
+	if isinstance(parameters, dict):
+		items = list(parameters.items())
+		shape: Any = {key: _value_shape(value) for key, value in items[:MAX_SHAPE_PARAMS]}
+	elif isinstance(parameters, (list, tuple)):
+		items = list(parameters)
+		shape = [_value_shape(value) for value in items[:MAX_SHAPE_PARAMS]]
+	else:
+		return _value_shape(parameters)
+	if len(items) > MAX_SHAPE_PARAMS:
+		return {"count": len(items), "first": shape}
+	return shape
+
+
+def _percentile(samples: list[float], q: float) -> float:
+	if not samples:
+		return 0.0
+	return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class _FingerprintStat:
+	__slots__ = ("count", "total", "max", "rows", "samples")
+
+	def __init__(self, sample_size: int) -> None:
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.rows = 0
+		self.samples: deque[float] = deque(maxlen=sample_size)
+
+
+class QueryStatsCollector:
+	"""
+	Агрегирует время и строки SQL-запросов по отпечаткам и пишет в лог
+	запросы дольше `slow_threshold`.
+
+	p50/p95 считаются по последним `sample_size` выполнениям отпечатка
+	при чтении статистики; на горячем пути — только обновление счётчиков.
+	"""
+
+	def __init__(
+		self,
+		slow_threshold: float = 0.2,
+		max_fingerprints: int = 1000,
+		sample_size: int = 512,
+	) -> None:
+		self.slow_threshold = slow_threshold
+		self.max_fingerprints = max_fingerprints
+		self.sample_size = sample_size
+		self._stats: dict[str, _FingerprintStat] = {}
+
+	def record(
+		self,
+		statement: str,
+		duration: float,
+		rows: int,
+		parameters: Any = None,  # noqa: ANN401
+		executemany: bool = False,
+	) -> None:
+		key = fingerprint(statement)
+		stat = self._stats.get(key)
+		if stat is None:
+			if len(self._stats) >= self.max_fingerprints:
+				key = OTHER_FINGERPRINT
+				stat = self._stats.get(key)
+			if stat is None:
+				stat = self._stats[key] = _FingerprintStat(self.sample_size)
+
+		stat.count += 1
+		stat.total += duration
+		stat.rows += rows
+		stat.samples.append(duration)
+		stat.max = max(stat.max, duration)
+
+		if duration >= self.slow_threshold:
+			logger.warning(
+				"Slow query",
+				fingerprint=key,
+				duration_ms=round(duration * 1000, 2),
+				rows=rows,
+				params=parameter_shape(parameters, executemany),
+			)
+
+	def top(self, n: int = 20, by: str = "total") -> list[QueryStatDTO]:
+		"""
+		Самые дорогие отпечатки.
+
+		:param by: поле QueryStatDTO для сортировки (total, count, max, p95...)
+		"""
+		stats = [self._dto(key, stat) for key, stat in list(self._stats.items())]
+		stats.sort(key=lambda dto: getattr(dto, by), reverse=True)
+		return stats[:n]
+
+	def log_top(self, n: int = 20) -> None:
+		for rank, dto in enumerate(self.top(n), start=1):
+			logger.info(
+				"Query stats",
+				rank=rank,
+				fingerprint=dto.fingerprint,
+				count=dto.count,
+				total_ms=round(dto.total * 1000, 2),
+				avg_ms=round(dto.avg * 1000, 3),
+				p50_ms=round(dto.p50 * 1000, 3),
+				p95_ms=round(dto.p95 * 1000, 3),
+				max_ms=round(dto.max * 1000, 3),
+				rows=dto.rows,
+			)
+
+	def reset(self) -> None:
+		self._stats.clear()
+
+	@staticmethod
+	def _dto(key: str, stat: _FingerprintStat) -> QueryStatDTO:
+		samples = sorted(stat.samples)
+		return QueryStatDTO(
+			fingerprint=key,
+			count=stat.count,
+			total=stat.total,
+			avg=stat.total / stat.count if stat.count else 0.0,
+			p50=_percentile(samples, 0.5),
+			p95=_percentile(samples, 0.95),
+			max=stat.max,
+			rows=stat.rows,
+		)
+
+
+query_stats = QueryStatsCollector(
+	slow_threshold=cfg.query_stats.slow_threshold,
+	max_fingerprints=cfg.query_stats.max_fingerprints,
+	sample_size=cfg.query_stats.sample_size,
+)
+
+_STARTED_ATTR = "_query_started"
+
+
+def track_queries(
+	engine: AsyncEngine,
+	collector: QueryStatsCollector = query_stats,
+) -> None:
+	"""Подписывает engine на учёт запросов в `collector`."""
+
+	def before_cursor_execute(
+		conn: Connection,
+		cursor: Any,  # noqa: ANN401
+		statement: str,
+		parameters: Any,  # noqa: ANN401
+		context: ExecutionContext,
+		executemany: bool,
+	) -> None:
+		setattr(context, _STARTED_ATTR, time.perf_counter())
+
+	def after_cursor_execute(
+		conn: Connection,
+		cursor: Any,  # noqa: ANN401
+		statement: str,
+		parameters: Any,  # noqa: ANN401
+		context: ExecutionContext,
+		executemany: bool,
+	) -> None:
+		started = getattr(context, _STARTED_ATTR, None)
+		if started is None:
+			return
+		collector.record(
+			statement,
+			time.perf_counter() - started,
+			max(cursor.rowcount, 0),
+			parameters,
+			executemany,
+		)
+
+	sync_engine = engine.sync_engine
+	event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+	event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+import traceback
+from collections.abc import Sequence
+from contextlib import suppress
+from typing import Any, Literal
+
+from sqlalchemy import CompoundSelect, Engine, Select, event, text
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+# Ключ в `session.info`: сессия закреплена за primary
+PRIMARY_PIN = "db_primary_pin"
+
+
+class ReplicaRouter:
+	"""
+	Набор read-реплик с выбором реплики для очередного SELECT.
+
+	Недоступные реплики исключаются из ротации: активно — фоновой
+	проверкой `SELECT 1`, пассивно — по ошибке разрыва соединения
+	во время запроса. Возвращаются после следующей успешной проверки.
+	Если здоровых реплик нет, чтения идут в primary.
+	"""
+
+	def __init__(
+		self,
+		replicas: Sequence[AsyncEngine],
+		strategy: Literal["round_robin", "least_busy"] = "round_robin",
+		health_interval: float = 5.0,
+		health_timeout: float = 2.0,
+	) -> None:
+		self.replicas = list(replicas)
+		self.strategy = strategy
+		self.health_interval = health_interval
+		self.health_timeout = health_timeout
+
+		self._healthy = [True] * len(self.replicas)
+		self._round_robin = itertools.count()
+		self._task: asyncio.Task[None] | None = None
+
+		for index, replica in enumerate(self.replicas):
+			event.listen(
+				replica.sync_engine,
+				"handle_error",
+				self._make_error_handler(index),
+			)
+
+	@property
+	def healthy(self) -> list[AsyncEngine]:
+		return [
+			replica
+			for replica, healthy in zip(self.replicas, self._healthy, strict=True)
+			if healthy
+		]
+
+	def choose(self) -> AsyncEngine | None:
+		"""Реплика для чтения или `None`, если здоровых нет."""
+		candidates = self.healthy
+		if not candidates:
+			return None
+		if self.strategy == "least_busy":
+			return min(candidates, key=lambda replica: replica.pool.checkedout())
+		return candidates[next(self._round_robin) % len(candidates)]
+
+	def start(self) -> None:
+		"""Запускает фоновые проверки. Вызывать внутри event loop."""
+		if self.replicas and self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	async def close(self) -> None:
+		"""Останавливает проверки и закрывает пулы реплик."""
+		if self._task is not None:
+			self._task.cancel()
+			with suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		for replica in self.replicas:
+			await replica.dispose()
+
+	async def check(self) -> None:
+		"""Один раунд проверки всех реплик."""
+		results = await asyncio.gather(
+			*(self._ping(replica) for replica in self.replicas),
+		)
+		for index, ok in enumerate(results):
+			self._set_health(index, ok)
+
+	async def _ping(self, replica: AsyncEngine) -> bool:
+		try:
+			async with asyncio.timeout(self.health_timeout):
+				async with replica.connect() as conn:
+					await conn.execute(text("SELECT 1"))
+		except Exception:
+			return False
+		return True
+
+	def _set_health(self, index: int, healthy: bool) -> None:
+		if self._healthy[index] == healthy:
+			return
+		self._healthy[index] = healthy
+		url = self.replicas[index].url.render_as_string(hide_password=True)
+		if healthy:
+			logger.info("DB replica is back in rotation", replica=url)
+		else:
+			logger.warning("DB replica removed from rotation", replica=url)
+
+	def _make_error_handler(self, index: int) -> Any:  # noqa: ANN401
+		def handle_error(context: ExceptionContext) -> None:
+			if context.is_disconnect or context.connection is None:
+				self._set_health(index, False)
+
+		return handle_error
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self.health_interval)
+			try:
+				await self.check()
+			except Exception as exc:
+				logger.error(
+					"DB replica health check failed",
+					error=str(exc),
+					traceback=traceback.format_exc(),
+				)
+
+
+def _is_read_only(clause: Any) -> bool:  # noqa: ANN401
+	return (
+		isinstance(clause, (Select, CompoundSelect))
+		and clause._for_update_arg is None
+	)
+
+
+class RoutingSession(Session):
+	"""
+	Session, который отправляет чтения на реплики, а запись — в primary.
+
+	На реплику уходит только SELECT без FOR UPDATE. Всё остальное —
+	flush, DML, `text()`, `SELECT ... FOR UPDATE`, `session.connection()` —
+	идёт в primary и закрепляет сессию за ним до конца (read your writes):
+	после первой записи все чтения этой сессии тоже идут в primary.
+	Для read-modify-write без FOR UPDATE закрепите сессию заранее
+	через `pin_primary`.
+
+	`get_bind()` без аргументов тоже закрепляет сессию — диалект
+	узнавайте через `dialect_name`.
+	"""
+
+	def __init__(
+		self,
+		*args: Any,  # noqa: ANN401
+		router: ReplicaRouter | None = None,
+		**kwargs: Any,  # noqa: ANN401
+	) -> None:
+		super().__init__(*args, **kwargs)
+		self.router = router
+
+	def get_bind(
+		self,
+		mapper: Any = None,  # noqa: ANN401
+		*,
+		clause: Any = None,  # noqa: ANN401
+		**kwargs: Any,  # noqa: ANN401
+	) -> Engine:
+		if self.router is not None and not self.info.get(PRIMARY_PIN):
+			if _is_read_only(clause):
+				replica = self.router.choose()
+				if replica is not None:
+					return replica.sync_engine
+			else:
+				self.info[PRIMARY_PIN] = True
+		return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def dialect_name(session: AsyncSession | Session) -> str:
+	"""Имя диалекта сессии без `get_bind()`, который закрепил бы её за primary."""
+	bind = session.bind if session.bind is not None else session.get_bind()
+	return bind.dialect.name
+
+
+def pin_primary(session: AsyncSession | Session) -> None:
+	"""Закрепляет сессию за primary: все следующие запросы, включая чтения."""
+	session.info[PRIMARY_PIN] = True
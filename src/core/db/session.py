@@ -0,0 +1,99 @@
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+
+from src.core.metrics import DB_REQUEST_SESSIONS
+from src.schemas.dataclasses import SessionUsageStatsDTO
+
+# Ключи в `session.info`
+TOUCHED = "db_touched"
+WRITES = "db_writes"
+
+_outcomes: Counter[str] = Counter()
+
+
+def _after_begin(
+	session: Session,
+	transaction: SessionTransaction,
+	connection: Connection,
+) -> None:
+	session.info[TOUCHED] = True
+
+
+def _after_flush(session: Session, flush_context: Any) -> None:  # noqa: ANN401
+	session.info[WRITES] = True
+
+
+def _on_execute(execute_state: ORMExecuteState) -> None:
+	# DML, text() и прочее, что не SELECT, считаем записью
+	if not execute_state.is_select:
+		execute_state.session.info[WRITES] = True
+
+
+def track_session_usage(session_class: type[Session]) -> None:
+	"""
+	Отмечает в `session.info`, брала ли сессия соединение и писала ли.
+	Соединение и BEGIN SQLAlchemy и так берёт лениво — на первом запросе,
+	здесь только учёт для `finish_session`.
+	"""
+	if event.contains(session_class, "after_begin", _after_begin):
+		return
+	event.listen(session_class, "after_begin", _after_begin)
+	event.listen(session_class, "after_flush", _after_flush)
+	event.listen(session_class, "do_orm_execute", _on_execute)
+
+
+def mark_write(session: AsyncSession | Session) -> None:
+	"""
+	Помечает сессию пишущей: нужно, если запись шла мимо ORM,
+	через `session.connection()`.
+	"""
+	session.info[WRITES] = True
+
+
+async def finish_session(
+	session: AsyncSession,
+	error: BaseException | None = None,
+) -> str:
+	"""
+	Завершает сессию запроса:
+
+	- untouched — к БД не обращались, делать нечего;
+	- read_only — были только чтения: транзакция откатывается вместо COMMIT;
+	- write — были записи (или есть несброшенные изменения): COMMIT;
+	- error — запрос упал: откат.
+
+	:return: исход, он же учитывается в `db_request_sessions_total`
+	"""
+	pending = bool(session.new or session.dirty or session.deleted)
+	if error is not None:
+		outcome = "error"
+		await session.rollback()
+	elif session.info.get(WRITES) or pending:
+		outcome = "write"
+		await session.commit()
+	elif session.info.get(TOUCHED):
+		outcome = "read_only"
+		await session.rollback()
+	else:
+		outcome = "untouched"
+
+	session.info.pop(TOUCHED, None)
+	session.info.pop(WRITES, None)
+	_outcomes[outcome] += 1
+	DB_REQUEST_SESSIONS.labels(outcome).inc()
+	return outcome
+
+
+def session_usage_stats() -> SessionUsageStatsDTO:
+	"""Счётчики исходов сессий запросов с запуска процесса."""
+	return SessionUsageStatsDTO(
+		untouched=_outcomes["untouched"],
+		read_only=_outcomes["read_only"],
+		write=_outcomes["write"],
+		error=_outcomes["error"],
+	)
@@ -0,0 +1,221 @@
+import asyncio
+from collections.abc import Sequence
+from contextlib import suppress
+from itertools import islice
+from typing import Any
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.models.base import Base
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+# Пауза перед повторной попыткой финального сброса в close(), сек
+CLOSE_RETRY_DELAY = 1.0
+
+
+def build_upsert(
+	model: type[Base],
+	rows: Sequence[dict[str, Any]],
+	index_elements: Sequence[str],
+	update_columns: Sequence[str],
+	only_changed: bool = True,
+) -> Insert:
+	"""
+	Собирает multi-row `INSERT ... ON CONFLICT (...) DO UPDATE` для модели.
+
+	:param model: ORM-модель
+	:param rows: строки для вставки (словарь колонка → значение)
+	:param index_elements: колонки уникального ключа конфликта
+	:param update_columns: колонки, обновляемые при конфликте
+	:param only_changed: обновлять строку только если значения реально
+		изменились (не плодит мёртвые кортежи для неизменных строк)
+	:return: Insert-выражение диалекта PostgreSQL
+	"""
+	stmt = insert(model).values(list(rows))
+	table = model.__table__
+	set_: dict[str, Any] = {
+		name: stmt.excluded[name] for name in update_columns
+	}
+	if "updated_at" in table.c and "updated_at" not in set_:
+		set_["updated_at"] = func.now()
+
+	where = None
+	if only_changed and update_columns:
+		where = or_(
+			*(
+				table.c[name].is_distinct_from(stmt.excluded[name])
+				for name in update_columns
+			),
+		)
+
+	return stmt.on_conflict_do_update(
+		index_elements=list(index_elements),
+		set_=set_,
+		where=where,
+	)
+
+
+class UpsertBuffer:
+	"""
+	Write-behind буфер для upsert'ов.
+
+	Копит строки в памяти, схлопывает их по ключу конфликта (последняя
+	версия побеждает) и сбрасывает одним multi-row upsert по таймеру или
+	при достижении `max_batch_size`. Каждый сброс идёт в своей короткой
+	транзакции, не связанной с обработкой update'а.
+
+	Очередь ограничена `max_pending` ключами: пока сбросы падают (БД
+	недоступна), новые ключи сверх лимита не принимаются — `add` возвращает
+	False, и вызывающий пишет строку сам. Отклонённые и потерянные при
+	закрытии строки считаются в `dropped`.
+	"""
+
+	def __init__(
+		self,
+		session_factory: async_sessionmaker[AsyncSession],
+		model: type[Base],
+		index_elements: Sequence[str],
+		update_columns: Sequence[str],
+		flush_interval: float = 1.0,
+		max_batch_size: int = 500,
+		max_pending: int = 10_000,
+	) -> None:
+		self.session_factory = session_factory
+		self.model = model
+		self.index_elements = tuple(index_elements)
+		self.update_columns = tuple(update_columns)
+		self.flush_interval = flush_interval
+		self.max_batch_size = max_batch_size
+		self.max_pending = max(max_pending, max_batch_size)
+		self.dropped = 0
+
+		self._pending: dict[tuple[Any, ...], dict[str, Any]] = {}
+		self._wakeup = asyncio.Event()
+		self._flush_lock = asyncio.Lock()
+		self._task: asyncio.Task[None] | None = None
+		self._closing = False
+		self._overflowing = False
+
+	@property
+	def pending(self) -> int:
+		"""Количество строк, ожидающих записи."""
+		return len(self._pending)
+
+	def start(self) -> None:
+		"""Запускает фоновый цикл сброса. Вызывать внутри event loop."""
+		if self._task is None:
+			self._task = asyncio.create_task(self._run())
+
+	def add(self, values: dict[str, Any]) -> bool:
+		"""
+		Ставит строку в очередь, объединяя с уже ожидающей по ключу.
+
+		:return: False, если очередь заполнена и строка не принята —
+			её нужно записать в обход буфера
+		"""
+		key = tuple(values[name] for name in self.index_elements)
+		existing = self._pending.get(key)
+		if existing is not None:
+			existing.update(values)
+		elif len(self._pending) >= self.max_pending:
+			self.dropped += 1
+			if not self._overflowing:
+				# Одно предупреждение на эпизод, а не на каждый update
+				self._overflowing = True
+				logger.warning(
+					"Write-behind queue is full",
+					table=self.model.__tablename__,
+					pending=len(self._pending),
+					max_pending=self.max_pending,
+				)
+			self._wakeup.set()
+			return False
+		else:
+			self._pending[key] = dict(values)
+
+		if len(self._pending) >= self.max_batch_size:
+			self._wakeup.set()
+		return True
+
+	async def flush(self) -> int:
+		"""
+		Сбрасывает все ожидающие строки пачками по `max_batch_size`.
+
+		При ошибке пачка возвращается в очередь (не затирая более свежие
+		значения) и будет записана следующим сбросом.
+
+		:return: количество записанных строк
+		"""
+		written = 0
+		async with self._flush_lock:
+			while self._pending:
+				keys = list(islice(self._pending, self.max_batch_size))
+				batch = {key: self._pending.pop(key) for key in keys}
+				# Стабильный порядок ключей исключает дедлоки между репликами
+				rows = [batch[key] for key in sorted(batch)]
+				try:
+					async with self.session_factory() as session:
+						async with session.begin():
+							await session.execute(
+								build_upsert(
+									self.model,
+									rows,
+									self.index_elements,
+									self.update_columns,
+								),
+							)
+				except Exception as exc:
+					for key, row in batch.items():
+						self._pending.setdefault(key, row)
+					logger.error(
+						"Write-behind flush failed",
+						table=self.model.__tablename__,
+						rows=len(rows),
+						error=str(exc),
+					)
+					break
+				written += len(rows)
+			if not self._pending:
+				self._overflowing = False
+		return written
+
+	async def close(self) -> None:
+		"""
+		Останавливает фоновый цикл и синхронно дописывает остаток.
+
+		Если финальный сброс не удался, повторяет его один раз через
+		`CLOSE_RETRY_DELAY`; оставшиеся строки теряются и учитываются в `dropped`.
+		"""
+		self._closing = True
+		self._wakeup.set()
+		if self._task is not None:
+			# Не отменяем задачу: отмена посреди flush потеряла бы пачку
+			await self._task
+			self._task = None
+		await self.flush()
+		if self._pending:
+			await asyncio.sleep(CLOSE_RETRY_DELAY)
+			await self.flush()
+		if self._pending:
+			self.dropped += len(self._pending)
+			logger.error(
+				"Write-behind rows lost on close",
+				table=self.model.__tablename__,
+				rows=len(self._pending),
+				dropped=self.dropped,
+			)
+			self._pending.clear()
+
+	async def _run(self) -> None:
+		while not self._closing:
+			with suppress(TimeoutError):
+				await asyncio.wait_for(
+					self._wakeup.wait(),
+					timeout=self.flush_interval,
+				)
+			self._wakeup.clear()
+			await self.flush()
@@ -0,0 +1,42 @@
+from .instruments import (
+	DB_POOL_RESIZES,
+	DB_POOL_TIMEOUTS,
+	DB_POOL_WAIT,
+	DB_REQUEST_SESSIONS,
+	HANDLER_LATENCY,
+	S3_REQUEST_ERRORS,
+	S3_REQUEST_LATENCY,
+	SCHEDULER_WAIT,
+	UPDATE_ERRORS_TOTAL,
+	UPDATE_LATENCY,
+	UPDATES_TOTAL,
+	instrument_s3_client,
+	track_db_pool,
+	track_redis_pool,
+	track_scheduler,
+)
+from .registry import REGISTRY, Counter, Histogram, MetricsRegistry
+from .server import MetricsServer
+
+__all__ = [
+	"REGISTRY",
+	"MetricsRegistry",
+	"Counter",
+	"Histogram",
+	"MetricsServer",
+	"UPDATES_TOTAL",
+	"UPDATE_ERRORS_TOTAL",
+	"UPDATE_LATENCY",
+	"HANDLER_LATENCY",
+	"SCHEDULER_WAIT",
+	"DB_POOL_WAIT",
+	"DB_POOL_TIMEOUTS",
+	"DB_POOL_RESIZES",
+	"DB_REQUEST_SESSIONS",
+	"S3_REQUEST_LATENCY",
+	"S3_REQUEST_ERRORS",
+	"instrument_s3_client",
+	"track_db_pool",
+	"track_redis_pool",
+	"track_scheduler",
+]
@@ -0,0 +1,176 @@
+import time
+import weakref
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from redis.asyncio import ConnectionPool
+from sqlalchemy.pool import QueuePool
+
+from src.core.metrics.registry import REGISTRY, Sample
+
+if TYPE_CHECKING:
+	from src.core.scheduling import KeyedScheduler
+
+# ========== Update'ы и хендлеры ==========
+UPDATES_TOTAL = REGISTRY.counter(
+	"bot_updates_total",
+	"Processed updates",
+	labels=("update_type",),
+)
+UPDATE_ERRORS_TOTAL = REGISTRY.counter(
+	"bot_update_errors_total",
+	"Updates that raised an exception",
+	labels=("update_type",),
+)
+UPDATE_LATENCY = REGISTRY.histogram(
+	"bot_update_duration_seconds",
+	"Update processing time, middleware included",
+	labels=("update_type",),
+)
+HANDLER_LATENCY = REGISTRY.histogram(
+	"bot_handler_duration_seconds",
+	"Handler execution time",
+	labels=("handler",),
+)
+
+# ========== Планировщик update'ов ==========
+SCHEDULER_WAIT = REGISTRY.histogram(
+	"bot_scheduler_wait_seconds",
+	"Time an update waits for its chat turn and a concurrency slot",
+)
+_schedulers: weakref.WeakSet["KeyedScheduler"] = weakref.WeakSet()
+
+
+def track_scheduler(scheduler: "KeyedScheduler") -> None:
+	_schedulers.add(scheduler)
+
+
+def _collect_scheduler_tasks() -> Iterable[Sample]:
+	stats = [scheduler.stats() for scheduler in list(_schedulers)]
+	yield ("running",), sum(s.running for s in stats)
+	yield ("waiting",), sum(s.waiting for s in stats)
+	yield ("slots",), sum(s.max_concurrency for s in stats)
+
+
+def _collect_scheduler_keys() -> Iterable[Sample]:
+	yield (), sum(scheduler.stats().keys for scheduler in list(_schedulers))
+
+
+REGISTRY.gauge_callback(
+	"bot_scheduler_tasks",
+	"Scheduler tasks by state (running/waiting) and concurrency limit (slots)",
+	_collect_scheduler_tasks,
+	labels=("state",),
+)
+REGISTRY.gauge_callback(
+	"bot_scheduler_keys",
+	"Chats with running or queued updates",
+	_collect_scheduler_keys,
+)
+
+# ========== SQLAlchemy ==========
+DB_POOL_WAIT = REGISTRY.histogram(
+	"db_pool_acquire_seconds",
+	"Time to get a connection from the pool, new connections included",
+)
+DB_POOL_TIMEOUTS = REGISTRY.counter(
+	"db_pool_timeouts_total",
+	"Pool checkouts that hit pool_timeout",
+)
+DB_POOL_RESIZES = REGISTRY.counter(
+	"db_pool_resizes_total",
+	"Pool size changes made by the autotuner",
+	labels=("direction",),
+)
+DB_REQUEST_SESSIONS = REGISTRY.counter(
+	"db_request_sessions_total",
+	"Request-scoped sessions by outcome (untouched/read_only/write/error)",
+	labels=("outcome",),
+)
+_db_pools: weakref.WeakSet[QueuePool] = weakref.WeakSet()
+
+
+def track_db_pool(pool: QueuePool) -> None:
+	_db_pools.add(pool)
+
+
+def _collect_db_pools() -> Iterable[Sample]:
+	pools = list(_db_pools)
+	yield ("size",), sum(pool.size() for pool in pools)
+	yield ("checked_out",), sum(pool.checkedout() for pool in pools)
+	yield ("checked_in",), sum(pool.checkedin() for pool in pools)
+	yield ("overflow",), sum(max(pool.overflow(), 0) for pool in pools)
+
+
+REGISTRY.gauge_callback(
+	"db_pool_connections",
+	"SQLAlchemy pool connections by state (all engines of the process)",
+	_collect_db_pools,
+	labels=("state",),
+)
+
+# ========== Redis ==========
+_redis_pools: weakref.WeakSet[ConnectionPool] = weakref.WeakSet()
+
+
+def track_redis_pool(pool: ConnectionPool) -> None:
+	_redis_pools.add(pool)
+
+
+def _collect_redis_pools() -> Iterable[Sample]:
+	# Занятые и свободные соединения redis-py отдаёт только через приватные
+	# методы пула — экспортируем лишь публичный лимит
+	yield ("max",), sum(pool.max_connections for pool in list(_redis_pools))
+
+
+REGISTRY.gauge_callback(
+	"redis_pool_connections",
+	"Redis pool connections by state",
+	_collect_redis_pools,
+	labels=("state",),
+)
+
+# ========== S3 ==========
+S3_REQUEST_LATENCY = REGISTRY.histogram(
+	"s3_request_duration_seconds",
+	"S3 API call time, retries included",
+	labels=("operation",),
+)
+S3_REQUEST_ERRORS = REGISTRY.counter(
+	"s3_request_errors_total",
+	"S3 API calls that failed",
+	labels=("operation",),
+)
+
+_S3_START_KEY = "metrics_started_at"
+
+
+def _s3_before_call(
+	context: dict[str, Any],
+	model: Any,  # noqa: ANN401
+	**kwargs: Any,  # noqa: ANN401
+) -> None:
+	context[_S3_START_KEY] = (model.name, time.perf_counter())
+
+
+def _s3_after_call(
+	context: dict[str, Any],
+	http_response: Any = None,  # noqa: ANN401
+	**kwargs: Any,  # noqa: ANN401
+) -> None:
+	# after-call-error приходит без http_response — это ошибка сети/клиента
+	started = context.pop(_S3_START_KEY, None)
+	if started is None:
+		return
+	operation, started_at = started
+	S3_REQUEST_LATENCY.labels(operation).observe(time.perf_counter() - started_at)
+	if http_response is None or http_response.status_code >= 400:
+		S3_REQUEST_ERRORS.labels(operation).inc()
+
+
+def instrument_s3_client(client: Any) -> None:  # noqa: ANN401
+	"""Подписывает aiobotocore-клиент на события botocore для замера вызовов."""
+	events = client.meta.events
+	events.register("before-call.s3", _s3_before_call)
+	events.register("after-call.s3", _s3_after_call)
+	events.register("after-call-error.s3", _s3_after_call)
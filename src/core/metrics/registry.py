@@ -0,0 +1,233 @@
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+
+# Границы бакетов по умолчанию (сек) — от быстрых запросов в Redis до медленных хендлеров
+DEFAULT_BUCKETS = (
+	0.001,
+	0.0025,
+	0.005,
+	0.01,
+	0.025,
+	0.05,
+	0.1,
+	0.25,
+	0.5,
+	1.0,
+	2.5,
+	5.0,
+	10.0,
+)
+
+type Labels = tuple[str, ...]
+type Sample = tuple[Labels, float]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+	pairs = [
+		f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+	]
+	if extra:
+		pairs.append(extra)
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+	if value == float("inf"):
+		return "+Inf"
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+	type_name = ""
+
+	def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+		self.name = name
+		self.help = help
+		self.label_names = tuple(labels)
+
+	def header(self) -> list[str]:
+		return [
+			f"# HELP {self.name} {self.help}",
+			f"# TYPE {self.name} {self.type_name}",
+		]
+
+	def render(self) -> list[str]:
+		raise NotImplementedError
+
+
+class CounterChild:
+	__slots__ = ("value",)
+
+	def __init__(self) -> None:
+		self.value = 0.0
+
+	def inc(self, amount: float = 1.0) -> None:
+		self.value += amount
+
+
+class Counter(_Metric):
+	"""Монотонный счётчик. Дочерние серии по меткам кешируются."""
+
+	type_name = "counter"
+
+	def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+		super().__init__(name, help, labels)
+		self._children: dict[Labels, CounterChild] = {}
+
+	def labels(self, *values: str) -> CounterChild:
+		child = self._children.get(values)
+		if child is None:
+			child = self._children[values] = CounterChild()
+		return child
+
+	def inc(self, amount: float = 1.0) -> None:
+		self.labels().inc(amount)
+
+	def render(self) -> list[str]:
+		return [
+			f"{self.name}{_format_labels(self.label_names, values)} "
+			f"{_format_value(child.value)}"
+			for values, child in self._children.items()
+		]
+
+
+class HistogramChild:
+	__slots__ = ("buckets", "counts", "count", "sum")
+
+	def __init__(self, buckets: tuple[float, ...]) -> None:
+		self.buckets = buckets
+		# Последний элемент — бакет +Inf
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.sum = 0.0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.count += 1
+		self.sum += value
+
+
+class Histogram(_Metric):
+	"""Гистограмма с фиксированными бакетами: observe — bisect и три сложения."""
+
+	type_name = "histogram"
+
+	def __init__(
+		self,
+		name: str,
+		help: str,
+		labels: Sequence[str] = (),
+		buckets: Sequence[float] = DEFAULT_BUCKETS,
+	) -> None:
+		super().__init__(name, help, labels)
+		self.buckets = tuple(sorted(buckets))
+		self._children: dict[Labels, HistogramChild] = {}
+
+	def labels(self, *values: str) -> HistogramChild:
+		child = self._children.get(values)
+		if child is None:
+			child = self._children[values] = HistogramChild(self.buckets)
+		return child
+
+	def observe(self, value: float) -> None:
+		self.labels().observe(value)
+
+	def render(self) -> list[str]:
+		lines = []
+		for values, child in self._children.items():
+			cumulative = 0
+			for bound, count in zip(
+				(*self.buckets, float("inf")),
+				child.counts,
+				strict=True,
+			):
+				cumulative += count
+				le = f'le="{_format_value(bound)}"'
+				lines.append(
+					f"{self.name}_bucket"
+					f"{_format_labels(self.label_names, values, le)} {cumulative}",
+				)
+			label_str = _format_labels(self.label_names, values)
+			lines.append(f"{self.name}_sum{label_str} {_format_value(child.sum)}")
+			lines.append(f"{self.name}_count{label_str} {child.count}")
+		return lines
+
+
+class GaugeCallback(_Metric):
+	"""
+	Gauge, значение которого считается в момент чтения метрик.
+	Для состояния пулов: на горячем пути ничего не записывается.
+	"""
+
+	type_name = "gauge"
+
+	def __init__(
+		self,
+		name: str,
+		help: str,
+		collect: Callable[[], Iterable[Sample]],
+		labels: Sequence[str] = (),
+	) -> None:
+		super().__init__(name, help, labels)
+		self.collect = collect
+
+	def render(self) -> list[str]:
+		return [
+			f"{self.name}{_format_labels(self.label_names, values)} "
+			f"{_format_value(value)}"
+			for values, value in self.collect()
+		]
+
+
+class MetricsRegistry:
+	"""
+	In-process реестр метрик с выводом в текстовом формате Prometheus.
+
+	Не потокобезопасен: запись рассчитана на один event loop процесса.
+	"""
+
+	def __init__(self) -> None:
+		self._metrics: dict[str, _Metric] = {}
+
+	def _register[M: _Metric](self, metric: M) -> M:
+		if metric.name in self._metrics:
+			raise ValueError(f"Metric {metric.name!r} is already registered")
+		self._metrics[metric.name] = metric
+		return metric
+
+	def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+		return self._register(Counter(name, help, labels))
+
+	def histogram(
+		self,
+		name: str,
+		help: str,
+		labels: Sequence[str] = (),
+		buckets: Sequence[float] = DEFAULT_BUCKETS,
+	) -> Histogram:
+		return self._register(Histogram(name, help, labels, buckets))
+
+	def gauge_callback(
+		self,
+		name: str,
+		help: str,
+		collect: Callable[[], Iterable[Sample]],
+		labels: Sequence[str] = (),
+	) -> GaugeCallback:
+		return self._register(GaugeCallback(name, help, collect, labels))
+
+	def render(self) -> str:
+		lines: list[str] = []
+		for metric in self._metrics.values():
+			samples = metric.render()
+			if samples:
+				lines.extend(metric.header())
+				lines.extend(samples)
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
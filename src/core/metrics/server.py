@@ -0,0 +1,62 @@
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+
+from aiohttp import web
+
+from src.core.metrics.registry import REGISTRY, MetricsRegistry
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+	"""
+	Локальный HTTP-эндпоинт `/metrics` в текстовом формате Prometheus.
+	`json_endpoints` — дополнительные отладочные пути, отдающие JSON
+	(путь → функция без аргументов).
+	"""
+
+	def __init__(
+		self,
+		host: str,
+		port: int,
+		registry: MetricsRegistry = REGISTRY,
+		json_endpoints: Mapping[str, Callable[[], Any]] | None = None,
+	) -> None:
+		self.host = host
+		self.port = port
+		self.registry = registry
+		self.json_endpoints = dict(json_endpoints or {})
+		self._runner: web.AppRunner | None = None
+
+	async def _metrics(self, request: web.Request) -> web.Response:
+		return web.Response(
+			body=self.registry.render().encode(),
+			headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+		)
+
+	@staticmethod
+	def _json_handler(
+		collect: Callable[[], Any],
+	) -> Callable[[web.Request], Awaitable[web.Response]]:
+		async def handler(request: web.Request) -> web.Response:
+			return web.json_response(collect())
+
+		return handler
+
+	async def start(self) -> None:
+		app = web.Application()
+		app.router.add_get("/metrics", self._metrics)
+		for path, collect in self.json_endpoints.items():
+			app.router.add_get(path, self._json_handler(collect))
+		self._runner = web.AppRunner(app, handle_signals=False, access_log=None)
+		await self._runner.setup()
+		await web.TCPSite(self._runner, host=self.host, port=self.port).start()
+		logger.info("Metrics server started", host=self.host, port=self.port)
+
+	async def close(self) -> None:
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
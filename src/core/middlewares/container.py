@@ -0,0 +1,67 @@
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from aiogram import Router
+from aiogram.types import TelegramObject
+from dishka import AsyncContainer
+from dishka.integrations.aiogram import (
+	CONTAINER_NAME,
+	AiogramMiddlewareData,
+	ContainerMiddleware,
+)
+
+
+class UpdateContainerMiddleware(ContainerMiddleware):
+	"""
+	`ContainerMiddleware` dishka, который открывает REQUEST-scope один раз
+	на update.
+
+	Стандартный вешается на все observer'ы и открывает scope и на update,
+	и ещё раз на вложенное событие (message, callback_query...): middleware
+	update'а и хендлер получали бы разные сессии. Здесь вложенные observer'ы
+	переиспользуют контейнер update'а, и одна сессия (unit of work) общая
+	для `UserMiddleware`, репозиториев и сервисов.
+
+	Наследники меняют вход/выход из scope (`_scope`) и то, что видят
+	хендлеры (`_expose`), не повторяя саму логику.
+	"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		if CONTAINER_NAME in data:
+			return await handler(event, data)
+
+		async with self._scope(event, data) as sub_container:
+			data[CONTAINER_NAME] = self._expose(sub_container)
+			try:
+				return await handler(event, data)
+			finally:
+				# error-observer получает этот же data уже после выхода из scope
+				del data[CONTAINER_NAME]
+
+	def _scope(
+		self,
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> AbstractAsyncContextManager[AsyncContainer]:
+		return self.container(
+			{
+				TelegramObject: event,
+				AiogramMiddlewareData: data,
+			},
+		)
+
+	def _expose(self, container: AsyncContainer) -> Any:  # noqa: ANN401
+		return container
+
+
+def setup_dishka_per_update(container: AsyncContainer, router: Router) -> None:
+	"""Аналог `setup_dishka` с одним REQUEST-scope на update."""
+	middleware = UpdateContainerMiddleware(container)
+	for observer in router.observers.values():
+		observer.outer_middleware(middleware)
@@ -5,11 +5,15 @@ from typing import Any
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Update
 
+from src.core.tracing import start_trace
 from src.services.logger import get_logger
 
 
 class LoggingMiddleware(BaseMiddleware):
-	"""Middleware для логирования входящих update'ов aiogram."""
+	"""
+	Middleware для логирования входящих update'ов aiogram.
+	Открывает корневой участок трейса update'а (если трейсинг включён).
+	"""
 
 	async def __call__(
 		self,
@@ -40,15 +44,20 @@ class LoggingMiddleware(BaseMiddleware):
 			user_id=user_id,
 		)
 
-		try:
+		with start_trace(
+			"update",
+			update_type=update_type,
+			user_id=user_id,
+			update_id=event.update_id if isinstance(event, Update) else None,
+		) as trace_id:
 			result = await handler(event, data)
 			process_time = time.time() - start_time
+			extra = {"trace_id": trace_id} if trace_id is not None else {}
 			logger.info(
 				"Update handled",
 				update_type=update_type,
 				user_id=user_id,
 				process_time_seconds=round(process_time, 4),
+				**extra,
 			)
 			return result
-		except Exception:
-			raise
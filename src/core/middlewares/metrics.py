@@ -0,0 +1,78 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+
+from src.core.metrics import (
+	HANDLER_LATENCY,
+	UPDATE_ERRORS_TOTAL,
+	UPDATE_LATENCY,
+	UPDATES_TOTAL,
+)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+	"""
+	Outer middleware уровня update: число update'ов и ошибок, время
+	обработки по типу update'а. Ставится после планировщика, чтобы время
+	ожидания в очереди не попадало в латентность.
+	"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		update_type = event.event_type if isinstance(event, Update) else "unknown"
+		started_at = time.perf_counter()
+		try:
+			return await handler(event, data)
+		except Exception:
+			UPDATE_ERRORS_TOTAL.labels(update_type).inc()
+			raise
+		finally:
+			UPDATE_LATENCY.labels(update_type).observe(
+				time.perf_counter() - started_at,
+			)
+			UPDATES_TOTAL.labels(update_type).inc()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+	"""
+	Inner middleware: время выполнения конкретного хендлера.
+	Регистрируется на observers диспетчера и действует на все вложенные роутеры.
+	"""
+
+	def __init__(self) -> None:
+		self._names: dict[Callable[..., Any], str] = {}
+
+	def _handler_name(self, handler_object: HandlerObject) -> str:
+		callback = handler_object.callback
+		name = self._names.get(callback)
+		if name is None:
+			name = self._names[callback] = (
+				f"{callback.__module__}.{getattr(callback, '__name__', 'handler')}"
+			)
+		return name
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		handler_object: HandlerObject | None = data.get("handler")
+		if handler_object is None:
+			return await handler(event, data)
+
+		started_at = time.perf_counter()
+		try:
+			return await handler(event, data)
+		finally:
+			HANDLER_LATENCY.labels(self._handler_name(handler_object)).observe(
+				time.perf_counter() - started_at,
+			)
@@ -0,0 +1,50 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from src.core.db.nplusone import count_queries, current_query_counter
+
+
+class QueryCounterMiddleware(BaseMiddleware):
+	"""
+	Outer middleware уровня update: считает ORM-запросы update'а и пишет
+	в лог повторяющиеся (N+1). Если счётчик уже открыт снаружи (тест
+	вокруг `feed_update`), пользуется им.
+	"""
+
+	def __init__(self, threshold: int, raise_errors: bool = False) -> None:
+		self.threshold = threshold
+		self.raise_errors = raise_errors
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		if current_query_counter() is not None:
+			return await handler(event, data)
+		with count_queries(self.threshold, self.raise_errors):
+			return await handler(event, data)
+
+
+class HandlerQueryCounterMiddleware(BaseMiddleware):
+	"""Inner middleware: подписывает счётчик update'а именем хендлера."""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		counter = current_query_counter()
+		handler_object: HandlerObject | None = data.get("handler")
+		if counter is not None and handler_object is not None:
+			callback = handler_object.callback
+			counter.handler = (
+				f"{callback.__module__}.{getattr(callback, '__name__', 'handler')}"
+			)
+		return await handler(event, data)
@@ -0,0 +1,35 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+
+from src.core.scheduling import KeyedScheduler
+
+
+class SchedulerMiddleware(BaseMiddleware):
+	"""
+	Outer middleware уровня update, через который проходит весь
+	`Dispatcher.feed_update`: update'ы одного чата обрабатываются строго
+	по очереди, а всего одновременно — не больше `max_concurrency`.
+
+	Регистрируется первым из наших middleware, чтобы ожидание в очереди
+	не занимало соединения из пулов и не попадало во время обработки.
+	"""
+
+	def __init__(self, scheduler: KeyedScheduler) -> None:
+		self.scheduler = scheduler
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		# Заполняются UserContextMiddleware самого aiogram
+		chat: Chat | None = data.get("event_chat")
+		user: User | None = data.get("event_from_user")
+
+		key = chat.id if chat else user.id if user else None
+		async with self.scheduler.slot(key):
+			return await handler(event, data)
@@ -0,0 +1,111 @@
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot, Router
+from aiogram.client.session.middlewares.base import (
+	BaseRequestMiddleware,
+	NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from dishka import AsyncContainer
+
+from src.core.middlewares.container import UpdateContainerMiddleware
+from src.core.tracing import span
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+	"""
+	Участок `bot.<method>` на каждый запрос к Bot API.
+	Регистрируется первым, чтобы в участок попало и ожидание в очереди отправки.
+	"""
+
+	async def __call__(
+		self,
+		make_request: NextRequestMiddlewareType[TelegramType],
+		bot: Bot,
+		method: TelegramMethod[TelegramType],
+	) -> Response[TelegramType]:
+		chat_id = getattr(method, "chat_id", None)
+		attributes = {"chat_id": chat_id} if chat_id is not None else {}
+		with span(f"bot.{method.__api_method__}", **attributes):
+			return await make_request(bot, method)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+	"""Inner middleware: участок `handler` вокруг вызова хендлера."""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> Any:
+		handler_object: HandlerObject | None = data.get("handler")
+		if handler_object is None:
+			return await handler(event, data)
+
+		callback = handler_object.callback
+		with span(
+			"handler",
+			handler=f"{callback.__module__}.{getattr(callback, '__name__', 'handler')}",
+		):
+			return await handler(event, data)
+
+
+class _TracedContainer:
+	"""Обёртка REQUEST-контейнера: участок `di.get` на каждую зависимость хендлера."""
+
+	def __init__(self, container: AsyncContainer) -> None:
+		self._container = container
+
+	async def get(self, dependency_type: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+		name = getattr(dependency_type, "__qualname__", None) or repr(dependency_type)
+		with span("di.get", dependency=name):
+			return await self._container.get(dependency_type, *args, **kwargs)
+
+	def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+		return getattr(self._container, name)
+
+
+class _TracedScope:
+	"""REQUEST-scope с участками на вход и выход (финализация зависимостей)."""
+
+	def __init__(self, scope: AbstractAsyncContextManager[AsyncContainer]) -> None:
+		self._scope = scope
+
+	async def __aenter__(self) -> AsyncContainer:
+		with span("di.enter"):
+			return await self._scope.__aenter__()
+
+	async def __aexit__(self, *exc_info: Any) -> bool | None:  # noqa: ANN401
+		with span("di.exit"):
+			return await self._scope.__aexit__(*exc_info)
+
+
+class TracingContainerMiddleware(UpdateContainerMiddleware):
+	"""
+	`UpdateContainerMiddleware` с участками на вход в REQUEST-scope,
+	разрешение зависимостей и выход из scope (финализация, например
+	закрытие S3-клиента и COMMIT сессии).
+	"""
+
+	def _scope(
+		self,
+		event: TelegramObject,
+		data: dict[str, Any],
+	) -> AbstractAsyncContextManager[AsyncContainer]:
+		return _TracedScope(super()._scope(event, data))
+
+	def _expose(self, container: AsyncContainer) -> Any:  # noqa: ANN401
+		return _TracedContainer(container)
+
+
+def setup_dishka_tracing(container: AsyncContainer, router: Router) -> None:
+	"""Аналог `setup_dishka_per_update` с `TracingContainerMiddleware`."""
+	middleware = TracingContainerMiddleware(container)
+	for observer in router.observers.values():
+		observer.outer_middleware(middleware)
@@ -1,23 +1,66 @@
 from collections.abc import Awaitable, Callable
+from dataclasses import replace
+from datetime import UTC, datetime
 from typing import Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
+from aiogram.types import User as TelegramUser
+from dishka.integrations.aiogram import CONTAINER_NAME
 from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.cache import LRUCache
+from src.core.db import UpsertBuffer, build_upsert
+from src.core.tracing import span
 from src.models.user import User
+from src.schemas.dataclasses import UserSnapshotDTO
+
+USER_CONFLICT_COLUMNS = ("telegram_id",)
+USER_UPDATE_COLUMNS = ("username", "first_name")
+USER_SNAPSHOT_COLUMNS = (
+	User.telegram_id,
+	User.username,
+	User.first_name,
+	User.created_at,
+	User.updated_at,
+)
+
+
+def user_values(tg_user: TelegramUser) -> dict[str, Any]:
+	"""Колонки профиля пользователя из Telegram-объекта."""
+	return {
+		"telegram_id": tg_user.id,
+		"username": tg_user.username,
+		"first_name": tg_user.first_name,
+	}
 
 
 class UserMiddleware(BaseMiddleware):
 	"""
 	Middleware для автоматической регистрации/обновления пользователя в БД.
-	Добавляет объект User в data["user"] для использования в хендлерах.
+	Добавляет UserSnapshotDTO в data["user"] для использования в хендлерах.
+
+	Снимки хранятся в LRU/TTL-кеше: если профиль из Telegram не изменился,
+	к БД не обращаемся вовсе. При промахе снимок читается из БД,
+	а изменения пишутся сразу upsert'ом или, если передан `upsert_buffer`,
+	ставятся в write-behind очередь. Новые пользователи всегда пишутся
+	сразу. Write-behind экономит запрос к БД только вместе с кешем: без
+	него каждый update всё равно читает снимок из БД.
+
+	Работает в сессии update'а из REQUEST-scope dishka (регистрируется
+	после `UpdateContainerMiddleware`): upsert входит в транзакцию
+	хендлера и коммитится вместе с ней. Если хендлер упал, upsert
+	откатывается, и снимок убирается из кеша, чтобы повторить синхронизацию.
 	"""
 
-	def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
-		self.session_factory = session_factory
+	def __init__(
+		self,
+		upsert_buffer: UpsertBuffer | None = None,
+		cache: LRUCache[int, UserSnapshotDTO] | None = None,
+	) -> None:
+		self.upsert_buffer = upsert_buffer
+		self.cache = cache
 
 	async def __call__(
 		self,
@@ -29,39 +72,82 @@ class UserMiddleware(BaseMiddleware):
 		if tg_user is None:
 			return await handler(event, data)
 
-		async with self.session_factory() as session:
-			async with session.begin():
-				user = await session.scalar(
-					select(User).where(User.telegram_id == tg_user.id),
-				)
-
-				if user is None:
-					user = User(
-						telegram_id=tg_user.id,
-						username=tg_user.username,
-						first_name=tg_user.first_name,
-					)
-					session.add(user)
-					try:
-						await session.flush()
-					except IntegrityError:
-						await session.rollback()
-						user = await session.scalar(
-							select(User).where(User.telegram_id == tg_user.id),
-						)
-						if user is None:
-							raise
-				else:
-					changed = False
-					if user.username != tg_user.username:
-						user.username = tg_user.username
-						changed = True
-					if user.first_name != tg_user.first_name:
-						user.first_name = tg_user.first_name
-						changed = True
-					if changed:
-						await session.flush()
-
-				data["user"] = user
-
-		return await handler(event, data)
+		synced = False
+		snapshot = self.cache.get(tg_user.id) if self.cache is not None else None
+		if snapshot is None or not snapshot.matches(
+			tg_user.username,
+			tg_user.first_name,
+		):
+			session = await data[CONTAINER_NAME].get(AsyncSession)
+			with span("users.sync", user_id=tg_user.id):
+				snapshot = await self._sync(session, tg_user, snapshot)
+			if self.cache is not None:
+				self.cache.set(tg_user.id, snapshot)
+			synced = True
+
+		data["user"] = snapshot
+		try:
+			return await handler(event, data)
+		except BaseException:
+			if synced and self.cache is not None:
+				self.cache.delete(tg_user.id)
+			raise
+
+	async def _sync(
+		self,
+		session: AsyncSession,
+		tg_user: TelegramUser,
+		snapshot: UserSnapshotDTO | None,
+	) -> UserSnapshotDTO:
+		values = user_values(tg_user)
+
+		if snapshot is None:
+			snapshot = await self._select_snapshot(session, tg_user.id)
+			if snapshot is not None and snapshot.matches(
+				tg_user.username,
+				tg_user.first_name,
+			):
+				return snapshot
+
+		# В очередь идут только обновления существующих строк: новая строка
+		# должна появиться в транзакции хендлера (FK, session.get). Переполненная
+		# очередь не принимает строку — пишем сами, и update ждёт БД
+		if (
+			self.upsert_buffer is not None
+			and snapshot is not None
+			and self.upsert_buffer.add(values)
+		):
+			return replace(
+				snapshot,
+				username=tg_user.username,
+				first_name=tg_user.first_name,
+				updated_at=datetime.now(UTC),
+			)
+
+		# ON CONFLICT снимает гонку параллельной регистрации
+		row = (
+			await session.execute(
+				build_upsert(
+					User,
+					[values],
+					USER_CONFLICT_COLUMNS,
+					USER_UPDATE_COLUMNS,
+					only_changed=False,
+				).returning(*USER_SNAPSHOT_COLUMNS),
+			)
+		).one()
+		return UserSnapshotDTO(*row)
+
+	@staticmethod
+	async def _select_snapshot(
+		session: AsyncSession,
+		telegram_id: int,
+	) -> UserSnapshotDTO | None:
+		row = (
+			await session.execute(
+				select(*USER_SNAPSHOT_COLUMNS).where(
+					User.telegram_id == telegram_id,
+				),
+			)
+		).one_or_none()
+		return UserSnapshotDTO(*row) if row is not None else None
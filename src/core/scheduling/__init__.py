@@ -0,0 +1,5 @@
+from .scheduler import KeyedScheduler
+
+__all__ = [
+	"KeyedScheduler",
+]
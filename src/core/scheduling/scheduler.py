@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+
+from src.core.metrics import SCHEDULER_WAIT, track_scheduler
+from src.schemas.dataclasses import SchedulerStatsDTO
+
+
+class _Lane:
+	"""Очередь одного ключа: FIFO-замок и число задач, которые его ждут или держат."""
+
+	__slots__ = ("lock", "users")
+
+	def __init__(self) -> None:
+		self.lock = asyncio.Lock()
+		self.users = 0
+
+
+class KeyedScheduler:
+	"""
+	Планировщик с общим лимитом конкурентности и последовательным
+	выполнением внутри ключа (чата).
+
+	Задача сначала встаёт в очередь своего ключа, и только дойдя до её
+	головы, занимает общий слот — ожидающие в очереди чата слоты не держат.
+	Очередь ключа удаляется, как только в ней не остаётся задач, поэтому
+	память не растёт с числом когда-либо писавших чатов.
+
+	Не потокобезопасен: рассчитан на использование из одного event loop.
+	"""
+
+	def __init__(self, max_concurrency: int) -> None:
+		"""
+		:param max_concurrency: сколько задач выполняется одновременно
+		"""
+		self.max_concurrency = max_concurrency
+		self._slots = asyncio.Semaphore(max_concurrency)
+		self._lanes: dict[Hashable, _Lane] = {}
+
+		self.running = 0
+		self.waiting = 0
+		self.completed = 0
+		self.max_waiting = 0
+		self.max_key_depth = 0
+		self._wait_total = 0.0
+		self._wait_count = 0
+		self._wait_max = 0.0
+		track_scheduler(self)
+
+	@asynccontextmanager
+	async def slot(self, key: Hashable | None) -> AsyncIterator[None]:
+		"""
+		Ждёт своей очереди внутри `key` и свободного общего слота.
+		`key=None` — без упорядочивания, только общий лимит.
+		"""
+		lane = self._join(key)
+		try:
+			enqueued_at = time.monotonic()
+			self.waiting += 1
+			self.max_waiting = max(self.max_waiting, self.waiting)
+			try:
+				if lane is not None:
+					await lane.lock.acquire()
+				try:
+					await self._slots.acquire()
+				except BaseException:
+					if lane is not None:
+						lane.lock.release()
+					raise
+			finally:
+				self.waiting -= 1
+			self._record_wait(time.monotonic() - enqueued_at)
+
+			self.running += 1
+			try:
+				yield
+			finally:
+				self.running -= 1
+				self.completed += 1
+				self._slots.release()
+				if lane is not None:
+					lane.lock.release()
+		finally:
+			self._leave(key, lane)
+
+	def _join(self, key: Hashable | None) -> _Lane | None:
+		if key is None:
+			return None
+		lane = self._lanes.get(key)
+		if lane is None:
+			lane = self._lanes[key] = _Lane()
+		lane.users += 1
+		self.max_key_depth = max(self.max_key_depth, lane.users)
+		return lane
+
+	def _leave(self, key: Hashable | None, lane: _Lane | None) -> None:
+		if lane is None:
+			return
+		lane.users -= 1
+		if not lane.users:
+			del self._lanes[key]
+
+	def _record_wait(self, wait: float) -> None:
+		self._wait_total += wait
+		self._wait_count += 1
+		self._wait_max = max(self._wait_max, wait)
+		SCHEDULER_WAIT.observe(wait)
+
+	def stats(self) -> SchedulerStatsDTO:
+		return SchedulerStatsDTO(
+			max_concurrency=self.max_concurrency,
+			running=self.running,
+			waiting=self.waiting,
+			keys=len(self._lanes),
+			completed=self.completed,
+			max_waiting=self.max_waiting,
+			max_key_depth=self.max_key_depth,
+			wait_avg=(
+				self._wait_total / self._wait_count if self._wait_count else 0.0
+			),
+			wait_max=self._wait_max,
+		)
@@ -0,0 +1,11 @@
+from .routing import extract_shard_key, shard_for
+from .supervisor import Supervisor
+from .worker import ShardWorker, run_worker
+
+__all__ = [
+	"extract_shard_key",
+	"shard_for",
+	"Supervisor",
+	"ShardWorker",
+	"run_worker",
+]
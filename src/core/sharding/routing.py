@@ -0,0 +1,31 @@
+from typing import Any
+
+
+def extract_shard_key(update: dict[str, Any]) -> int:
+	"""
+	Ключ шардирования сырого update'а: id чата, иначе id пользователя,
+	иначе update_id. Работает по dict, без валидации в `Update`.
+	"""
+	for name, event in update.items():
+		if name == "update_id" or not isinstance(event, dict):
+			continue
+
+		chat = event.get("chat")
+		if chat is None:
+			# callback_query и подобные несут чат во вложенном сообщении
+			message = event.get("message")
+			if isinstance(message, dict):
+				chat = message.get("chat")
+		if isinstance(chat, dict) and "id" in chat:
+			return int(chat["id"])
+
+		user = event.get("from") or event.get("user")
+		if isinstance(user, dict) and "id" in user:
+			return int(user["id"])
+
+	return int(update.get("update_id", 0))
+
+
+def shard_for(update: dict[str, Any], shards: int) -> int:
+	"""Номер шарда для update'а; один чат всегда попадает в один шард."""
+	return extract_shard_key(update) % shards
@@ -0,0 +1,335 @@
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import secrets
+import signal
+from contextlib import suppress
+from multiprocessing.context import SpawnProcess
+from multiprocessing.queues import Queue
+from typing import Any
+
+import aiohttp
+from aiogram import Bot
+from aiohttp import web
+
+from src.core.config import cfg
+from src.core.sharding.routing import shard_for
+from src.core.sharding.worker import STOP, run_worker
+from src.schemas.dataclasses import WorkerStatsDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+POLLING_TIMEOUT = 30
+MONITOR_INTERVAL = 1.0
+WORKER_STOP_TIMEOUT = 30.0
+# Сколько ждать после SIGTERM, прежде чем убить воркер
+WORKER_TERMINATE_TIMEOUT = 5.0
+
+
+class Supervisor:
+	"""
+	Супервизор многопроцессного режима.
+
+	Принимает сырые update'ы (long polling или webhook), раскладывает их по
+	воркерам по хешу chat_id/user_id, следит за воркерами и перезапускает
+	упавшие, сводит их статистику. Сам update'ы не валидирует и хендлеры
+	не запускает — только `json.loads` и маршрутизация.
+	"""
+
+	def __init__(
+		self,
+		workers: int,
+		queue_size: int,
+		max_in_flight: int,
+		stats_interval: float,
+		restart_delay: float,
+		allowed_updates: list[str] | None = None,
+	) -> None:
+		self.workers = workers
+		self.queue_size = queue_size
+		self.max_in_flight = max_in_flight
+		self.stats_interval = stats_interval
+		self.restart_delay = restart_delay
+		self.allowed_updates = allowed_updates
+
+		self._ctx = mp.get_context("spawn")
+		self._inboxes: list[Queue] = [
+			self._ctx.Queue(maxsize=queue_size) for _ in range(workers)
+		]
+		self._stats_queue: Queue = self._ctx.Queue()
+		self._processes: list[SpawnProcess | None] = [None] * workers
+		self._restarting: dict[int, asyncio.Task[None]] = {}
+		self._stopping = asyncio.Event()
+
+		# Счётчики завершённых процессов + последний снимок живых
+		self._finished = [WorkerStatsDTO(shard=i, pid=0) for i in range(workers)]
+		self._latest: dict[int, WorkerStatsDTO] = {}
+		self._routed = [0] * workers
+		self._restarts = [0] * workers
+
+	# ========== Воркеры ==========
+	def _spawn(self, shard: int) -> None:
+		process = self._ctx.Process(
+			target=run_worker,
+			args=(
+				shard,
+				self._inboxes[shard],
+				self._stats_queue,
+				self.stats_interval,
+				self.max_in_flight,
+				self.workers,
+			),
+			name=f"shard-{shard}",
+			daemon=False,
+		)
+		process.start()
+		self._processes[shard] = process
+		logger.info("Worker spawned", shard=shard, pid=process.pid)
+
+	def _collect_stats(self) -> None:
+		while True:
+			try:
+				stats: WorkerStatsDTO = self._stats_queue.get_nowait()
+			except queue.Empty:
+				return
+			previous = self._latest.get(stats.shard)
+			if previous is not None and previous.pid != stats.pid:
+				# Первый снимок перезапущенного воркера: фиксируем итог старого
+				previous.in_flight = 0
+				self._finished[stats.shard].merge(previous)
+			self._latest[stats.shard] = stats
+
+	async def _monitor(self) -> None:
+		while not self._stopping.is_set():
+			self._collect_stats()
+			for shard, process in enumerate(self._processes):
+				if process is None or process.is_alive():
+					continue
+				logger.error(
+					"Worker died, restarting",
+					shard=shard,
+					pid=process.pid,
+					exitcode=process.exitcode,
+				)
+				self._restarts[shard] += 1
+				self._processes[shard] = None
+				# Пауза перед перезапуском не должна задерживать проверку остальных
+				task = asyncio.create_task(self._restart(shard))
+				self._restarting[shard] = task
+				task.add_done_callback(lambda _, s=shard: self._restarting.pop(s, None))
+			with suppress(TimeoutError):
+				await asyncio.wait_for(
+					self._stopping.wait(),
+					timeout=MONITOR_INTERVAL,
+				)
+
+	async def _restart(self, shard: int) -> None:
+		with suppress(TimeoutError):
+			await asyncio.wait_for(self._stopping.wait(), timeout=self.restart_delay)
+		if not self._stopping.is_set():
+			self._spawn(shard)
+
+	async def _report(self) -> None:
+		while not self._stopping.is_set():
+			with suppress(TimeoutError):
+				await asyncio.wait_for(
+					self._stopping.wait(),
+					timeout=self.stats_interval,
+				)
+			self._collect_stats()
+			logger.info("Sharding stats", **self.stats())
+
+	def stats(self) -> dict[str, Any]:
+		"""Сводная статистика по всем шардам с учётом перезапусков."""
+		total = WorkerStatsDTO(shard=-1, pid=os.getpid())
+		shards = []
+		for shard in range(self.workers):
+			merged = WorkerStatsDTO(shard=shard, pid=0)
+			merged.merge(self._finished[shard])
+			latest = self._latest.get(shard)
+			if latest is not None:
+				merged.merge(latest)
+				merged.pid = latest.pid
+			total.merge(merged)
+			shards.append(
+				{
+					"shard": shard,
+					"pid": merged.pid,
+					"routed": self._routed[shard],
+					"queued": self._qsize(shard),
+					"processed": merged.processed,
+					"failed": merged.failed,
+					"in_flight": merged.in_flight,
+					"restarts": self._restarts[shard],
+				},
+			)
+		return {
+			"routed": sum(self._routed),
+			"processed": total.processed,
+			"failed": total.failed,
+			"in_flight": total.in_flight,
+			"restarts": sum(self._restarts),
+			"shards": shards,
+		}
+
+	def _qsize(self, shard: int) -> int | None:
+		# На macOS qsize() не реализован
+		try:
+			return self._inboxes[shard].qsize()
+		except NotImplementedError:
+			return None
+
+	# ========== Маршрутизация ==========
+	async def route(self, update: dict[str, Any]) -> None:
+		"""Кладёт update в очередь его шарда; ждёт, если очередь заполнена."""
+		shard = shard_for(update, self.workers)
+		inbox = self._inboxes[shard]
+		while True:
+			try:
+				inbox.put_nowait(update)
+				break
+			except queue.Full:
+				await asyncio.sleep(0.01)
+		self._routed[shard] += 1
+
+	# ========== Приём update'ов ==========
+	async def _poll(self, bot: Bot) -> None:
+		"""Long polling без валидации: сырой getUpdates и только json.loads."""
+		url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+		offset: int | None = None
+		timeout = aiohttp.ClientTimeout(total=POLLING_TIMEOUT + 10)
+
+		async with aiohttp.ClientSession(timeout=timeout) as session:
+			while not self._stopping.is_set():
+				payload: dict[str, Any] = {"timeout": POLLING_TIMEOUT}
+				if offset is not None:
+					payload["offset"] = offset
+				if self.allowed_updates is not None:
+					payload["allowed_updates"] = self.allowed_updates
+				try:
+					async with session.post(url, json=payload) as resp:
+						body = await resp.json()
+				except (aiohttp.ClientError, TimeoutError) as exc:
+					logger.warning("getUpdates failed", error=str(exc))
+					await asyncio.sleep(self.restart_delay)
+					continue
+
+				if not body.get("ok"):
+					logger.warning(
+						"getUpdates failed",
+						error=body.get("description"),
+					)
+					await asyncio.sleep(
+						body.get("parameters", {}).get("retry_after")
+						or self.restart_delay,
+					)
+					continue
+
+				for update in body["result"]:
+					await self.route(update)
+					offset = update["update_id"] + 1
+
+	async def _webhook(self, request: web.Request) -> web.Response:
+		secret = cfg.bot.webhook_secret
+		if secret and not secrets.compare_digest(
+			request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""),
+			secret,
+		):
+			return web.Response(status=401)
+		await self.route(await request.json())
+		return web.Response()
+
+	async def _healthcheck(self, request: web.Request) -> web.Response:
+		return web.json_response(self.stats())
+
+	async def _serve_webhook(self, bot: Bot) -> None:
+		app = web.Application()
+		app.router.add_post(cfg.bot.webhook_path, self._webhook)
+		app.router.add_get("/healthz", self._healthcheck)
+		runner = web.AppRunner(app, handle_signals=False)
+		await runner.setup()
+		site = web.TCPSite(
+			runner,
+			host=cfg.bot.webhook_host,
+			port=cfg.bot.webhook_port,
+		)
+		try:
+			await site.start()
+			if cfg.bot.webhook_set_on_startup:
+				await bot.set_webhook(
+					url=cfg.bot.webhook_url,
+					secret_token=cfg.bot.webhook_secret or None,
+					allowed_updates=self.allowed_updates,
+					drop_pending_updates=cfg.bot.drop_pending_updates,
+				)
+			await self._stopping.wait()
+		finally:
+			await runner.cleanup()
+
+	# ========== Жизненный цикл ==========
+	async def run(self) -> None:
+		loop = asyncio.get_running_loop()
+		for sig in (signal.SIGINT, signal.SIGTERM):
+			with suppress(NotImplementedError):
+				loop.add_signal_handler(sig, self._stopping.set)
+
+		for shard in range(self.workers):
+			self._spawn(shard)
+
+		bot = Bot(token=cfg.bot.token)
+		monitor = asyncio.create_task(self._monitor())
+		reporter = asyncio.create_task(self._report())
+		logger.info("Supervisor started", workers=self.workers, mode=cfg.bot.mode)
+
+		try:
+			if cfg.bot.mode == "webhook":
+				await self._serve_webhook(bot)
+			else:
+				await bot.delete_webhook(
+					drop_pending_updates=cfg.bot.drop_pending_updates,
+				)
+				ingest = asyncio.create_task(self._poll(bot))
+				await self._stopping.wait()
+				ingest.cancel()
+				with suppress(asyncio.CancelledError):
+					await ingest
+		finally:
+			self._stopping.set()
+			await asyncio.gather(monitor, reporter, *self._restarting.values())
+			await self._stop_workers()
+			await bot.session.close()
+			self._collect_stats()
+			logger.info("Supervisor stopped", **self.stats())
+
+	async def _stop_workers(self) -> None:
+		await asyncio.gather(
+			*(self._stop_worker(shard) for shard in range(self.workers)),
+		)
+
+	async def _stop_worker(self, shard: int) -> None:
+		process = self._processes[shard]
+		if process is None or not process.is_alive():
+			return
+		try:
+			# У зависшего воркера очередь полна, и put без таймаута ждал бы вечно
+			await asyncio.to_thread(
+				self._inboxes[shard].put,
+				STOP,
+				True,
+				WORKER_STOP_TIMEOUT,
+			)
+		except queue.Full:
+			logger.warning("Worker inbox is full, terminating", shard=shard)
+		else:
+			await asyncio.to_thread(process.join, WORKER_STOP_TIMEOUT)
+		if not process.is_alive():
+			return
+		logger.warning("Worker did not stop, terminating", shard=shard)
+		process.terminate()
+		await asyncio.to_thread(process.join, WORKER_TERMINATE_TIMEOUT)
+		if process.is_alive():
+			logger.warning("Worker did not terminate, killing", shard=shard)
+			process.kill()
+			await asyncio.to_thread(process.join, WORKER_TERMINATE_TIMEOUT)
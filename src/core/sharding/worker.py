@@ -0,0 +1,183 @@
+import asyncio
+import os
+import signal
+import threading
+from multiprocessing.queues import Queue
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+
+from src.core.sharding.routing import extract_shard_key
+from src.schemas.dataclasses import WorkerStatsDTO
+from src.services.logger import get_logger
+
+# Сигнал воркеру завершиться после обработки уже полученных update'ов
+STOP = None
+# Сколько принятых update'ов может ждать своей очереди на слот
+# (в том числе предыдущего update'а чата), в долях `max_in_flight`
+PENDING_PER_SLOT = 4
+
+
+class ShardWorker:
+	"""
+	Обработчик одного шарда внутри воркер-процесса.
+
+	Читает сырые update'ы из межпроцессной очереди и обрабатывает их
+	конкурентно (не больше `max_in_flight` одновременно), сохраняя порядок
+	внутри чата: задача следующего update'а чата ждёт завершения предыдущей
+	и только потом занимает слот, поэтому очередь одного чата не отнимает
+	слоты у остальных. Принятых, но ещё не выполняемых update'ов — не больше
+	`max_in_flight * PENDING_PER_SLOT`; когда воркер не успевает, очередь
+	супервизора заполняется и тот притормаживает приём.
+	"""
+
+	def __init__(
+		self,
+		shard: int,
+		inbox: Queue,
+		stats_queue: Queue,
+		stats_interval: float,
+		max_in_flight: int,
+	) -> None:
+		self.shard = shard
+		self.inbox = inbox
+		self.stats_queue = stats_queue
+		self.stats_interval = stats_interval
+		self.max_in_flight = max_in_flight
+		self.logger = get_logger().bind(shard=shard)
+
+		self._stats = WorkerStatsDTO(shard=shard, pid=os.getpid())
+		self._tails: dict[int, asyncio.Task[None]] = {}
+
+	async def run(self, bot: Bot, dp: Dispatcher) -> None:
+		loop = asyncio.get_running_loop()
+		updates: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(
+			maxsize=self.max_in_flight,
+		)
+		slots = asyncio.Semaphore(self.max_in_flight)
+		pending = asyncio.Semaphore(self.max_in_flight * PENDING_PER_SLOT)
+
+		# mp.Queue.get блокирующий — читаем его в отдельном потоке
+		reader = threading.Thread(
+			target=self._read_inbox,
+			args=(loop, updates),
+			name=f"shard-{self.shard}-reader",
+			daemon=True,
+		)
+		reader.start()
+		loop.add_signal_handler(
+			signal.SIGTERM,
+			lambda: loop.create_task(updates.put(STOP)),
+		)
+
+		stats_task = asyncio.create_task(self._report_stats())
+		await dp.emit_startup(bot=bot, dispatcher=dp)
+		self.logger.info("Shard worker started", pid=self._stats.pid)
+
+		try:
+			while (update := await updates.get()) is not STOP:
+				self._stats.received += 1
+				await pending.acquire()
+				key = extract_shard_key(update)
+				task = asyncio.create_task(
+					self._process(bot, dp, update, self._tails.get(key), slots),
+				)
+				self._tails[key] = task
+				task.add_done_callback(lambda _: pending.release())
+				task.add_done_callback(
+					lambda t, k=key: self._tails.pop(k, None)
+					if self._tails.get(k) is t
+					else None,
+				)
+			if self._tails:
+				await asyncio.wait(set(self._tails.values()))
+		finally:
+			stats_task.cancel()
+			self._send_stats()
+			await dp.emit_shutdown(bot=bot, dispatcher=dp)
+			self.logger.info("Shard worker stopped", pid=self._stats.pid)
+
+	async def _process(
+		self,
+		bot: Bot,
+		dp: Dispatcher,
+		update: dict[str, Any],
+		previous: asyncio.Task[None] | None,
+		slots: asyncio.Semaphore,
+	) -> None:
+		if previous is not None:
+			await asyncio.wait({previous})
+
+		async with slots:
+			self._stats.in_flight += 1
+			try:
+				await dp.feed_raw_update(bot, update)
+			except Exception:
+				# Исключение уже залогировано диспетчером
+				self._stats.failed += 1
+			else:
+				self._stats.processed += 1
+			finally:
+				self._stats.in_flight -= 1
+
+	def _read_inbox(
+		self,
+		loop: asyncio.AbstractEventLoop,
+		updates: asyncio.Queue[dict[str, Any] | None],
+	) -> None:
+		while True:
+			item = self.inbox.get()
+			# Блокируемся, пока в локальной очереди нет места
+			asyncio.run_coroutine_threadsafe(updates.put(item), loop).result()
+			if item is STOP:
+				return
+
+	async def _report_stats(self) -> None:
+		while True:
+			await asyncio.sleep(self.stats_interval)
+			self._send_stats()
+
+	def _send_stats(self) -> None:
+		self.stats_queue.put(
+			WorkerStatsDTO(
+				shard=self._stats.shard,
+				pid=self._stats.pid,
+				received=self._stats.received,
+				processed=self._stats.processed,
+				failed=self._stats.failed,
+				in_flight=self._stats.in_flight,
+			),
+		)
+
+
+def run_worker(
+	shard: int,
+	inbox: Queue,
+	stats_queue: Queue,
+	stats_interval: float,
+	max_in_flight: int,
+	shards: int,
+) -> None:
+	"""
+	Точка входа воркер-процесса.
+
+	Каждый воркер собирает собственные engine, Redis-пул и dishka-контейнер
+	через `create_app`, поэтому между процессами ничего не разделяется.
+	"""
+	# Ctrl+C обрабатывает супервизор и сам останавливает воркеры
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+	from src.main import create_app
+
+	async def serve() -> None:
+		async with create_app(shard, shards) as (bot, dp):
+			worker = ShardWorker(
+				shard,
+				inbox,
+				stats_queue,
+				stats_interval,
+				max_in_flight,
+			)
+			await worker.run(bot, dp)
+
+	asyncio.run(serve())
@@ -1,6 +1,13 @@
-from .s3 import get_s3_client, get_s3_external_client
+from .s3 import (
+	S3Client,
+	S3ExternalClient,
+	get_s3_client,
+	get_s3_external_client,
+)
 
 __all__ = [
+	"S3Client",
+	"S3ExternalClient",
 	"get_s3_client",
 	"get_s3_external_client",
-]
\ No newline at end of file
+]
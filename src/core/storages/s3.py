@@ -2,12 +2,19 @@ from __future__ import annotations
 
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Any, NewType
 
+from aiobotocore.client import AioBaseClient
 from aiobotocore.session import get_session
 from botocore.config import Config
 
 from src.core.config import cfg
+from src.core.metrics import instrument_s3_client
+from src.core.tracing import trace_s3_client
+
+# Разные типы для DI: клиент для запросов к S3 и клиент для presigned-ссылок
+S3Client = NewType("S3Client", AioBaseClient)
+S3ExternalClient = NewType("S3ExternalClient", AioBaseClient)
 
 
 @asynccontextmanager
@@ -32,6 +39,9 @@ async def get_s3_client() -> AsyncIterator[Any]:
 		aws_secret_access_key=cfg.s3.aws_secret_access_key,
 		config=config,
 	) as client:
+		instrument_s3_client(client)
+		if cfg.tracing.enabled:
+			trace_s3_client(client)
 		yield client
 
 
@@ -0,0 +1,12 @@
+from .limiter import ChatRateLimiter, PriorityRateLimiter
+from .middleware import ThrottlingRequestMiddleware
+from .priority import SendPriority, get_send_priority, send_priority
+
+__all__ = [
+	"ChatRateLimiter",
+	"PriorityRateLimiter",
+	"ThrottlingRequestMiddleware",
+	"SendPriority",
+	"get_send_priority",
+	"send_priority",
+]
@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Hashable
+
+# Как часто чистить состояние чатов, у которых лимит уже восстановился
+_SWEEP_EVERY = 1000
+
+
+class ChatRateLimiter:
+	"""
+	Лимит отправок на чат по алгоритму GCRA (виртуальное расписание).
+
+	Для каждого чата хранится только момент, когда восстановится полный
+	запас (`tat`). Вызов сразу резервирует ближайший свободный слот и
+	возвращает, сколько до него ждать, — конкурентные отправки в один чат
+	выстраиваются по порядку без очереди и фоновых задач.
+	"""
+
+	def __init__(
+		self,
+		private_rate: float,
+		group_rate: float,
+		burst: int = 1,
+	) -> None:
+		"""
+		:param private_rate: сообщений в секунду в личный чат
+		:param group_rate: сообщений в секунду в группу/канал (chat_id < 0)
+		:param burst: сколько сообщений можно отправить подряд без паузы
+		"""
+		self.private_interval = 1 / private_rate
+		self.group_interval = 1 / group_rate
+		self.burst = burst
+		self._tat: dict[Hashable, float] = {}
+		self._reservations = 0
+
+	def _interval(self, chat_id: Hashable) -> float:
+		if isinstance(chat_id, int) and chat_id > 0:
+			return self.private_interval
+		return self.group_interval
+
+	def reserve(self, chat_id: Hashable) -> float:
+		"""Резервирует слот для отправки и возвращает задержку до него (сек)."""
+		now = time.monotonic()
+		interval = self._interval(chat_id)
+		tat = max(self._tat.get(chat_id, now), now)
+		delay = max(0.0, tat - now - (self.burst - 1) * interval)
+		self._tat[chat_id] = tat + interval
+
+		self._reservations += 1
+		if self._reservations % _SWEEP_EVERY == 0:
+			self._sweep(now)
+		return delay
+
+	def penalize(self, chat_id: Hashable, seconds: float) -> None:
+		"""Запрещает отправки в чат на `seconds` (ответ 429 с retry_after)."""
+		self._tat[chat_id] = max(
+			self._tat.get(chat_id, 0.0),
+			# Первый слот — ровно через `seconds`, дальше без запаса на burst
+			time.monotonic() + seconds + (self.burst - 1) * self._interval(chat_id),
+		)
+
+	def _sweep(self, now: float) -> None:
+		for chat_id in [k for k, tat in self._tat.items() if tat <= now]:
+			del self._tat[chat_id]
+
+	def __len__(self) -> int:
+		return len(self._tat)
+
+
+class PriorityRateLimiter:
+	"""
+	Общий token bucket с приоритетной очередью ожидающих.
+
+	Когда токенов нет, запросы ждут в куче по `(priority, порядок)`:
+	интерактивные ответы получают токен раньше массовых рассылок.
+	Токены выдаются из таймера event loop, без отдельной задачи.
+
+	Не потокобезопасен: рассчитан на использование из одного event loop.
+	"""
+
+	def __init__(self, rate: float, burst: int = 1) -> None:
+		"""
+		:param rate: токенов в секунду
+		:param burst: ёмкость ведра
+		"""
+		self.rate = rate
+		self.burst = burst
+		self._tokens = float(burst)
+		self._updated_at = time.monotonic()
+		self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+		self._seq = itertools.count()
+		self._timer: asyncio.TimerHandle | None = None
+
+	@property
+	def waiting(self) -> int:
+		return len(self._waiters)
+
+	async def acquire(self, priority: int = 0) -> None:
+		self._refill()
+		if not self._waiters and self._tokens >= 1:
+			self._tokens -= 1
+			return
+
+		future = asyncio.get_running_loop().create_future()
+		heapq.heappush(self._waiters, (priority, next(self._seq), future))
+		self._schedule()
+		try:
+			await future
+		except asyncio.CancelledError:
+			if future.done() and not future.cancelled():
+				# Токен уже выдан, а ожидающий отменён — отдаём его следующему
+				self._tokens = min(self.burst, self._tokens + 1)
+				if self._timer is not None:
+					self._timer.cancel()
+				self._release()
+			raise
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self._tokens = min(
+			self.burst,
+			self._tokens + (now - self._updated_at) * self.rate,
+		)
+		self._updated_at = now
+
+	def _schedule(self) -> None:
+		if self._timer is not None or not self._waiters:
+			return
+		delay = max(0.0, (1 - self._tokens) / self.rate)
+		self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+	def _release(self) -> None:
+		self._timer = None
+		self._refill()
+		while self._waiters and self._tokens >= 1:
+			_, _, future = heapq.heappop(self._waiters)
+			if future.done():
+				# Ожидающий отменён — токен не тратим
+				continue
+			self._tokens -= 1
+			future.set_result(None)
+		self._schedule()
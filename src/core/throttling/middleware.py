@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import (
+	BaseRequestMiddleware,
+	NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from src.core.throttling.limiter import ChatRateLimiter, PriorityRateLimiter
+from src.core.throttling.priority import get_send_priority
+from src.schemas.dataclasses import SendQueueStatsDTO
+from src.services.logger import get_logger
+
+if TYPE_CHECKING:
+	from aiogram import Bot
+
+logger = get_logger()
+
+# Методы, которые создают сообщения в чате и попадают под лимиты Telegram
+THROTTLED_PREFIXES = ("send", "copy", "forward")
+NOT_THROTTLED = frozenset({"sendChatAction"})
+
+
+class ThrottlingRequestMiddleware(BaseRequestMiddleware):
+	"""
+	Middleware сессии бота: очередь исходящих сообщений с лимитами Telegram.
+
+	Перед отправкой запрос ждёт слот в своём чате (`ChatRateLimiter`),
+	затем общий токен (`PriorityRateLimiter`) — в порядке приоритета из
+	`send_priority`. На 429 чат блокируется на `retry_after`, и запрос
+	повторяется здесь же, хендлер об этом не знает.
+	Остальные методы (getUpdates, answerCallbackQuery, ...) проходят без задержек.
+	"""
+
+	def __init__(
+		self,
+		chat_limiter: ChatRateLimiter,
+		global_limiter: PriorityRateLimiter,
+		max_retries: int = 3,
+	) -> None:
+		self.chat_limiter = chat_limiter
+		self.global_limiter = global_limiter
+		self.max_retries = max_retries
+
+		self.sent = 0
+		self.delayed = 0
+		self.retries = 0
+		self._wait_total = 0.0
+		self._wait_count = 0
+		self._wait_max = 0.0
+
+	async def __call__(
+		self,
+		make_request: NextRequestMiddlewareType[TelegramType],
+		bot: "Bot",
+		method: TelegramMethod[TelegramType],
+	) -> Response[TelegramType]:
+		chat_id = getattr(method, "chat_id", None)
+		if chat_id is None or not self._is_throttled(method):
+			return await make_request(bot, method)
+
+		priority = get_send_priority()
+		attempt = 0
+		while True:
+			enqueued_at = time.monotonic()
+			delay = self.chat_limiter.reserve(chat_id)
+			if delay:
+				await asyncio.sleep(delay)
+			await self.global_limiter.acquire(priority)
+			self._record_wait(time.monotonic() - enqueued_at)
+
+			try:
+				response = await make_request(bot, method)
+			except TelegramRetryAfter as exc:
+				if attempt >= self.max_retries:
+					raise
+				attempt += 1
+				self.retries += 1
+				self.chat_limiter.penalize(chat_id, exc.retry_after)
+				logger.warning(
+					"Flood control, retrying",
+					method=method.__api_method__,
+					chat_id=chat_id,
+					retry_after=exc.retry_after,
+					attempt=attempt,
+				)
+				continue
+
+			self.sent += 1
+			return response
+
+	@staticmethod
+	def _is_throttled(method: TelegramMethod[TelegramType]) -> bool:
+		name = method.__api_method__
+		return name.startswith(THROTTLED_PREFIXES) and name not in NOT_THROTTLED
+
+	def _record_wait(self, wait: float) -> None:
+		if wait > 0.001:
+			self.delayed += 1
+		self._wait_total += wait
+		self._wait_count += 1
+		self._wait_max = max(self._wait_max, wait)
+
+	def stats(self) -> SendQueueStatsDTO:
+		return SendQueueStatsDTO(
+			sent=self.sent,
+			delayed=self.delayed,
+			retries=self.retries,
+			waiting=self.global_limiter.waiting,
+			wait_avg=(
+				self._wait_total / self._wait_count if self._wait_count else 0.0
+			),
+			wait_max=self._wait_max,
+		)
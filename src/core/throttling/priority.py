@@ -0,0 +1,37 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class SendPriority(IntEnum):
+	"""Приоритет исходящего запроса: меньше — раньше."""
+
+	INTERACTIVE = 0
+	BULK = 10
+
+
+_send_priority: ContextVar[SendPriority] = ContextVar(
+	"send_priority",
+	default=SendPriority.INTERACTIVE,
+)
+
+
+def get_send_priority() -> SendPriority:
+	return _send_priority.get()
+
+
+@contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+	"""
+	Задаёт приоритет всех отправок внутри блока.
+
+	Пример:
+		with send_priority(SendPriority.BULK):
+			await bot.send_message(chat_id, text)
+	"""
+	token = _send_priority.set(priority)
+	try:
+		yield
+	finally:
+		_send_priority.reset(token)
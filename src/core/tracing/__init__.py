@@ -0,0 +1,26 @@
+from .exporters import JsonFileExporter, SpanExporter
+from .instruments import TracedRedis, trace_engine, trace_s3_client
+from .tracer import (
+	configure_tracing,
+	current_trace_id,
+	end_span,
+	shutdown_tracing,
+	span,
+	start_span,
+	start_trace,
+)
+
+__all__ = [
+	"SpanExporter",
+	"JsonFileExporter",
+	"configure_tracing",
+	"shutdown_tracing",
+	"current_trace_id",
+	"start_trace",
+	"span",
+	"start_span",
+	"end_span",
+	"TracedRedis",
+	"trace_engine",
+	"trace_s3_client",
+]
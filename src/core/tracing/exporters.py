@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from pathlib import Path
+
+from src.schemas.dataclasses import TraceDTO
+from src.services.logger.sink import QueueSink
+
+
+class SpanExporter(ABC):
+	"""
+	Получатель завершённых трейсов. `export` вызывается в event loop,
+	поэтому не должен блокироваться на I/O.
+	"""
+
+	@abstractmethod
+	def export(self, trace: TraceDTO) -> None:
+		raise NotImplementedError
+
+	def close(self) -> None:  # noqa: B027
+		"""Дописывает буфер и освобождает ресурсы."""
+
+
+class JsonFileExporter(SpanExporter):
+	"""
+	Пишет трейсы в файл, по одному JSON-объекту на строку — для разбора
+	офлайн (`jq`, pandas). Запись идёт в фоновом потоке, как у логов.
+	"""
+
+	def __init__(self, path: str | Path, batch_size: int = 256) -> None:
+		self.path = Path(path)
+		self._file = self.path.open("a", encoding="utf-8")
+		self._sink = QueueSink(self._file, batch_size=batch_size)
+
+	def export(self, trace: TraceDTO) -> None:
+		self._sink.put(asdict(trace))
+
+	def close(self) -> None:
+		self._sink.close()
+		self._file.close()
@@ -0,0 +1,123 @@
+from typing import Any
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.tracing.tracer import (
+	current_trace_id,
+	end_span,
+	span,
+	start_span,
+)
+
+# Длинные INSERT ... VALUES из пачек не нужны в трейсе целиком
+MAX_STATEMENT_LENGTH = 500
+
+# ========== SQLAlchemy ==========
+_SPAN_ATTR = "_trace_span"
+
+
+def _before_cursor_execute(
+	conn: Connection,
+	cursor: Any,  # noqa: ANN401
+	statement: str,
+	parameters: Any,  # noqa: ANN401
+	context: ExecutionContext,
+	executemany: bool,
+) -> None:
+	setattr(
+		context,
+		_SPAN_ATTR,
+		start_span(
+			"db.execute",
+			statement=statement[:MAX_STATEMENT_LENGTH],
+			executemany=executemany,
+		),
+	)
+
+
+def _after_cursor_execute(
+	conn: Connection,
+	cursor: Any,  # noqa: ANN401
+	statement: str,
+	parameters: Any,  # noqa: ANN401
+	context: ExecutionContext,
+	executemany: bool,
+) -> None:
+	current = getattr(context, _SPAN_ATTR, None)
+	if current is not None:
+		current.attributes["rowcount"] = cursor.rowcount
+		end_span(current)
+
+
+def _handle_error(exception_context: ExceptionContext) -> None:
+	context = exception_context.execution_context
+	if context is not None:
+		end_span(
+			getattr(context, _SPAN_ATTR, None),
+			exception_context.original_exception,
+		)
+
+
+def trace_engine(engine: AsyncEngine) -> None:
+	"""
+	Участок `db.execute` на каждый запрос к БД. События синхронного engine
+	выполняются в greenlet'е SQLAlchemy, куда копируется контекст задачи,
+	поэтому текущий трейс виден и здесь.
+	"""
+	sync_engine = engine.sync_engine
+	event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+	event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+	event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# ========== Redis ==========
+class TracedRedis(Redis):
+	"""Redis-клиент с участком `redis.<COMMAND>` на каждую команду."""
+
+	async def execute_command(self, *args: Any, **options: Any) -> Any:  # noqa: ANN401
+		if current_trace_id() is None:
+			return await super().execute_command(*args, **options)
+
+		attributes = {"key": str(args[1])} if len(args) > 1 else {}
+		with span(f"redis.{args[0]}", **attributes):
+			return await super().execute_command(*args, **options)
+
+
+# ========== S3 ==========
+_S3_SPAN_KEY = "trace_span"
+
+
+def _s3_before_call(
+	context: dict[str, Any],
+	model: Any,  # noqa: ANN401
+	params: dict[str, Any] | None = None,
+	**kwargs: Any,  # noqa: ANN401
+) -> None:
+	bucket = (params or {}).get("Bucket")
+	attributes = {"bucket": bucket} if bucket else {}
+	context[_S3_SPAN_KEY] = start_span(f"s3.{model.name}", **attributes)
+
+
+def _s3_after_call(
+	context: dict[str, Any],
+	http_response: Any = None,  # noqa: ANN401
+	exception: BaseException | None = None,
+	**kwargs: Any,  # noqa: ANN401
+) -> None:
+	current = context.pop(_S3_SPAN_KEY, None)
+	if current is None:
+		return
+	if http_response is not None:
+		current.attributes["status"] = http_response.status_code
+	end_span(current, exception)
+
+
+def trace_s3_client(client: Any) -> None:  # noqa: ANN401
+	"""Подписывает aiobotocore-клиент на события botocore для участков `s3.*`."""
+	events = client.meta.events
+	events.register("before-call.s3", _s3_before_call)
+	events.register("after-call.s3", _s3_after_call)
+	events.register("after-call-error.s3", _s3_after_call)
@@ -0,0 +1,205 @@
+import random
+import secrets
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import replace
+from typing import Any
+
+from src.core.tracing.exporters import SpanExporter
+from src.schemas.dataclasses import SpanDTO, TraceDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+
+class _Trace:
+	"""Собирает участки одного трейса, пока открыт корневой участок."""
+
+	__slots__ = ("trace_id", "timestamp", "spans", "max_spans", "dropped", "closed")
+
+	def __init__(self, max_spans: int) -> None:
+		self.trace_id = secrets.token_hex(8)
+		self.timestamp = time.time()
+		self.spans: list[SpanDTO] = []
+		self.max_spans = max_spans
+		self.dropped = 0
+		self.closed = False
+
+	def add(
+		self,
+		name: str,
+		parent_id: int | None,
+		attributes: dict[str, Any],
+	) -> SpanDTO | None:
+		# Задачи, запущенные из хендлера, могут пережить update — их участки
+		# в уже отправленный трейс не попадают
+		if self.closed:
+			return None
+		if len(self.spans) >= self.max_spans:
+			self.dropped += 1
+			return None
+		# Пока участок открыт, в `start` лежит абсолютное время perf_counter
+		span = SpanDTO(
+			span_id=len(self.spans),
+			parent_id=parent_id,
+			name=name,
+			start=time.perf_counter(),
+			attributes=attributes,
+		)
+		self.spans.append(span)
+		return span
+
+
+# Текущий трейс и участок; копируется в дочерние задачи asyncio и в greenlet'ы
+# SQLAlchemy вместе с остальным контекстом
+_current: ContextVar[tuple[_Trace, SpanDTO] | None] = ContextVar(
+	"trace_span",
+	default=None,
+)
+
+_exporter: SpanExporter | None = None
+_sample_rate: float = 0.0
+_max_spans: int = 1000
+
+
+def configure_tracing(
+	exporter: SpanExporter,
+	sample_rate: float = 1.0,
+	max_spans: int = 1000,
+) -> None:
+	"""
+	Включает трейсинг в процессе.
+
+	:param exporter: куда отправлять завершённые трейсы
+	:param sample_rate: доля трейсов, которые записываются (0..1)
+	:param max_spans: максимум участков в одном трейсе, остальные отбрасываются
+	"""
+	global _exporter, _sample_rate, _max_spans
+	_exporter = exporter
+	_sample_rate = sample_rate
+	_max_spans = max_spans
+
+
+def shutdown_tracing() -> None:
+	"""Выключает трейсинг и закрывает экспортёр."""
+	global _exporter
+	exporter, _exporter = _exporter, None
+	if exporter is not None:
+		exporter.close()
+
+
+def current_trace_id() -> str | None:
+	current = _current.get()
+	return current[0].trace_id if current is not None else None
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[str | None]:  # noqa: ANN401
+	"""
+	Открывает корневой участок трейса. Решение о записи принимается здесь
+	же (head-based sampling): для невыбранных update'ов все вложенные
+	`span()` ничего не делают.
+
+	Возвращает `trace_id` или None, если трейс не записывается.
+	"""
+	exporter = _exporter
+	if (
+		exporter is None
+		or _current.get() is not None
+		or random.random() >= _sample_rate
+	):
+		yield None
+		return
+
+	trace = _Trace(_max_spans)
+	root = trace.add(name, None, attributes)
+	assert root is not None
+	token = _current.set((trace, root))
+	try:
+		yield trace.trace_id
+	except BaseException as exc:
+		root.error = _describe(exc)
+		raise
+	finally:
+		_current.reset(token)
+		end_span(root)
+		trace.closed = True
+		_export(exporter, trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[SpanDTO | None]:  # noqa: ANN401
+	"""
+	Вложенный участок текущего трейса; вне трейса ничего не делает.
+
+	Пример:
+		with span("users.sync", user_id=user_id):
+			await session.execute(stmt)
+	"""
+	current = _current.get()
+	if current is None:
+		yield None
+		return
+
+	trace, parent = current
+	child = trace.add(name, parent.span_id, attributes)
+	if child is None:
+		yield None
+		return
+
+	token = _current.set((trace, child))
+	try:
+		yield child
+	except BaseException as exc:
+		child.error = _describe(exc)
+		raise
+	finally:
+		_current.reset(token)
+		end_span(child)
+
+
+def start_span(name: str, **attributes: Any) -> SpanDTO | None:  # noqa: ANN401
+	"""
+	Открывает конечный участок без смены текущего — для хуков событий
+	(SQLAlchemy, botocore), где нет единого блока `with`.
+	Закрывается через `end_span`.
+	"""
+	current = _current.get()
+	if current is None:
+		return None
+	trace, parent = current
+	return trace.add(name, parent.span_id, attributes)
+
+
+def end_span(span: SpanDTO | None, error: BaseException | None = None) -> None:
+	if span is None or span.duration is not None:
+		return
+	span.duration = time.perf_counter() - span.start
+	if error is not None:
+		span.error = _describe(error)
+
+
+def _describe(exc: BaseException) -> str:
+	message = str(exc)
+	return f"{type(exc).__name__}: {message}" if message else type(exc).__name__
+
+
+def _export(exporter: SpanExporter, trace: _Trace) -> None:
+	# Копии: участки фоновых задач могут закрыться уже после экспорта
+	started_at = trace.spans[0].start
+	spans = [replace(item, start=item.start - started_at) for item in trace.spans]
+	try:
+		exporter.export(
+			TraceDTO(
+				trace_id=trace.trace_id,
+				name=trace.spans[0].name,
+				timestamp=trace.timestamp,
+				duration=trace.spans[0].duration or 0.0,
+				spans=spans,
+				dropped_spans=trace.dropped,
+			),
+		)
+	except Exception as exc:
+		logger.error("Failed to export trace", error=str(exc))
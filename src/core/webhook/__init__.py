@@ -0,0 +1,6 @@
+from .server import WebhookRequestHandler, run_webhook
+
+__all__ = [
+	"WebhookRequestHandler",
+	"run_webhook",
+]
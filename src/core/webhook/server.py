@@ -0,0 +1,111 @@
+import asyncio
+import signal
+from contextlib import suppress
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import (
+	SimpleRequestHandler,
+	setup_application,
+)
+from aiohttp import web
+
+from src.core.config import cfg
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+# Сколько ждать недообработанные update'ы при остановке сервера
+SHUTDOWN_DRAIN_TIMEOUT = 30.0
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+	"""
+	Обработчик webhook-запросов Telegram.
+
+	Проверяет `X-Telegram-Bot-Api-Secret-Token`, сразу отвечает 200 и
+	передаёт update в `Dispatcher.feed_raw_update` фоновой задачей.
+	При остановке дожидается фоновых задач, прежде чем закрыть сессию бота.
+	"""
+
+	@property
+	def in_flight(self) -> int:
+		"""Количество update'ов, которые ещё обрабатываются в фоне."""
+		return len(self._background_feed_update_tasks)
+
+	async def close(self) -> None:
+		tasks = set(self._background_feed_update_tasks)
+		if tasks:
+			logger.info("Draining webhook updates", in_flight=len(tasks))
+			await asyncio.wait(tasks, timeout=SHUTDOWN_DRAIN_TIMEOUT)
+		await super().close()
+
+
+async def _healthcheck(request: web.Request) -> web.Response:
+	return web.Response(text="ok")
+
+
+def build_webhook_app(
+	dp: Dispatcher,
+	bot: Bot,
+	**workflow_data: Any,
+) -> web.Application:
+	"""
+	Собирает aiohttp-приложение с webhook-роутом и `/healthz` для балансировщика.
+	Startup/shutdown диспетчера привязываются к жизненному циклу приложения.
+	"""
+	app = web.Application()
+	WebhookRequestHandler(
+		dispatcher=dp,
+		bot=bot,
+		handle_in_background=True,
+		secret_token=cfg.bot.webhook_secret or None,
+		**workflow_data,
+	).register(app, path=cfg.bot.webhook_path)
+	app.router.add_get("/healthz", _healthcheck)
+	setup_application(app, dp, bot=bot, **workflow_data)
+	return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, **workflow_data: Any) -> None:
+	"""
+	Запускает приём update'ов через webhook вместо `start_polling`.
+	Работает до SIGINT/SIGTERM.
+	"""
+	if not cfg.bot.webhook_secret:
+		logger.warning("Webhook secret is not set, requests are not verified")
+
+	app = build_webhook_app(dp, bot, **workflow_data)
+	runner = web.AppRunner(app, handle_signals=False)
+	await runner.setup()
+	site = web.TCPSite(
+		runner,
+		host=cfg.bot.webhook_host,
+		port=cfg.bot.webhook_port,
+	)
+
+	stop = asyncio.Event()
+	loop = asyncio.get_running_loop()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		with suppress(NotImplementedError):
+			loop.add_signal_handler(sig, stop.set)
+
+	try:
+		await site.start()
+		if cfg.bot.webhook_set_on_startup:
+			await bot.set_webhook(
+				url=cfg.bot.webhook_url,
+				secret_token=cfg.bot.webhook_secret or None,
+				allowed_updates=dp.resolve_used_update_types(),
+				drop_pending_updates=cfg.bot.drop_pending_updates,
+			)
+		logger.info(
+			"Webhook server started",
+			host=cfg.bot.webhook_host,
+			port=cfg.bot.webhook_port,
+			path=cfg.bot.webhook_path,
+		)
+		await stop.wait()
+	finally:
+		await runner.cleanup()
+		logger.info("Webhook server stopped")
@@ -1,6 +1,6 @@
 from dishka import make_async_container, AsyncContainer
 
-from .providers.core import CoreProvider
+from .providers.core import CoreProvider, RequestProvider
 from .providers.repos import RepositoryProvider
 from .providers.services import ServiceProvider
 
@@ -8,6 +8,7 @@ from .providers.services import ServiceProvider
 def get_container() -> AsyncContainer:
     return make_async_container(
         CoreProvider(),
+        RequestProvider(),
         RepositoryProvider(),
         ServiceProvider(),
     )
\ No newline at end of file
@@ -1,5 +1,4 @@
 from collections.abc import AsyncIterator
-from typing import Any
 
 from dishka import Provider, Scope, provide
 from redis.asyncio import Redis, ConnectionPool
@@ -10,8 +9,19 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.core.config import cfg
-from src.core.db import create_engine, create_session_factory
-from src.core.storages import get_s3_client, get_s3_external_client
+from src.core.db import (
+	ModelLoaders,
+	ReplicaRouter,
+	create_engine,
+	create_replica_router,
+	create_session_factory,
+)
+from src.core.storages import (
+	S3Client,
+	S3ExternalClient,
+	get_s3_client,
+	get_s3_external_client,
+)
 from src.core.cache import create_redis_client, create_redis_pool
 
 
@@ -20,17 +30,36 @@ class CoreProvider(Provider):
 
 	# ========== Database ==========
 	@provide
-	def get_engine(self) -> AsyncEngine:
-		"""Engine живет на всё приложение."""
-		return create_engine()
+	async def get_engine(self) -> AsyncIterator[AsyncEngine]:
+		"""Engine живет на всё приложение — единственный на процесс."""
+		engine = create_engine()
+		yield engine
+		await engine.dispose()
+
+	@provide
+	async def get_replica_router(self) -> AsyncIterator[ReplicaRouter]:
+		"""Read-реплики с фоновой проверкой; без реплик — пустой роутер."""
+		router = create_replica_router()
+		router.start()
+		yield router
+		await router.close()
 
 	@provide
 	def get_session_factory(
 		self,
 		engine: AsyncEngine,
+		router: ReplicaRouter,
 	) -> async_sessionmaker[AsyncSession]:
 		"""Session factory для создания сессий."""
-		return create_session_factory(engine)
+		return create_session_factory(engine, router)
+
+	@provide
+	def get_model_loaders(
+		self,
+		factory: async_sessionmaker[AsyncSession],
+	) -> ModelLoaders:
+		"""Загрузчики по id, общие для всех запросов процесса."""
+		return ModelLoaders(factory, cfg.database.batch_loader_max_size)
 
 	# ========== Redis ==========
 	@provide
@@ -48,13 +77,13 @@ class RequestProvider(Provider):
 	scope = Scope.REQUEST
 
 	@provide
-	async def get_s3_client(self) -> AsyncIterator[Any]:
+	async def get_s3_client(self) -> AsyncIterator[S3Client]:
 		"""Provide S3 клиента на время запроса."""
 		async with get_s3_client() as client:
-			yield client  # Dishka автоматически закроет после REQUEST
+			yield S3Client(client)  # Dishka автоматически закроет после REQUEST
 
 	@provide
-	async def get_s3_external_client(self) -> AsyncIterator[Any]:
-		"""Provide S3 клиента на время запроса."""
+	async def get_s3_external_client(self) -> AsyncIterator[S3ExternalClient]:
+		"""Provide S3 клиента для presigned-ссылок на время запроса."""
 		async with get_s3_external_client() as client:
-			yield client  # Dishka автоматически закроет после REQUEST
+			yield S3ExternalClient(client)  # Dishka автоматически закроет после REQUEST
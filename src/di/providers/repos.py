@@ -1,8 +1,17 @@
 from collections.abc import AsyncGenerator
 
-from dishka import Provider, Scope, provide
+from dishka import Provider, Scope, alias, provide
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from src.core.config import cfg
+from src.core.db import ModelLoaders, finish_session
+from src.core.storages import S3Client, S3ExternalClient
+from src.repos.redis.example import CacheRepository
+from src.repos.redis.interfaces import AbstractCacheRepository
+from src.repos.s3.example import PhotoRepository
+from src.repos.s3.interfaces import AbstractS3Repository
+from src.repos.sql.example import ExampleSQLRepository
 from src.repos.sql.interfaces import AbstractBaseRepository
 
 
@@ -13,11 +22,42 @@ class RepositoryProvider(Provider):
 	async def get_session(
 		self,
 		factory: async_sessionmaker[AsyncSession],
-	) -> AsyncGenerator[AsyncSession, None]:
+	) -> AsyncGenerator[AsyncSession, BaseException | None]:
+		# Соединение и BEGIN берутся на первом запросе; COMMIT — только
+		# если были записи. dishka передаёт ошибку хендлера в yield.
 		async with factory() as session:
-			async with session.begin():
-				yield session
+			error = yield session
+			await finish_session(session, error)
 
 	@provide
-	def get_user_repo(self, session: AsyncSession) -> AbstractBaseRepository:
-		return AbstractBaseRepository(session)
+	def get_user_repo(
+		self,
+		session: AsyncSession,
+		loaders: ModelLoaders,
+	) -> ExampleSQLRepository:
+		return ExampleSQLRepository(
+			session,
+			loaders=loaders if cfg.database.batch_loader else None,
+		)
+
+	# Сервисы зависят от интерфейса — отдаём им тот же репозиторий
+	user_repo_interface = alias(
+		source=ExampleSQLRepository,
+		provides=AbstractBaseRepository,
+	)
+
+	@provide
+	def get_cache_repo(self, redis: Redis) -> AbstractCacheRepository:
+		return CacheRepository(redis)
+
+	@provide
+	def get_photo_repo(
+		self,
+		s3_client: S3Client,
+		s3_external_client: S3ExternalClient,
+	) -> AbstractS3Repository:
+		return PhotoRepository(
+			s3_client,
+			cfg.s3.aws_bucket,
+			presign_client=s3_external_client,
+		)
@@ -1,29 +1,74 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from pathlib import Path
+
+import sqlalchemy
 from aiogram import Bot, Dispatcher
-from dishka.integrations.aiogram import setup_dishka
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import (
+	AsyncEngine,
+	AsyncSession,
+	async_sessionmaker,
+)
 
+from src.core.cache import LRUCache
 from src.core.config import cfg
-from src.core.db import create_engine, create_session_factory
+from src.core.db import (
+	IndexUsageRecorder,
+	PoolAutotuner,
+	UpsertBuffer,
+	create_pool_autotuner,
+	query_stats,
+	resize_supported,
+	session_usage_stats,
+)
 from src.core.exc.handlers import error_router
+from src.core.metrics import MetricsServer
+from src.core.middlewares.container import setup_dishka_per_update
 from src.core.middlewares.logging import LoggingMiddleware
-from src.core.middlewares.user import UserMiddleware
+from src.core.middlewares.metrics import (
+	HandlerMetricsMiddleware,
+	UpdateMetricsMiddleware,
+)
+from src.core.middlewares.queries import (
+	HandlerQueryCounterMiddleware,
+	QueryCounterMiddleware,
+)
+from src.core.middlewares.scheduler import SchedulerMiddleware
+from src.core.middlewares.tracing import (
+	HandlerTracingMiddleware,
+	TracingRequestMiddleware,
+	setup_dishka_tracing,
+)
+from src.core.middlewares.user import (
+	USER_CONFLICT_COLUMNS,
+	USER_UPDATE_COLUMNS,
+	UserMiddleware,
+)
+from src.core.scheduling import KeyedScheduler
+from src.core.throttling import (
+	ChatRateLimiter,
+	PriorityRateLimiter,
+	ThrottlingRequestMiddleware,
+)
+from src.core.tracing import (
+	JsonFileExporter,
+	configure_tracing,
+	shutdown_tracing,
+)
+from src.core.webhook import run_webhook
 from src.di.container import get_container
+from src.models.user import User
+from src.schemas.dataclasses import UserSnapshotDTO
+from src.services.broadcast import Broadcaster
 from src.services.logger import get_logger
 
 
-async def main() -> None:
-	logger = get_logger()
-
-	bot = Bot(token=cfg.bot.token)
+def build_dispatcher() -> Dispatcher:
+	"""Dispatcher с подключёнными роутерами, без middleware и инфраструктуры."""
 	dp = Dispatcher()
 
-	# Session factory для middleware
-	engine = create_engine()
-	session_factory = create_session_factory(engine)
-
-	# Middleware
-	dp.update.outer_middleware(LoggingMiddleware())
-	dp.update.outer_middleware(UserMiddleware(session_factory))
-
 	# Error handler
 	dp.include_router(error_router)
 
@@ -31,19 +76,225 @@ async def main() -> None:
 	from src.bot.handlers import router
 	dp.include_router(router)
 
-	# DI
+	return dp
+
+
+@asynccontextmanager
+async def create_app(
+	shard: int | None = None,
+	shards: int = 1,
+) -> AsyncIterator[tuple[Bot, Dispatcher]]:
+	"""
+	Собирает бота со всей инфраструктурой: engine, кеши, middleware, DI.
+	Ресурсы освобождаются при выходе из контекста.
+
+	:param shard: номер воркера в многопроцессном режиме (для порта метрик)
+	:param shards: число воркеров — общий лимит отправок делится между ними
+	"""
+	logger = get_logger()
+
+	# Трейсинг включается до создания engine и клиентов, которые он оборачивает
+	if cfg.tracing.enabled:
+		path = Path(cfg.tracing.path)
+		if shard is not None:
+			path = path.with_name(f"{path.stem}.{shard}{path.suffix}")
+		configure_tracing(
+			JsonFileExporter(path),
+			sample_rate=cfg.tracing.sample_rate,
+			max_spans=cfg.tracing.max_spans,
+		)
+
+	bot = Bot(token=cfg.bot.token)
+	dp = build_dispatcher()
+
+	# Участок трейса на запрос к Bot API, включая ожидание в очереди отправки
+	if cfg.tracing.enabled:
+		bot.session.middleware(TracingRequestMiddleware())
+
+	# Очередь исходящих сообщений с лимитами Telegram. Лимиты чатов не
+	# делятся: чат целиком обрабатывает один воркер
+	throttling: ThrottlingRequestMiddleware | None = None
+	if cfg.throttling.enabled:
+		throttling = ThrottlingRequestMiddleware(
+			ChatRateLimiter(
+				private_rate=cfg.throttling.private_rate,
+				group_rate=cfg.throttling.group_rate,
+				burst=cfg.throttling.chat_burst,
+			),
+			PriorityRateLimiter(
+				rate=cfg.throttling.global_rate / shards,
+				burst=max(cfg.throttling.global_burst // shards, 1),
+			),
+			max_retries=cfg.throttling.max_retries,
+		)
+		bot.session.middleware(throttling)
+
+	# DI: единственные engine и session factory процесса
 	container = get_container()
-	setup_dishka(container=container, router=dp)
+	engine = await container.get(AsyncEngine)
+	session_factory = await container.get(async_sessionmaker[AsyncSession])
 
-	logger.info("Bot starting...")
+	# Автотюнинг размера пула
+	autotuner: PoolAutotuner | None = None
+	if cfg.database.autotune:
+		if resize_supported():
+			autotuner = create_pool_autotuner(engine)
+			autotuner.start()
+		else:
+			logger.warning(
+				"DB pool autotune disabled: pool resize is not supported by this SQLAlchemy",
+				sqlalchemy_version=sqlalchemy.__version__,
+			)
 
-	try:
-		await dp.start_polling(
+	# Шаблоны доступа запросов для tools/index_advisor.py
+	index_usage: IndexUsageRecorder | None = None
+	if cfg.index_advisor.enabled:
+		path = Path(cfg.index_advisor.path)
+		if shard is not None:
+			path = path.with_name(f"{path.stem}.{shard}{path.suffix}")
+		index_usage = IndexUsageRecorder(
+			path,
+			window=cfg.index_advisor.window,
+			max_patterns=cfg.index_advisor.max_patterns,
+			explain_samples=cfg.index_advisor.explain_samples,
+		)
+		index_usage.install(session_factory.class_.sync_session_class)
+		index_usage.start()
+
+	# Write-behind очередь профилей пользователей
+	upsert_buffer: UpsertBuffer | None = None
+	if cfg.users.write_behind:
+		upsert_buffer = UpsertBuffer(
+			session_factory,
+			User,
+			index_elements=USER_CONFLICT_COLUMNS,
+			update_columns=USER_UPDATE_COLUMNS,
+			flush_interval=cfg.users.write_behind_flush_interval,
+			max_batch_size=cfg.users.write_behind_batch_size,
+			max_pending=cfg.users.write_behind_max_pending,
+		)
+		upsert_buffer.start()
+		if cfg.users.cache_size <= 0:
+			logger.warning("Write-behind without user cache still reads every user from DB")
+
+	# Кеш снимков пользователей
+	user_cache: LRUCache[int, UserSnapshotDTO] | None = None
+	if cfg.users.cache_size > 0:
+		user_cache = LRUCache(cfg.users.cache_size, cfg.users.cache_ttl)
+
+	# Планировщик: лимит конкурентности и порядок внутри чата
+	scheduler: KeyedScheduler | None = None
+	if cfg.scheduler.enabled:
+		scheduler = KeyedScheduler(cfg.scheduler.max_concurrency)
+		dp.update.outer_middleware(SchedulerMiddleware(scheduler))
+
+	# Middleware
+	dp.update.outer_middleware(UpdateMetricsMiddleware())
+	dp.update.outer_middleware(LoggingMiddleware())
+	if cfg.n_plus_one.enabled:
+		dp.update.outer_middleware(
+			QueryCounterMiddleware(
+				cfg.n_plus_one.threshold,
+				cfg.n_plus_one.raise_errors,
+			),
+		)
+
+	# DI: один REQUEST-scope (и одна сессия) на update
+	if cfg.tracing.enabled:
+		setup_dishka_tracing(container=container, router=dp)
+	else:
+		setup_dishka_per_update(container=container, router=dp)
+
+	dp.update.outer_middleware(UserMiddleware(upsert_buffer, user_cache))
+
+	handler_metrics = HandlerMetricsMiddleware()
+	handler_tracing = HandlerTracingMiddleware() if cfg.tracing.enabled else None
+	handler_queries = (
+		HandlerQueryCounterMiddleware() if cfg.n_plus_one.enabled else None
+	)
+	for name, observer in dp.observers.items():
+		if name not in ("update", "error"):
+			observer.middleware(handler_metrics)
+			if handler_tracing is not None:
+				observer.middleware(handler_tracing)
+			if handler_queries is not None:
+				observer.middleware(handler_queries)
+
+	# Рассылки: доступны хендлерам как `broadcaster`
+	broadcaster: Broadcaster | None = None
+	if cfg.broadcast.enabled:
+		broadcaster = Broadcaster(
 			bot,
-			drop_pending_updates=cfg.bot.drop_pending_updates,
+			session_factory,
+			await container.get(Redis),
+			rate=cfg.broadcast.rate,
+			chunk_size=cfg.broadcast.chunk_size,
+			concurrency=cfg.broadcast.concurrency,
+			lease_ttl=cfg.broadcast.lease_ttl,
 		)
+		dp["broadcaster"] = broadcaster
+		try:
+			await broadcaster.resume()
+		except Exception as exc:
+			logger.error("Failed to resume broadcasts", error=str(exc))
+
+	# Prometheus-эндпоинт
+	metrics_server: MetricsServer | None = None
+	if cfg.metrics.enabled:
+		port = cfg.metrics.port if shard is None else cfg.metrics.port + 1 + shard
+		json_endpoints = {}
+		if cfg.query_stats.enabled:
+			json_endpoints["/debug/queries"] = lambda: [
+				asdict(stat) for stat in query_stats.top(cfg.query_stats.top_n)
+			]
+		metrics_server = MetricsServer(
+			cfg.metrics.host,
+			port,
+			json_endpoints=json_endpoints,
+		)
+		await metrics_server.start()
+
+	try:
+		yield bot, dp
 	finally:
+		if metrics_server is not None:
+			await metrics_server.close()
+		if broadcaster is not None:
+			await broadcaster.close()
+		if upsert_buffer is not None:
+			await upsert_buffer.close()
+		if autotuner is not None:
+			await autotuner.close()
+		if index_usage is not None:
+			await index_usage.close()
 		await container.close()
-		await engine.dispose()
 		await bot.session.close()
-		logger.info("Bot stopped.")
+		shutdown_tracing()
+		if user_cache is not None:
+			logger.info("User cache stats", **asdict(user_cache.stats()))
+		if scheduler is not None:
+			logger.info("Scheduler stats", **asdict(scheduler.stats()))
+		if throttling is not None:
+			logger.info("Send queue stats", **asdict(throttling.stats()))
+		if autotuner is not None:
+			logger.info("DB pool autotune stats", **asdict(autotuner.stats()))
+		logger.info("DB session usage", **asdict(session_usage_stats()))
+		if cfg.query_stats.enabled:
+			query_stats.log_top(cfg.query_stats.top_n)
+
+
+async def main() -> None:
+	logger = get_logger()
+
+	async with create_app() as (bot, dp):
+		logger.info("Bot starting...", mode=cfg.bot.mode)
+
+		if cfg.bot.mode == "webhook":
+			await run_webhook(dp, bot)
+		else:
+			await dp.start_polling(
+				bot,
+				drop_pending_updates=cfg.bot.drop_pending_updates,
+			)
+
+	logger.info("Bot stopped.")
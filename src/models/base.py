@@ -7,15 +7,23 @@ from sqlalchemy import (
 	Index,
 	PrimaryKeyConstraint,
 	UniqueConstraint,
+	and_,
+	text,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 from sqlalchemy.schema import Constraint
 
+from src.models.mixins import SoftDeleteMixin
 from src.schemas.dataclasses import ConstraintInfoDTO, IndexInfoDTO
 
 T = TypeVar("T", bound="Base")
 
+# Флаг в `Index(..., info={SOFT_DELETE_PARTIAL: True})`: индекс модели
+# с SoftDeleteMixin строится только по живым строкам (partial index)
+SOFT_DELETE_PARTIAL = "soft_delete_partial"
+ACTIVE_ROWS_CLAUSE = text("deleted_at IS NULL")
+
 
 class Base(DeclarativeBase):
 	TABLE_NAME: ClassVar[str]
@@ -33,9 +41,11 @@ class Base(DeclarativeBase):
 		return cls.__name__.lower()
 
 	def __init_subclass__(cls, **kwargs: Any) -> None:
-		"""Автоматически собирает индексы и constraints при создании подкласса."""
-		super().__init_subclass__(**kwargs)
-
+		"""
+		Автоматически собирает индексы и constraints при создании подкласса.
+		Атрибуты таблицы готовятся до маппинга: declarative читает
+		`__tablename__` и `__table_args__` в `super().__init_subclass__`.
+		"""
 		if (
 			"TABLE_NAME" in cls.__dict__
 			and isinstance(cls.__dict__["TABLE_NAME"], str)
@@ -54,6 +64,11 @@ class Base(DeclarativeBase):
 			else:
 				cls.TABLE_NAME = cls.__name__.lower()
 
+		cls._collect_table_args()
+		super().__init_subclass__(**kwargs)
+
+	@classmethod
+	def _collect_table_args(cls) -> None:
 		def _make_index_elements(index: Index) -> Callable[[], list[str]]:
 			def index_elements() -> list[str]:
 				return [
@@ -75,6 +90,8 @@ class Base(DeclarativeBase):
 			):
 				if name.endswith("_INDEX") and isinstance(attr, Index):
 					attr.index_elements = _make_index_elements(attr)
+					if attr.info.get(SOFT_DELETE_PARTIAL):
+						cls._make_partial(name, attr)
 				collected_items.append(attr)
 
 		# Если нет автоматических элементов, ничего не делаем
@@ -104,6 +121,24 @@ class Base(DeclarativeBase):
 		elif all_items:
 			cls.__table_args__ = tuple(all_items)
 
+	@classmethod
+	def _make_partial(cls, name: str, index: Index) -> None:
+		"""Ограничивает индекс живыми строками: `WHERE deleted_at IS NULL`."""
+		if not issubclass(cls, SoftDeleteMixin):
+			raise TypeError(
+				f"{cls.__name__}.{name}: {SOFT_DELETE_PARTIAL} работает только "
+				"для моделей с SoftDeleteMixin",
+			)
+
+		where = index.dialect_options["postgresql"]["where"]
+		if where is None:
+			where = ACTIVE_ROWS_CLAUSE
+		elif where is not ACTIVE_ROWS_CLAUSE:
+			if isinstance(where, str):
+				where = text(where)
+			where = and_(where, ACTIVE_ROWS_CLAUSE)
+		index.dialect_kwargs["postgresql_where"] = where
+
 	@classmethod
 	def get_indexes(cls) -> dict[str, IndexInfoDTO]:
 		"""Возвращает информацию о всех индексах класса."""
@@ -1,7 +1,8 @@
+from collections.abc import Iterable
 from datetime import UTC, datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import ColumnElement, DateTime, func, inspect, select, update
 from sqlalchemy.orm import (
 	Mapped,
 	mapped_column,
@@ -39,16 +40,133 @@ class SoftDeleteMixin:
 	)
 
 	async def soft_delete(self, session: "AsyncSession") -> None:
-		"""Мягкое удаление записи (установка deleted_at)."""
+		"""
+		Мягкое удаление записи (установка deleted_at).
+		Коммит делает вызывающий код (unit of work запроса).
+		"""
 		self.deleted_at = datetime.now(UTC)
 		session.add(self)
-		await session.commit()
+		await session.flush()
 
 	async def restore(self, session: "AsyncSession") -> None:
-		"""Восстановление мягко удаленной записи."""
+		"""
+		Восстановление мягко удаленной записи.
+		Коммит делает вызывающий код (unit of work запроса).
+		"""
 		self.deleted_at = None
 		session.add(self)
-		await session.commit()
+		await session.flush()
+
+	@classmethod
+	async def soft_delete_many(
+		cls,
+		session: "AsyncSession",
+		*criteria: ColumnElement[bool],
+		ids: Iterable[Any] | None = None,
+		chunk_size: int | None = None,
+	) -> list[Any]:
+		"""
+		Мягкое удаление набора записей одним `UPDATE ... SET deleted_at = ...`
+		на чанк. Уже удалённые записи не трогаются. Коммит делает вызывающий код.
+
+		Время вычисляется один раз на вызов на стороне Python, как в
+		`soft_delete`: так SQLAlchemy обновляет объекты, уже загруженные
+		в сессию, без отложенной догрузки атрибута.
+
+		Пример:
+			ids = await Order.soft_delete_many(session, Order.user_id == user_id)
+
+		:param criteria: условия WHERE
+		:param ids: значения первичного ключа (вместо или вместе с criteria)
+		:param chunk_size: максимум строк на один UPDATE; None — одним запросом
+		:return: первичные ключи изменённых записей
+		"""
+		return await cls._set_deleted_at(
+			session,
+			datetime.now(UTC),
+			cls.deleted_at.is_(None),
+			criteria,
+			ids,
+			chunk_size,
+		)
+
+	@classmethod
+	async def restore_many(
+		cls,
+		session: "AsyncSession",
+		*criteria: ColumnElement[bool],
+		ids: Iterable[Any] | None = None,
+		chunk_size: int | None = None,
+	) -> list[Any]:
+		"""
+		Восстановление набора мягко удалённых записей, аналог `soft_delete_many`.
+
+		:return: первичные ключи восстановленных записей
+		"""
+		return await cls._set_deleted_at(
+			session,
+			None,
+			cls.deleted_at.is_not(None),
+			criteria,
+			ids,
+			chunk_size,
+		)
+
+	@classmethod
+	async def _set_deleted_at(
+		cls,
+		session: "AsyncSession",
+		value: Any,  # noqa: ANN401
+		state: ColumnElement[bool],
+		criteria: tuple[ColumnElement[bool], ...],
+		ids: Iterable[Any] | None,
+		chunk_size: int | None,
+	) -> list[Any]:
+		if ids is None and not criteria:
+			raise ValueError(
+				"Нужны criteria или ids; для всей таблицы передайте `true()` явно",
+			)
+		if chunk_size is not None and chunk_size <= 0:
+			raise ValueError(f"chunk_size должен быть положительным, получено {chunk_size}")
+
+		primary_key = inspect(cls).primary_key
+		if len(primary_key) != 1:
+			raise TypeError(f"{cls.__name__}: нужен первичный ключ из одной колонки")
+		pk = primary_key[0]
+
+		def build(*where: ColumnElement[bool]) -> Any:  # noqa: ANN401
+			return (
+				update(cls)
+				.where(state, *criteria, *where)
+				.values(deleted_at=value)
+				.returning(pk)
+			)
+
+		affected: list[Any] = []
+
+		if ids is not None:
+			ids = list(ids)
+			if not ids:
+				return affected
+			size = chunk_size or len(ids)
+			for start in range(0, len(ids), size):
+				result = await session.execute(build(pk.in_(ids[start:start + size])))
+				affected.extend(result.scalars())
+			return affected
+
+		if chunk_size is None:
+			result = await session.execute(build())
+			return list(result.scalars())
+
+		# Без LIMIT в UPDATE: каждый чанк выбирает следующие строки подзапросом,
+		# изменённые в него уже не попадают из-за условия на deleted_at
+		while True:
+			chunk = select(pk).where(state, *criteria).limit(chunk_size)
+			result = await session.execute(build(pk.in_(chunk.scalar_subquery())))
+			rows = list(result.scalars())
+			affected.extend(rows)
+			if len(rows) < chunk_size:
+				return affected
 
 	@property
 	def is_deleted(self) -> bool:
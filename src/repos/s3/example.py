@@ -6,9 +6,21 @@ from .interfaces import AbstractS3Repository
 class PhotoRepository(AbstractS3Repository):
 	"""Реализация репозитория фотографий на S3."""
 
-	def __init__(self, s3_client: Any, bucket: str) -> None:
+	def __init__(
+		self,
+		s3_client: Any,
+		bucket: str,
+		presign_client: Any = None,
+	) -> None:
+		"""
+		:param s3_client: клиент для запросов к хранилищу
+		:param bucket: имя бакета
+		:param presign_client: клиент с внешним адресом для presigned-ссылок
+			(по умолчанию `s3_client`)
+		"""
 		self.client = s3_client
 		self.bucket = bucket
+		self.presign_client = presign_client or s3_client
 
 	async def upload_file(
 		self,
@@ -53,7 +65,7 @@ class PhotoRepository(AbstractS3Repository):
 		file_id: str,
 		expires_in: int = 3600,
 	) -> str:
-		return await self.client.generate_presigned_url(
+		return await self.presign_client.generate_presigned_url(
 			ClientMethod="get_object",
 			Params={"Bucket": self.bucket, "Key": file_id},
 			ExpiresIn=expires_in,
@@ -0,0 +1,327 @@
+from collections.abc import AsyncIterator, Iterable, Sequence
+from typing import Any
+
+from sqlalchemy import (
+	ColumnElement,
+	Select,
+	insert,
+	inspect,
+	select,
+	update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.util import identity_key
+
+from src.core.db import build_upsert
+from src.core.db.loader import ModelLoaders, can_batch, match_any
+from src.core.db.pagination import (
+	OrderKey,
+	decode_cursor,
+	encode_cursor,
+	estimate_count,
+	exact_count,
+	keyset_predicate,
+	normalize_order,
+	order_clauses,
+)
+from src.core.db.routing import dialect_name
+from src.models.mixins import SoftDeleteMixin
+from src.schemas.dataclasses import (
+	CursorPaginatedDTO,
+	CursorPaginationDTO,
+	PaginatedDTO,
+	PaginationDTO,
+)
+from src.schemas.enums import TotalMode
+
+from .interfaces import AbstractBaseRepository, ModelT
+
+# Лимит bind-параметров одного запроса в asyncpg — 32767
+MAX_BIND_PARAMS = 32000
+
+
+class SQLAlchemyRepository(AbstractBaseRepository[ModelT]):
+	"""
+	Базовый SQL репозиторий: CRUD из интерфейса и пакетные операции
+	одним запросом на пачку строк.
+
+	Репозиторий не коммитит: транзакцию открывает и закрывает сессия
+	запроса (`RepositoryProvider.get_session`).
+
+	С `loaders` одновременные `get_by_id` из разных сессий склеиваются
+	в один запрос (см. `ModelLoaders`).
+
+	Пример:
+		class OrderRepository(SQLAlchemyRepository[Order]):
+			model = Order
+	"""
+
+	model: type[ModelT]
+
+	def __init__(
+		self,
+		session: AsyncSession,
+		model: type[ModelT] | None = None,
+		loaders: ModelLoaders | None = None,
+	) -> None:
+		self.session = session
+		self.loaders = loaders
+		if model is not None:
+			self.model = model
+
+		mapper = inspect(self.model)
+		if len(mapper.primary_key) != 1:
+			raise TypeError(
+				f"{self.model.__name__}: нужен первичный ключ из одной колонки",
+			)
+		self._pk = mapper.primary_key[0]
+		self._pk_attr = mapper.get_property_by_column(self._pk).key
+		self._pk_key = getattr(self.model, self._pk_attr)
+
+	# ========== CRUD ==========
+	async def get_by_id(self, id: Any) -> ModelT | None:  # noqa: A002, ANN401
+		if (
+			self.loaders is None
+			or not can_batch(self.session)
+			or identity_key(self.model, id) in self.session.identity_map
+		):
+			return await self.session.get(self.model, id)
+
+		instance = await self.loaders.get(self.model).load(id)
+		if instance is None:
+			return None
+		return await self.session.merge(instance, load=False)
+
+	async def get_all(
+		self,
+		limit: int = 100,
+		offset: int = 0,
+	) -> list[ModelT]:
+		result = await self.session.scalars(
+			select(self.model).order_by(self._pk).limit(limit).offset(offset),
+		)
+		return list(result.all())
+
+	async def create(self, **kwargs: Any) -> ModelT:  # noqa: ANN401
+		instance = self.model(**kwargs)
+		self.session.add(instance)
+		await self.session.flush()
+		return instance
+
+	async def update(self, instance: ModelT, **kwargs: Any) -> ModelT:  # noqa: ANN401
+		for key, value in kwargs.items():
+			setattr(instance, key, value)
+		await self.session.flush()
+		return instance
+
+	async def delete(self, instance: ModelT) -> None:
+		"""Удаляет запись; модели с SoftDeleteMixin удаляются мягко."""
+		if isinstance(instance, SoftDeleteMixin):
+			await instance.soft_delete(self.session)
+			return
+		await self.session.delete(instance)
+		await self.session.flush()
+
+	# ========== Пакетные операции ==========
+	async def create_many(self, rows: Sequence[dict[str, Any]]) -> list[ModelT]:
+		"""
+		Вставляет строки multi-row `INSERT ... RETURNING` (SQLAlchemy сам
+		режет их на запросы по `insertmanyvalues_page_size`).
+
+		:param rows: строки (атрибут → значение), у всех одинаковый набор ключей
+		:return: созданные объекты в порядке `rows`
+		"""
+		if not rows:
+			return []
+		result = await self.session.scalars(
+			insert(self.model).returning(
+				self.model,
+				sort_by_parameter_order=True,
+			),
+			list(rows),
+		)
+		return list(result.all())
+
+	async def upsert_many(
+		self,
+		rows: Sequence[dict[str, Any]],
+		index_elements: Sequence[str],
+		update_columns: Sequence[str],
+		only_changed: bool = True,
+	) -> list[ModelT]:
+		"""
+		`INSERT ... ON CONFLICT DO UPDATE ... RETURNING` пачками
+		в пределах лимита bind-параметров. Только PostgreSQL.
+
+		:param index_elements: колонки уникального ключа конфликта
+		:param update_columns: колонки, обновляемые при конфликте
+		:param only_changed: не трогать строки без изменений; такие строки
+			не попадают и в результат
+		:return: вставленные и обновлённые объекты
+		"""
+		if not rows:
+			return []
+
+		chunk_size = max(1, MAX_BIND_PARAMS // len(rows[0]))
+		instances: list[ModelT] = []
+		for start in range(0, len(rows), chunk_size):
+			stmt = build_upsert(
+				self.model,
+				rows[start:start + chunk_size],
+				index_elements,
+				update_columns,
+				only_changed=only_changed,
+			).returning(self.model)
+			result = await self.session.scalars(
+				stmt,
+				execution_options={"populate_existing": True},
+			)
+			instances.extend(result.all())
+		return instances
+
+	async def update_many(self, rows: Sequence[dict[str, Any]]) -> None:
+		"""
+		Обновляет строки по первичному ключу одним executemany.
+		В каждой строке должен быть первичный ключ; остальные ключи —
+		обновляемые атрибуты.
+		"""
+		if not rows:
+			return
+		await self.session.execute(update(self.model), list(rows))
+
+	async def get_many_by_ids(self, ids: Iterable[Any]) -> list[ModelT]:
+		"""
+		Загружает записи одним запросом: `= ANY(:ids)` на PostgreSQL
+		(один и тот же prepared statement для любого числа id),
+		`IN (...)` на остальных СУБД.
+
+		:return: найденные записи в порядке `ids`, без повторов
+		"""
+		ids = list(dict.fromkeys(ids))
+		if not ids:
+			return []
+
+		criteria = match_any(self._pk, ids, dialect_name(self.session))
+		result = await self.session.scalars(select(self.model).where(criteria))
+		found = {getattr(instance, self._pk_attr): instance for instance in result}
+		return [found[id_] for id_ in ids if id_ in found]
+
+	async def stream(
+		self,
+		*criteria: ColumnElement[bool],
+		chunk_size: int = 1000,
+	) -> AsyncIterator[list[ModelT]]:
+		"""
+		Читает записи серверным курсором и отдаёт их пачками по `chunk_size`,
+		не загружая всю выборку в память. Порядок — по первичному ключу.
+
+		Загруженные объекты остаются в сессии; при обходе больших таблиц
+		освобождайте их через `session.expunge_all()` после обработки пачки.
+
+		Пример:
+			async for users in repo.stream(User.username.is_not(None)):
+				...
+		"""
+		stmt = (
+			select(self.model)
+			.where(*criteria)
+			.order_by(self._pk)
+			.execution_options(yield_per=chunk_size)
+		)
+		result = await self.session.stream_scalars(stmt)
+		try:
+			async for chunk in result.partitions(chunk_size):
+				yield list(chunk)
+		finally:
+			await result.close()
+
+	# ========== Пагинация ==========
+	async def paginate(
+		self,
+		pagination: PaginationDTO,
+		*criteria: ColumnElement[bool],
+		order_by: Sequence[OrderKey] = (),
+		total: TotalMode = TotalMode.EXACT,
+	) -> PaginatedDTO[ModelT]:
+		"""
+		Страница limit/offset. Стоимость растёт с `offset` — для глубоких
+		страниц и лент используйте `paginate_keyset`.
+
+		:param order_by: атрибуты или пары (атрибут, SortOrder);
+			первичный ключ добавляется в конец для стабильного порядка
+		:param total: EXACT — COUNT(*), ESTIMATE — оценка по статистике,
+			NONE — не считать (`total` = -1)
+		"""
+		keys = normalize_order(order_by, self._pk_key)
+		stmt = select(self.model).where(*criteria)
+		result = await self.session.scalars(
+			stmt.order_by(*order_clauses(keys))
+			.limit(pagination.limit)
+			.offset(pagination.offset),
+		)
+		count, is_estimate = await self._count(stmt, total)
+		return PaginatedDTO(
+			items=list(result.all()),
+			total=-1 if count is None else count,
+			limit=pagination.limit,
+			offset=pagination.offset,
+			total_is_estimate=is_estimate,
+		)
+
+	async def paginate_keyset(
+		self,
+		pagination: CursorPaginationDTO,
+		*criteria: ColumnElement[bool],
+		order_by: Sequence[OrderKey] = (),
+		total: TotalMode = TotalMode.NONE,
+	) -> CursorPaginatedDTO[ModelT]:
+		"""
+		Страница keyset-пагинации: вместо OFFSET — условие «после последней
+		записи предыдущей страницы», поэтому любая страница стоит как первая
+		(при индексе под `order_by`).
+
+		Ключи сортировки должны быть NOT NULL. Курсор привязан к `order_by`:
+		курсор от другой сортировки отклоняется.
+
+		:param order_by: атрибуты или пары (атрибут, SortOrder);
+			первичный ключ добавляется в конец для стабильного порядка
+		:param total: по умолчанию не считается; ESTIMATE — дешёвая оценка
+		:raises ValueError: некорректный курсор
+		"""
+		keys = normalize_order(order_by, self._pk_key)
+		stmt = select(self.model).where(*criteria)
+		page_stmt = stmt
+		if pagination.cursor is not None:
+			values = decode_cursor(keys, pagination.cursor)
+			page_stmt = stmt.where(keyset_predicate(keys, values))
+
+		# +1 строка показывает, есть ли следующая страница
+		result = await self.session.scalars(
+			page_stmt.order_by(*order_clauses(keys)).limit(pagination.limit + 1),
+		)
+		items = list(result.all())
+		next_cursor = None
+		if len(items) > pagination.limit:
+			items = items[:pagination.limit]
+			next_cursor = encode_cursor(keys, items[-1])
+
+		count, is_estimate = await self._count(stmt, total)
+		return CursorPaginatedDTO(
+			items=items,
+			limit=pagination.limit,
+			next_cursor=next_cursor,
+			total=count,
+			total_is_estimate=is_estimate,
+		)
+
+	async def _count(
+		self,
+		stmt: Select[Any],
+		total: TotalMode,
+	) -> tuple[int | None, bool]:
+		match total:
+			case TotalMode.EXACT:
+				return await exact_count(self.session, stmt), False
+			case TotalMode.ESTIMATE:
+				return await estimate_count(self.session, stmt)
+		return None, False
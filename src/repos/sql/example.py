@@ -1,19 +1,16 @@
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models.base import Base
-from .interfaces import AbstractBaseRepository, ModelT
+from src.models.user import User
+from .base import SQLAlchemyRepository
 
 
-class ExampleSQLRepository(AbstractBaseRepository[Base]):
+class ExampleSQLRepository(SQLAlchemyRepository[User]):
 	"""
 	Пример SQL репозитория для работы с БД.
-	Наследуется от BaseRepository для базовых CRUD операций.
+	Наследуется от SQLAlchemyRepository для CRUD и пакетных операций.
 	"""
 
-	def __init__(self, session: AsyncSession, model: type[ModelT]) -> None:
-		self.session = session
-		self.model = model
+	model = User
 
 	async def get_by_telegram_id(self, telegram_id: int) -> User | None:
 		"""
@@ -22,10 +19,8 @@ class ExampleSQLRepository(AbstractBaseRepository[Base]):
 		:param telegram_id: ID пользователя в Telegram
 		:return: User или None
 		"""
-		result = await self.session.execute(
-			select(Base).where(Base.telegram_id == telegram_id),
-		)
-		return result.scalar_one_or_none()
+		# telegram_id — первичный ключ: identity map и пакетная загрузка
+		return await self.get_by_id(telegram_id)
 
 	async def exists_by_username(self, username: str) -> bool:
 		"""
@@ -35,6 +30,6 @@ class ExampleSQLRepository(AbstractBaseRepository[Base]):
 		:return: True если существует
 		"""
 		result = await self.session.execute(
-			select(Base.id).where(Base.username == username),
+			select(User.telegram_id).where(User.username == username).limit(1),
 		)
 		return result.scalar_one_or_none() is not None
@@ -1,9 +1,56 @@
-from .common import PaginationDTO, PaginatedDTO
-from .model_info import IndexInfoDTO, ConstraintInfoDTO
+from .broadcast import BroadcastProgressDTO
+from .common import (
+	CacheStatsDTO,
+	CursorPaginatedDTO,
+	CursorPaginationDTO,
+	PaginatedDTO,
+	PaginationDTO,
+)
+from .db import (
+	BackfillResultDTO,
+	NPlusOneDTO,
+	PoolAutotunerStatsDTO,
+	QueryStatDTO,
+	SessionUsageStatsDTO,
+)
+from .model_info import (
+	AccessPatternDTO,
+	ConstraintInfoDTO,
+	IndexDefDTO,
+	IndexInfoDTO,
+	IndexReportDTO,
+	MissingIndexDTO,
+	RedundantIndexDTO,
+)
+from .scheduling import SchedulerStatsDTO
+from .sharding import WorkerStatsDTO
+from .throttling import SendQueueStatsDTO
+from .tracing import SpanDTO, TraceDTO
+from .user import UserSnapshotDTO
 
 __all__ = [
 	"PaginationDTO",
 	"PaginatedDTO",
+	"CursorPaginationDTO",
+	"CursorPaginatedDTO",
+	"CacheStatsDTO",
 	"IndexInfoDTO",
 	"ConstraintInfoDTO",
-]
\ No newline at end of file
+	"AccessPatternDTO",
+	"IndexDefDTO",
+	"MissingIndexDTO",
+	"RedundantIndexDTO",
+	"IndexReportDTO",
+	"UserSnapshotDTO",
+	"WorkerStatsDTO",
+	"SchedulerStatsDTO",
+	"SendQueueStatsDTO",
+	"BroadcastProgressDTO",
+	"PoolAutotunerStatsDTO",
+	"SessionUsageStatsDTO",
+	"QueryStatDTO",
+	"NPlusOneDTO",
+	"BackfillResultDTO",
+	"SpanDTO",
+	"TraceDTO",
+]
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class BroadcastProgressDTO:
+	"""DTO с прогрессом рассылки; хранится в Redis и переживает перезапуск."""
+
+	broadcast_id: str
+	status: str
+	cursor: int
+	delivered: int
+	blocked: int
+	failed: int
+	started_at: float
+	finished_at: float | None = None
+
+	@property
+	def processed(self) -> int:
+		return self.delivered + self.blocked + self.failed
@@ -13,9 +13,55 @@ class PaginationDTO:
 
 @dataclass(slots=True)
 class PaginatedDTO[T]:
-	"""Generic DTO для пагинированного ответа."""
+	"""
+	Generic DTO для пагинированного ответа.
+	`total_is_estimate` — `total` взят из статистики планировщика, а не из COUNT(*).
+	"""
 
 	items: list[T]
 	total: int
 	limit: int
 	offset: int
+	total_is_estimate: bool = False
+
+
+@dataclass(slots=True)
+class CursorPaginationDTO:
+	"""
+	DTO для параметров keyset-пагинации.
+	`cursor` — `next_cursor` предыдущей страницы, `None` для первой.
+	"""
+
+	limit: int
+	cursor: str | None = None
+
+
+@dataclass(slots=True)
+class CursorPaginatedDTO[T]:
+	"""
+	Generic DTO для страницы keyset-пагинации.
+	`next_cursor` — `None` на последней странице; `total` — `None`, если не считался.
+	"""
+
+	items: list[T]
+	limit: int
+	next_cursor: str | None = None
+	total: int | None = None
+	total_is_estimate: bool = False
+
+
+@dataclass(slots=True)
+class CacheStatsDTO:
+	"""DTO со счётчиками in-process кеша."""
+
+	hits: int
+	misses: int
+	evictions: int
+	expirations: int
+	size: int
+	maxsize: int
+
+	@property
+	def hit_ratio(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class PoolAutotunerStatsDTO:
+	"""
+	DTO с состоянием автотюнера пула: текущие границы, последнее решение
+	и счётчики окна, на основании которых оно принято.
+	"""
+
+	pool_size: int
+	min_size: int
+	max_size: int
+	max_overflow: int
+	checked_out: int
+	resizes: int
+	last_decision: str
+	last_reason: str
+	wait_avg: float
+	wait_max: float
+	timeouts: int
+	peak_checked_out: int
+	peak_overflow: int
+
+
+@dataclass(slots=True)
+class SessionUsageStatsDTO:
+	"""DTO с исходами сессий запросов: сколько не обращались к БД, только читали, писали."""
+
+	untouched: int
+	read_only: int
+	write: int
+	error: int
+
+	@property
+	def untouched_ratio(self) -> float:
+		total = self.untouched + self.read_only + self.write + self.error
+		return self.untouched / total if total else 0.0
+
+
+@dataclass(slots=True)
+class QueryStatDTO:
+	"""DTO со статистикой одного отпечатка SQL-запроса; время в секундах."""
+
+	fingerprint: str
+	count: int
+	total: float
+	avg: float
+	p50: float
+	p95: float
+	max: float
+	rows: int
+
+
+@dataclass(slots=True)
+class NPlusOneDTO:
+	"""DTO повторяющегося запроса, найденного детектором N+1."""
+
+	fingerprint: str
+	kind: str
+	count: int
+	call_site: str
+	handler: str | None
+
+
+@dataclass(slots=True)
+class BackfillResultDTO:
+	"""
+	DTO с итогом пакетного заполнения: `rows` и время — за этот запуск,
+	`skipped` — backfill с этим именем уже был завершён.
+	"""
+
+	name: str
+	table: str
+	rows: int
+	chunks: int
+	elapsed: float
+	last_key: str | None
+	skipped: bool
+	resumed_from: str | None
+
+	@property
+	def rows_per_second(self) -> float:
+		return self.rows / self.elapsed if self.elapsed else 0.0
@@ -28,3 +28,52 @@ class ConstraintInfoDTO:
 	sqltext: str | None = None
 	columns: list[str] | None = None
 	referred_table: str | None = None
+
+
+@dataclass
+class AccessPatternDTO:
+	"""Шаблон доступа к таблице: колонки условий `=`/диапазона и сортировки."""
+
+	table: str
+	equality: list[str]
+	range: list[str]
+	order: list[str]
+	count: int = 0
+	sample_sql: str | None = None
+
+
+@dataclass
+class IndexDefDTO:
+	"""Индекс таблицы: объявленный в модели или найденный в БД."""
+
+	table: str
+	name: str
+	columns: list[str]
+	unique: bool = False
+	partial: bool = False
+	source: str = "db"
+	scans: int | None = None
+
+
+@dataclass
+class MissingIndexDTO:
+	pattern: AccessPatternDTO
+	suggested: list[str]
+	plan: str | None = None
+
+
+@dataclass
+class RedundantIndexDTO:
+	index: IndexDefDTO
+	covered_by: IndexDefDTO
+
+
+@dataclass
+class IndexReportDTO:
+	"""Отчёт советника по индексам (`tools/index_advisor.py`)."""
+
+	missing: list[MissingIndexDTO]
+	unused: list[IndexDefDTO]
+	unobserved: list[IndexDefDTO]
+	redundant: list[RedundantIndexDTO]
+	queries: int
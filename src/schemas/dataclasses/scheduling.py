@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class SchedulerStatsDTO:
+	"""DTO со счётчиками планировщика update'ов."""
+
+	max_concurrency: int
+	running: int
+	waiting: int
+	keys: int
+	completed: int
+	max_waiting: int
+	max_key_depth: int
+	wait_avg: float
+	wait_max: float
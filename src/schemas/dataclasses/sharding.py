@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class WorkerStatsDTO:
+	"""Счётчики воркер-процесса; воркер присылает их супервизору."""
+
+	shard: int
+	pid: int
+	received: int = 0
+	processed: int = 0
+	failed: int = 0
+	in_flight: int = 0
+
+	def merge(self, other: WorkerStatsDTO) -> None:
+		"""Прибавляет счётчики другого снимка (in_flight — текущее значение)."""
+		self.received += other.received
+		self.processed += other.processed
+		self.failed += other.failed
+		self.in_flight += other.in_flight
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class SendQueueStatsDTO:
+	"""DTO со счётчиками очереди исходящих сообщений."""
+
+	sent: int
+	delayed: int
+	retries: int
+	waiting: int
+	wait_avg: float
+	wait_max: float
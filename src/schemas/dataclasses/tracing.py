@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(slots=True)
+class SpanDTO:
+	"""
+	DTO участка трейса. `start` — смещение от начала трейса (сек),
+	`duration` — None, если участок не успел закрыться до экспорта.
+	"""
+
+	span_id: int
+	parent_id: int | None
+	name: str
+	start: float
+	duration: float | None = None
+	attributes: dict[str, Any] = field(default_factory=dict)
+	error: str | None = None
+
+
+@dataclass(slots=True)
+class TraceDTO:
+	"""DTO трейса одного update'а: корневой участок и все вложенные."""
+
+	trace_id: str
+	name: str
+	timestamp: float
+	duration: float
+	spans: list[SpanDTO]
+	dropped_spans: int = 0
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(slots=True, frozen=True)
+class UserSnapshotDTO:
+	"""
+	Компактный снимок пользователя без ORM-состояния.
+	Кладётся в data["user"] вместо объекта User.
+	"""
+
+	telegram_id: int
+	username: str | None
+	first_name: str | None
+	created_at: datetime | None
+	updated_at: datetime | None
+
+	@property
+	def id(self) -> int:
+		return self.telegram_id
+
+	def matches(self, username: str | None, first_name: str | None) -> bool:
+		"""Совпадает ли профиль с актуальными данными из Telegram."""
+		return self.username == username and self.first_name == first_name
@@ -1,5 +1,6 @@
-from .common import SortOrder
+from .common import SortOrder, TotalMode
 
 __all__ = [
 	"SortOrder",
+	"TotalMode",
 ]
\ No newline at end of file
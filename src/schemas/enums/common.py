@@ -5,3 +5,13 @@ class SortOrder(StrEnum):
 	"""Enumerate-класс для хранения порядка сортировки."""
 	ASC = "asc"
 	DESC = "desc"
+
+
+class TotalMode(StrEnum):
+	"""
+	Как считать `total` у страницы пагинации.
+	ESTIMATE — оценка из `pg_class.reltuples` или `EXPLAIN`, без COUNT(*).
+	"""
+	EXACT = "exact"
+	ESTIMATE = "estimate"
+	NONE = "none"
@@ -1,6 +1,7 @@
-from .common import Paginated, BaseSchema
+from .common import CursorPaginated, Paginated, BaseSchema
 
 __all__ = [
 	"BaseSchema",
 	"Paginated",
+	"CursorPaginated",
 ]
\ No newline at end of file
@@ -36,6 +36,15 @@ class Paginated(BaseModel, Generic[T]):  # noqa: UP046
 	total: int
 	limit: int
 	offset: int
+	total_is_estimate: bool = False
+
+
+class CursorPaginated(BaseModel, Generic[T]):  # noqa: UP046
+	items: list[T]
+	limit: int
+	next_cursor: str | None = None
+	total: int | None = None
+	total_is_estimate: bool = False
 
 
 # class PaginationRequest(BaseSchema):
@@ -0,0 +1,330 @@
+import asyncio
+import os
+import socket
+import time
+import traceback
+from collections import Counter
+from contextlib import suppress
+from dataclasses import asdict
+from enum import StrEnum
+from uuid import uuid4
+
+from aiogram import Bot
+from aiogram.exceptions import (
+	TelegramAPIError,
+	TelegramForbiddenError,
+	TelegramRetryAfter,
+)
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.throttling import (
+	PriorityRateLimiter,
+	SendPriority,
+	send_priority,
+)
+from src.models.user import User
+from src.schemas.dataclasses import BroadcastProgressDTO
+from src.services.logger import get_logger
+
+logger = get_logger()
+
+BROADCAST_KEY = "broadcast:{broadcast_id}"
+BROADCAST_LOCK_KEY = "broadcast:{broadcast_id}:lock"
+ACTIVE_BROADCASTS_KEY = "broadcast:active"
+# Сколько раз повторять отправку после 429 (RetryAfter), прежде чем считать её неудачной
+MAX_SEND_RETRIES = 3
+
+# Продление и снятие lease только владельцем: GET и PEXPIRE/DEL атомарно
+EXTEND_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+	return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+	return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class BroadcastStatus(StrEnum):
+	RUNNING = "running"
+	DONE = "done"
+	CANCELLED = "cancelled"
+
+
+class Broadcaster:
+	"""
+	Рассылка сообщения всем пользователям из таблицы `users`.
+
+	Получатели читаются страницами по `telegram_id > cursor` (keyset),
+	каждая страница — отдельным коротким запросом, поэтому рассылка не
+	держит транзакцию и соединение пула. Страница отправляется
+	конкурентно, но не быстрее `rate` сообщений в секунду и с приоритетом
+	`BULK` — интерактивные ответы хендлеров идут впереди.
+
+	Прогресс и курсор пишутся в Redis после каждой страницы: после
+	перезапуска `resume()` продолжает с последней завершённой страницы
+	(недоотправленная страница может уйти повторно). Выполняет рассылку
+	тот процесс, который взял lease-блокировку в Redis; пока страница
+	отправляется, lease продлевается в фоне. На 429 отправка повторяется
+	после `retry_after` до `MAX_SEND_RETRIES` раз.
+	"""
+
+	def __init__(
+		self,
+		bot: Bot,
+		session_factory: async_sessionmaker[AsyncSession],
+		redis: Redis,
+		rate: float,
+		chunk_size: int = 200,
+		concurrency: int = 25,
+		lease_ttl: float = 60.0,
+	) -> None:
+		"""
+		:param rate: сообщений в секунду (держите ниже глобального лимита бота)
+		:param chunk_size: размер страницы получателей
+		:param concurrency: сколько отправок выполняется одновременно
+		:param lease_ttl: время жизни блокировки рассылки без продления (сек)
+		"""
+		self.bot = bot
+		self.session_factory = session_factory
+		self.redis = redis
+		self.chunk_size = chunk_size
+		self.concurrency = concurrency
+		self.lease_ttl = lease_ttl
+
+		self._limiter = PriorityRateLimiter(rate)
+		self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+		self._extend_lease = redis.register_script(EXTEND_LEASE_SCRIPT)
+		self._release_lease = redis.register_script(RELEASE_LEASE_SCRIPT)
+		self._tasks: dict[str, asyncio.Task[None]] = {}
+
+	# ========== Публичный API ==========
+	async def start(self, text: str, parse_mode: str | None = None) -> str:
+		"""Создаёт рассылку и запускает её в фоне. Возвращает её id."""
+		broadcast_id = uuid4().hex[:12]
+		await self.redis.hset(
+			BROADCAST_KEY.format(broadcast_id=broadcast_id),
+			mapping={
+				"status": BroadcastStatus.RUNNING,
+				"text": text,
+				"parse_mode": parse_mode or "",
+				"cursor": 0,
+				"delivered": 0,
+				"blocked": 0,
+				"failed": 0,
+				"started_at": time.time(),
+			},
+		)
+		await self.redis.sadd(ACTIVE_BROADCASTS_KEY, broadcast_id)
+		logger.info("Broadcast created", broadcast_id=broadcast_id)
+		self._spawn(broadcast_id)
+		return broadcast_id
+
+	async def resume(self) -> None:
+		"""Подхватывает незавершённые рассылки (вызывается при старте)."""
+		for broadcast_id in await self.redis.smembers(ACTIVE_BROADCASTS_KEY):
+			self._spawn(broadcast_id)
+
+	async def cancel(self, broadcast_id: str) -> None:
+		"""Останавливает рассылку после текущей страницы в любом процессе."""
+		await self.redis.hset(
+			BROADCAST_KEY.format(broadcast_id=broadcast_id),
+			"status",
+			BroadcastStatus.CANCELLED,
+		)
+		await self.redis.srem(ACTIVE_BROADCASTS_KEY, broadcast_id)
+
+	async def progress(self, broadcast_id: str) -> BroadcastProgressDTO | None:
+		state = await self.redis.hgetall(
+			BROADCAST_KEY.format(broadcast_id=broadcast_id),
+		)
+		if not state:
+			return None
+		return BroadcastProgressDTO(
+			broadcast_id=broadcast_id,
+			status=state["status"],
+			cursor=int(state["cursor"]),
+			delivered=int(state["delivered"]),
+			blocked=int(state["blocked"]),
+			failed=int(state["failed"]),
+			started_at=float(state["started_at"]),
+			finished_at=(
+				float(state["finished_at"]) if "finished_at" in state else None
+			),
+		)
+
+	async def close(self) -> None:
+		"""Останавливает рассылки этого процесса; прогресс уже сохранён."""
+		tasks = list(self._tasks.values())
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+	# ========== Выполнение ==========
+	def _spawn(self, broadcast_id: str) -> None:
+		if broadcast_id in self._tasks:
+			return
+		task = asyncio.create_task(self._run(broadcast_id))
+		self._tasks[broadcast_id] = task
+		task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+	async def _run(self, broadcast_id: str) -> None:
+		key = BROADCAST_KEY.format(broadcast_id=broadcast_id)
+		lock_key = BROADCAST_LOCK_KEY.format(broadcast_id=broadcast_id)
+		lease_ms = int(self.lease_ttl * 1000)
+
+		if not await self.redis.set(lock_key, self._owner, nx=True, px=lease_ms):
+			# Рассылку уже выполняет другой процесс
+			return
+
+		try:
+			state = await self.redis.hgetall(key)
+			if state.get("status") != BroadcastStatus.RUNNING:
+				await self.redis.srem(ACTIVE_BROADCASTS_KEY, broadcast_id)
+				return
+
+			text = state["text"]
+			parse_mode = state["parse_mode"] or None
+			cursor = int(state["cursor"])
+			logger.info("Broadcast running", broadcast_id=broadcast_id, cursor=cursor)
+
+			while chat_ids := await self._next_chunk(cursor):
+				sending = asyncio.create_task(self._send_chunk(chat_ids, text, parse_mode))
+				# Страница с долгими RetryAfter может пережить lease_ttl,
+				# поэтому lease продлевается и во время отправки
+				keeper = asyncio.create_task(self._keep_lease(lock_key, lease_ms))
+				try:
+					await asyncio.wait({sending, keeper}, return_when=asyncio.FIRST_COMPLETED)
+				finally:
+					keeper.cancel()
+					if not sending.done():
+						sending.cancel()
+						with suppress(asyncio.CancelledError):
+							await sending
+				if sending.cancelled():
+					logger.warning("Broadcast lease lost", broadcast_id=broadcast_id)
+					return
+				counts = sending.result()
+				cursor = chat_ids[-1]
+
+				# Потерявший lease не продлевает чужую блокировку и не пишет
+				# прогресс: новый владелец продолжит с последнего курсора
+				if not await self._extend_lease(keys=[lock_key], args=[self._owner, lease_ms]):
+					logger.warning("Broadcast lease lost", broadcast_id=broadcast_id)
+					return
+
+				async with self.redis.pipeline(transaction=True) as pipe:
+					pipe.hset(key, "cursor", cursor)
+					for field, value in counts.items():
+						pipe.hincrby(key, field, value)
+					pipe.hget(key, "status")
+					*_, status = await pipe.execute()
+
+				if status != BroadcastStatus.RUNNING:
+					logger.info("Broadcast cancelled", broadcast_id=broadcast_id)
+					return
+
+			await self.redis.hset(
+				key,
+				mapping={
+					"status": BroadcastStatus.DONE,
+					"finished_at": time.time(),
+				},
+			)
+			await self.redis.srem(ACTIVE_BROADCASTS_KEY, broadcast_id)
+			progress = await self.progress(broadcast_id)
+			if progress is not None:
+				logger.info("Broadcast finished", **asdict(progress))
+		except Exception as exc:
+			# Рассылка остаётся активной и продолжится при следующем resume()
+			logger.error(
+				"Broadcast failed",
+				broadcast_id=broadcast_id,
+				error=str(exc),
+				traceback=traceback.format_exc(),
+			)
+		finally:
+			await self._release_lease(keys=[lock_key], args=[self._owner])
+
+	async def _keep_lease(self, lock_key: str, lease_ms: int) -> None:
+		"""Продлевает lease каждые `lease_ttl / 3`; возвращается, когда lease потерян."""
+		while True:
+			await asyncio.sleep(self.lease_ttl / 3)
+			try:
+				extended = await self._extend_lease(keys=[lock_key], args=[self._owner, lease_ms])
+			except Exception as exc:
+				# Сбой Redis не значит потерю lease: проверим на следующем шаге
+				logger.warning("Broadcast lease extend failed", lock_key=lock_key, error=str(exc))
+				continue
+			if not extended:
+				return
+
+	async def _next_chunk(self, cursor: int) -> list[int]:
+		async with self.session_factory() as session:
+			result = await session.scalars(
+				select(User.telegram_id)
+				.where(User.telegram_id > cursor)
+				.order_by(User.telegram_id)
+				.limit(self.chunk_size),
+			)
+			return list(result)
+
+	async def _send_chunk(
+		self,
+		chat_ids: list[int],
+		text: str,
+		parse_mode: str | None,
+	) -> Counter[str]:
+		semaphore = asyncio.Semaphore(self.concurrency)
+
+		async def send(chat_id: int) -> str:
+			async with semaphore:
+				for attempt in range(MAX_SEND_RETRIES + 1):
+					await self._limiter.acquire()
+					try:
+						with send_priority(SendPriority.BULK):
+							await self.bot.send_message(
+								chat_id,
+								text,
+								parse_mode=parse_mode,
+							)
+					except TelegramForbiddenError:
+						# Бот заблокирован или аккаунт удалён
+						return "blocked"
+					except TelegramRetryAfter as exc:
+						# Подкласс TelegramAPIError: ловим раньше, это не отказ
+						if attempt == MAX_SEND_RETRIES:
+							break
+						await asyncio.sleep(exc.retry_after)
+					except TelegramAPIError as exc:
+						logger.debug(
+							"Broadcast send failed",
+							chat_id=chat_id,
+							error=str(exc),
+						)
+						return "failed"
+					else:
+						return "delivered"
+				logger.debug("Broadcast send rate limited", chat_id=chat_id)
+				return "failed"
+
+		# Сетевые ошибки не должны обрывать всю рассылку: считаем их отказами
+		results = await asyncio.gather(
+			*(send(i) for i in chat_ids),
+			return_exceptions=True,
+		)
+		counts: Counter[str] = Counter()
+		for chat_id, result in zip(chat_ids, results, strict=True):
+			if isinstance(result, BaseException):
+				logger.debug("Broadcast send failed", chat_id=chat_id, error=repr(result))
+				counts["failed"] += 1
+			else:
+				counts[result] += 1
+		return counts
+
@@ -0,0 +1,5 @@
+from .logger import get_logger
+
+__all__ = [
+	"get_logger",
+]
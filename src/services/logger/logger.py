@@ -1,12 +1,21 @@
 # ruff: noqa: ANN001, ANN002, ANN202, ARG001, ANN401
 from __future__ import annotations
 
+import logging
+import os
+import sys
 from contextvars import ContextVar
+from types import CodeType, FrameType
 from typing import Any, cast
 
 import structlog
 
 from src.core.config import cfg
+from src.services.logger.sink import (
+	QueueLoggerFactory,
+	QueueSink,
+	pass_event_dict,
+)
 
 # Контекстные переменные для update'ов бота
 update_type: ContextVar[str] = ContextVar("update_type", default="")
@@ -53,7 +62,16 @@ def reorder_keys_processor(
 	return ordered_dict
 
 
+# Минимальный уровень; выставляется в configure_logger
+_min_level = logging.INFO
+
+# Кеш «файл/функция» по code object места вызова — lineno берётся из кадра
+_callers: dict[CodeType, tuple[str, str, str]] = {}
+
+
 def configure_logger() -> None:
+	global _min_level
+
 	log_level = cfg.logging.level.upper()
 	allowed_levels = {
 		"DEBUG": 10,
@@ -63,6 +81,18 @@ def configure_logger() -> None:
 		"CRITICAL": 50,
 	}
 	log_level = allowed_levels.get(log_level, 20)
+	_min_level = log_level
+
+	if cfg.logging.queue_sink:
+		# JSON рендерится и пишется в фоновом потоке
+		renderer: Any = pass_event_dict
+		logger_factory: Any = QueueLoggerFactory(
+			QueueSink(batch_size=cfg.logging.batch_size),
+		)
+	else:
+		renderer = structlog.processors.JSONRenderer()
+		logger_factory = structlog.PrintLoggerFactory()
+
 	structlog.configure_once(
 		processors=cast(Any, [
 			structlog.contextvars.merge_contextvars,
@@ -71,15 +101,34 @@ def configure_logger() -> None:
 			structlog.dev.set_exc_info,
 			structlog.processors.TimeStamper(),
 			reorder_keys_processor,
-			structlog.processors.JSONRenderer(),
+			renderer,
 		]),
 		context_class=dict,
-		logger_factory=structlog.PrintLoggerFactory(),
-		cache_logger_on_first_use=False,
+		logger_factory=logger_factory,
+		cache_logger_on_first_use=True,
 		wrapper_class=structlog.make_filtering_bound_logger(log_level),
 	)
 
 
+def _caller_info(frame: FrameType) -> dict[str, Any]:
+	code = frame.f_code
+	caller = _callers.get(code)
+	if caller is None:
+		pathname = code.co_filename
+		caller = _callers[code] = (
+			os.path.basename(pathname),
+			code.co_name,
+			pathname,
+		)
+	source_file, func_name, pathname = caller
+	return {
+		"source_file": source_file,
+		"func_name": func_name,
+		"lineno": frame.f_lineno,
+		"pathname": pathname,
+	}
+
+
 class StructLogger:
 	def __init__(self, context: dict[str, Any] | None = None) -> None:
 		self._logger = None
@@ -90,58 +139,30 @@ class StructLogger:
 			self._logger = structlog.get_logger()
 		return self._logger
 
-	def _get_caller_info(self) -> dict[str, Any]:
-		import inspect
-
-		stack = inspect.stack()
-		for frame_info in stack[2:]:
-			if (
-				"logger.py" not in frame_info.filename
-				and "structlog" not in frame_info.filename
-			):
-				return {
-					"source_file": frame_info.filename.split("/")[-1],
-					"func_name": frame_info.function,
-					"lineno": frame_info.lineno,
-					"pathname": frame_info.filename,
-				}
-
-		return {}
+	def _log(self, level: int, message: str, kwargs: dict[str, Any]) -> None:
+		# Кадр 0 — _log, 1 — debug/info/..., 2 — место вызова
+		event = {**self._context, **_caller_info(sys._getframe(2)), **kwargs}
+		self._get_logger().log(level, message, **event)
 
 	def debug(self, message: str, **kwargs: object) -> None:
-		caller_info = self._get_caller_info()
-		self._get_logger().bind(**self._context, **caller_info).debug(
-			message,
-			**kwargs,
-		)
+		if _min_level <= logging.DEBUG:
+			self._log(logging.DEBUG, message, kwargs)
 
 	def info(self, message: str, **kwargs: object) -> None:
-		caller_info = self._get_caller_info()
-		self._get_logger().bind(**self._context, **caller_info).info(
-			message,
-			**kwargs,
-		)
+		if _min_level <= logging.INFO:
+			self._log(logging.INFO, message, kwargs)
 
 	def warning(self, message: str, **kwargs: object) -> None:
-		caller_info = self._get_caller_info()
-		self._get_logger().bind(**self._context, **caller_info).warning(
-			message,
-			**kwargs,
-		)
+		if _min_level <= logging.WARNING:
+			self._log(logging.WARNING, message, kwargs)
 
 	def error(self, message: str, **kwargs: object) -> None:
-		caller_info = self._get_caller_info()
-		self._get_logger().bind(**self._context, **caller_info).error(
-			message,
-			**kwargs,
-		)
+		if _min_level <= logging.ERROR:
+			self._log(logging.ERROR, message, kwargs)
 
 	def critical(self, message: str, **kwargs: object) -> None:
-		caller_info = self._get_caller_info()
-		self._get_logger().bind(**self._context, **caller_info).critical(
-			message,
-			**kwargs,
-		)
+		if _min_level <= logging.CRITICAL:
+			self._log(logging.CRITICAL, message, kwargs)
 
 	def bind(self, **kwargs: object) -> "StructLogger":
 		new_context = {**self._context, **kwargs}
@@ -0,0 +1,111 @@
+import atexit
+import queue
+import sys
+import threading
+from typing import Any, TextIO
+
+import structlog
+
+# Сигнал потоку записи завершиться
+_STOP = object()
+
+
+class QueueSink:
+	"""
+	Фоновая запись логов: event_dict кладётся в очередь, а рендер в JSON
+	и запись в поток выполняются в отдельном потоке пачками.
+
+	Event loop не блокируется на `write`/`flush` в stdout; при выходе из
+	процесса (`atexit`) очередь дописывается до конца.
+	"""
+
+	def __init__(
+		self,
+		stream: TextIO | None = None,
+		batch_size: int = 256,
+	) -> None:
+		"""
+		:param stream: куда писать (по умолчанию `sys.stdout`)
+		:param batch_size: максимум записей за один `write`
+		"""
+		self.stream = stream or sys.stdout
+		self.batch_size = batch_size
+		self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+		self._render = structlog.processors.JSONRenderer()
+		self._thread = threading.Thread(
+			target=self._run,
+			name="log-sink",
+			daemon=True,
+		)
+		self._thread.start()
+		atexit.register(self.close)
+
+	def put(self, event_dict: dict[str, Any]) -> None:
+		self._queue.put(event_dict)
+
+	def close(self, timeout: float = 5.0) -> None:
+		"""Дописывает очередь и останавливает поток."""
+		if not self._thread.is_alive():
+			return
+		self._queue.put(_STOP)
+		self._thread.join(timeout)
+
+	def _run(self) -> None:
+		while True:
+			batch = [self._queue.get()]
+			while len(batch) < self.batch_size:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+
+			stop = _STOP in batch
+			lines = [self._format(item) for item in batch if item is not _STOP]
+			if lines:
+				try:
+					self.stream.write("\n".join(lines) + "\n")
+					self.stream.flush()
+				except (OSError, ValueError):
+					# stdout закрыт (остановка процесса) — логи писать некуда
+					pass
+			if stop:
+				return
+
+	def _format(self, event_dict: dict[str, Any]) -> str:
+		try:
+			return self._render(None, "", event_dict)
+		except Exception as exc:
+			return self._render(
+				None,
+				"",
+				{"event": "Log record rendering failed", "error": repr(exc)},
+			)
+
+
+class QueueLogger:
+	"""structlog-логгер, который отдаёт event_dict в `QueueSink`."""
+
+	def __init__(self, sink: QueueSink) -> None:
+		self._sink = sink
+
+	def msg(self, event_dict: dict[str, Any]) -> None:
+		self._sink.put(event_dict)
+
+	debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+	def __init__(self, sink: QueueSink) -> None:
+		self._logger = QueueLogger(sink)
+
+	def __call__(self, *args: Any) -> QueueLogger:
+		return self._logger
+
+
+def pass_event_dict(
+	logger: Any,  # noqa: ANN401
+	method_name: str,
+	event_dict: dict[str, Any],
+) -> tuple[tuple[dict[str, Any]], dict[str, Any]]:
+	"""Последний процессор: передаёт event_dict в `QueueLogger.msg` без рендера."""
+	return (event_dict,), {}
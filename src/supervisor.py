@@ -0,0 +1,27 @@
+import asyncio
+import os
+
+from src.core.config import cfg
+from src.core.sharding import Supervisor
+
+
+def main() -> None:
+	"""
+	Многопроцессный запуск: супервизор + N воркеров со своим Dispatcher.
+	Запуск: `python -m src.supervisor`.
+	"""
+	from src.main import build_dispatcher
+
+	supervisor = Supervisor(
+		workers=cfg.sharding.workers or os.cpu_count() or 1,
+		queue_size=cfg.sharding.queue_size,
+		max_in_flight=cfg.sharding.max_in_flight,
+		stats_interval=cfg.sharding.stats_interval,
+		restart_delay=cfg.sharding.restart_delay,
+		allowed_updates=build_dispatcher().resolve_used_update_types(),
+	)
+	asyncio.run(supervisor.run())
+
+
+if __name__ == "__main__":
+	main()
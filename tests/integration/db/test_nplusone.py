@@ -0,0 +1,123 @@
+"""
+Детектор N+1 (`count_queries`) на SQLite: ленивая связь в цикле.
+"""
+import inspect
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import ForeignKey, select
+from sqlalchemy.ext.asyncio import (
+	AsyncAttrs,
+	AsyncSession,
+	async_sessionmaker,
+	create_async_engine,
+)
+from sqlalchemy.orm import (
+	DeclarativeBase,
+	Mapped,
+	Session,
+	mapped_column,
+	relationship,
+)
+from src.core.db import (
+	BatchLoader,
+	NPlusOneError,
+	count_queries,
+	current_query_counter,
+	detect_n_plus_one,
+)
+
+pytestmark = pytest.mark.integration
+
+
+class Base(AsyncAttrs, DeclarativeBase):
+	pass
+
+
+class Author(Base):
+	__tablename__ = "authors"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+	books: Mapped[list["Book"]] = relationship(lazy="select")
+
+
+class Book(Base):
+	__tablename__ = "books"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+	author_id: Mapped[int] = mapped_column(ForeignKey("authors.id"))
+
+
+class CountedSession(Session):
+	pass
+
+
+detect_n_plus_one(CountedSession)
+
+
+@pytest_asyncio.fixture
+async def session_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+	engine = create_async_engine("sqlite+aiosqlite://")
+	async with engine.begin() as conn:
+		await conn.run_sync(Base.metadata.create_all)
+	factory = async_sessionmaker(
+		engine,
+		expire_on_commit=False,
+		sync_session_class=CountedSession,
+	)
+	async with factory() as session:
+		session.add_all(
+			Author(id=i, books=[Book(id=i * 10 + j) for j in range(2)])
+			for i in range(5)
+		)
+		await session.commit()
+	yield factory
+	await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_in_loop_raises(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		authors = (await session.scalars(select(Author))).all()
+		with pytest.raises(NPlusOneError) as caught:
+			with count_queries(threshold=3, raise_errors=True):
+				for author in authors:
+					line = inspect.currentframe().f_lineno + 1
+					await author.awaitable_attrs.books
+
+	[offender] = caught.value.offenders
+	assert offender.kind == "lazy_load"
+	assert offender.fingerprint == "lazy load Author.books"
+	assert offender.count == len(authors)
+	# Место вызова — строка теста, а не SQLAlchemy или greenlet
+	assert offender.call_site.startswith(f"{__file__}:{line} ")
+
+
+@pytest.mark.asyncio
+async def test_eager_load_passes(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		with count_queries(threshold=3, raise_errors=True) as counter:
+			authors = (await session.scalars(select(Author))).all()
+			await session.scalars(select(Book).where(Book.author_id.in_([a.id for a in authors])))
+	assert counter.total == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_does_not_charge_caller() -> None:
+	seen = []
+
+	async def batch_fn(keys: list[int]) -> dict[int, int]:
+		seen.append(current_query_counter())
+		return {key: key for key in keys}
+
+	loader: BatchLoader[int, int] = BatchLoader(batch_fn)
+	with count_queries() as counter:
+		assert current_query_counter() is counter
+		assert await loader.load(1) == 1
+	# Пакет общий для всех вызывающих: счётчик первого его не получает
+	assert seen == [None]
@@ -0,0 +1,74 @@
+"""
+`InstrumentedAsyncQueuePool.resize` опирается на внутренние поля SQLAlchemy
+и asyncio — тест ловит их изменение при обновлении зависимостей.
+"""
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.util import greenlet_spawn
+from src.core.db import resize_supported
+from src.core.db.pool import InstrumentedAsyncQueuePool
+
+pytestmark = pytest.mark.integration
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path: Path) -> AsyncIterator[AsyncEngine]:
+	engine = create_async_engine(
+		f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+		poolclass=InstrumentedAsyncQueuePool,
+		pool_size=2,
+		max_overflow=1,
+		pool_timeout=0.2,
+	)
+	yield engine
+	await engine.dispose()
+
+
+async def hold(stack: AsyncExitStack, engine: AsyncEngine, count: int) -> None:
+	for _ in range(count):
+		conn = await stack.enter_async_context(engine.connect())
+		await conn.execute(text("SELECT 1"))
+
+
+def test_resize_supported() -> None:
+	assert resize_supported()
+
+
+@pytest.mark.asyncio
+async def test_grow_keeps_max_overflow(engine: AsyncEngine) -> None:
+	pool = engine.pool
+	assert isinstance(pool, InstrumentedAsyncQueuePool)
+	await greenlet_spawn(pool.resize, 4)
+	assert pool.size() == 4
+
+	async with AsyncExitStack() as stack:
+		await hold(stack, engine, 5)
+		assert pool.checkedout() == 5
+		with pytest.raises(PoolTimeoutError):
+			await hold(stack, engine, 1)
+
+
+@pytest.mark.asyncio
+async def test_shrink_closes_idle_connections(engine: AsyncEngine) -> None:
+	pool = engine.pool
+	assert isinstance(pool, InstrumentedAsyncQueuePool)
+	async with AsyncExitStack() as stack:
+		await hold(stack, engine, 3)
+	assert pool.checkedin() == 2
+
+	await greenlet_spawn(pool.resize, 1)
+	assert pool.size() == 1
+	assert pool.checkedin() == 1
+
+	async with AsyncExitStack() as stack:
+		await hold(stack, engine, 2)
+		with pytest.raises(PoolTimeoutError):
+			await hold(stack, engine, 1)
+	assert pool.checkedin() == 1
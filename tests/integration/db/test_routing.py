@@ -0,0 +1,138 @@
+"""
+Маршрутизация `RoutingSession`: primary и реплика — два SQLite-файла,
+в каждом таблица с меткой базы, поэтому по ответу SELECT видно, куда он ушёл.
+"""
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select
+from sqlalchemy.ext.asyncio import (
+	AsyncEngine,
+	AsyncSession,
+	async_sessionmaker,
+	create_async_engine,
+)
+from src.core.db import (
+	ReplicaRouter,
+	create_session_factory,
+	dialect_name,
+	pin_primary,
+)
+from src.core.db.routing import PRIMARY_PIN
+
+pytestmark = pytest.mark.integration
+
+metadata = MetaData()
+origin = Table(
+	"origin",
+	metadata,
+	Column("id", Integer, primary_key=True),
+	Column("name", String(16), nullable=False),
+)
+
+
+async def make_engine(path: Path, name: str) -> AsyncEngine:
+	engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+	async with engine.begin() as conn:
+		await conn.run_sync(metadata.create_all)
+		await conn.execute(insert(origin).values(id=1, name=name))
+	return engine
+
+
+@pytest_asyncio.fixture
+async def primary(tmp_path: Path) -> AsyncIterator[AsyncEngine]:
+	engine = await make_engine(tmp_path / "primary.db", "primary")
+	yield engine
+	await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def router(tmp_path: Path) -> AsyncIterator[ReplicaRouter]:
+	router = ReplicaRouter([await make_engine(tmp_path / "replica.db", "replica")])
+	yield router
+	await router.close()
+
+
+@pytest.fixture
+def session_factory(
+	primary: AsyncEngine,
+	router: ReplicaRouter,
+) -> async_sessionmaker[AsyncSession]:
+	return create_session_factory(primary, router)
+
+
+async def read_origin(session: AsyncSession) -> str:
+	return await session.scalar(select(origin.c.name).where(origin.c.id == 1))
+
+
+@pytest.mark.asyncio
+async def test_read_only_select_goes_to_replica(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		assert await read_origin(session) == "replica"
+		assert await read_origin(session) == "replica"
+		assert not session.info.get(PRIMARY_PIN)
+
+
+@pytest.mark.asyncio
+async def test_session_stays_on_primary_after_write(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		await session.execute(insert(origin).values(id=2, name="written"))
+		assert session.info[PRIMARY_PIN]
+		assert await read_origin(session) == "primary"
+		# Read your writes: строка видна до коммита
+		assert await session.scalar(select(origin.c.name).where(origin.c.id == 2)) == "written"
+
+
+@pytest.mark.asyncio
+async def test_select_for_update_goes_to_primary(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		await session.execute(select(origin).with_for_update())
+		assert await read_origin(session) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_pin_primary_keeps_session_on_primary(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		pin_primary(session)
+		assert await read_origin(session) == "primary"
+	async with session_factory() as session:
+		# Закрепление живёт в одной сессии
+		assert await read_origin(session) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_falls_back_to_primary(
+	tmp_path: Path,
+	primary: AsyncEngine,
+) -> None:
+	missing = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+	router = ReplicaRouter([missing], health_timeout=1.0)
+	try:
+		await router.check()
+		assert router.healthy == []
+		async with create_session_factory(primary, router)() as session:
+			assert await read_origin(session) == "primary"
+			# Без здоровых реплик чтение не закрепляет сессию
+			assert not session.info.get(PRIMARY_PIN)
+	finally:
+		await router.close()
+
+
+@pytest.mark.asyncio
+async def test_dialect_name_does_not_pin(
+	session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+	async with session_factory() as session:
+		assert dialect_name(session) == "sqlite"
+		assert not session.info.get(PRIMARY_PIN)
+		assert await read_origin(session) == "replica"
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Пакетное заполнение колонок таблицы из командной строки.
+
+Обходит таблицу кусками по первичному ключу (`src/core/db/backfill.py`):
+каждый кусок — своя короткая транзакция, между кусками пауза по
+длительности куска и отставанию реплик, прогресс сохраняется в
+`backfill_checkpoints`. Прерванный запуск продолжается с того же места
+при повторе с тем же `--name`; `--reset` начинает заново.
+
+Значения `--set` и условие `--where` — SQL-выражения.
+
+Пример:
+	python tools/backfill.py users --set "language='ru'" --where "language IS NULL"
+	python tools/backfill.py users --set "username=lower(username)" --name users_lower --sleep-ratio 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, MetaData, Table, literal_column, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import src.models.user  # noqa: E402, F401  (регистрирует модели в Base)
+from src.core.config import cfg  # noqa: E402
+from src.core.db.backfill import backfill  # noqa: E402
+from src.models.base import Base  # noqa: E402
+from src.schemas.dataclasses import BackfillResultDTO  # noqa: E402
+
+
+def parse_values(assignments: list[str]) -> dict[str, Any]:
+	values = {}
+	for assignment in assignments:
+		column, sep, expression = assignment.partition("=")
+		if not sep or not column.strip():
+			raise SystemExit(f"--set expects column=expression, got {assignment!r}")
+		values[column.strip()] = literal_column(expression.strip())
+	return values
+
+
+def run_sync(conn: Connection, args: argparse.Namespace) -> BackfillResultDTO:
+	table = Base.metadata.tables.get(args.table)
+	if table is None:
+		table = Table(args.table, MetaData(), autoload_with=conn)
+	# Отражение открыло транзакцию, а куски идут в своих соединениях
+	conn.commit()
+	return backfill(
+		conn,
+		table,
+		parse_values(args.set),
+		where=text(args.where) if args.where else None,
+		name=args.name,
+		reset=args.reset,
+		chunk_size=args.chunk_size,
+		min_chunk_size=args.min_chunk_size,
+		max_chunk_size=args.max_chunk_size,
+		sleep_ratio=args.sleep_ratio,
+		max_replication_lag=args.max_lag,
+	)
+
+
+def print_result(result: BackfillResultDTO) -> None:
+	if result.skipped:
+		print(f"{result.name}: already completed (last key {result.last_key})")
+		return
+	resumed = f", resumed after key {result.resumed_from}" if result.resumed_from else ""
+	print(
+		f"{result.name}: {result.rows} rows in {result.chunks} chunks, "
+		f"{result.elapsed:.1f} s, {result.rows_per_second:.0f} rows/s{resumed}",
+	)
+
+
+async def run(args: argparse.Namespace) -> None:
+	engine = create_async_engine(args.url)
+	try:
+		async with engine.connect() as conn:
+			result = await conn.run_sync(run_sync, args)
+	finally:
+		await engine.dispose()
+	print_result(result)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Chunked, throttled UPDATE of a table.")
+	parser.add_argument("table")
+	parser.add_argument(
+		"--set",
+		action="append",
+		required=True,
+		metavar="COLUMN=SQL",
+		help="column and SQL expression, repeatable",
+	)
+	parser.add_argument("--where", help="SQL condition for rows to update")
+	parser.add_argument("--name", help="checkpoint name (default: table, columns and a hash of --set/--where)")
+	parser.add_argument("--reset", action="store_true", help="ignore saved progress")
+	parser.add_argument("--chunk-size", type=int, default=None)
+	parser.add_argument("--min-chunk-size", type=int, default=None)
+	parser.add_argument("--max-chunk-size", type=int, default=None)
+	parser.add_argument("--sleep-ratio", type=float, default=None)
+	parser.add_argument("--max-lag", type=float, default=None, help="max replication lag, s")
+	parser.add_argument("--url", default=cfg.database.async_database_url)
+	args = parser.parse_args()
+	asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+	main()
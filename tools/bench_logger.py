@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк стоимости одного вызова логгера.
+
+Сравнивает прежний путь (`inspect.stack()` + `bind` на каждый вызов,
+синхронная запись в stdout) с текущим `StructLogger`: проверка уровня
+до поиска места вызова, один кадр с кешем по code object, фоновая
+запись через `QueueSink`. Вывод пишется в /dev/null.
+
+Пример:
+	python tools/bench_logger.py --calls 20000
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import logging
+import os
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.services.logger import logger as logger_module  # noqa: E402
+from src.services.logger.logger import (  # noqa: E402
+	StructLogger,
+	bot_context_processor,
+	reorder_keys_processor,
+)
+from src.services.logger.sink import (  # noqa: E402
+	QueueLoggerFactory,
+	QueueSink,
+	pass_event_dict,
+)
+
+
+class LegacyStructLogger(StructLogger):
+	"""Прежняя реализация: полный стек и bind на каждый вызов, до фильтра уровня."""
+
+	def _get_caller_info(self) -> dict[str, Any]:
+		for frame_info in inspect.stack()[2:]:
+			if (
+				"logger.py" not in frame_info.filename
+				and "structlog" not in frame_info.filename
+			):
+				return {
+					"source_file": frame_info.filename.split("/")[-1],
+					"func_name": frame_info.function,
+					"lineno": frame_info.lineno,
+					"pathname": frame_info.filename,
+				}
+		return {}
+
+	def debug(self, message: str, **kwargs: object) -> None:
+		caller_info = self._get_caller_info()
+		self._get_logger().bind(**self._context, **caller_info).debug(
+			message,
+			**kwargs,
+		)
+
+	def info(self, message: str, **kwargs: object) -> None:
+		caller_info = self._get_caller_info()
+		self._get_logger().bind(**self._context, **caller_info).info(
+			message,
+			**kwargs,
+		)
+
+
+def configure(renderer: Any, factory: Any, cache: bool) -> None:  # noqa: ANN401
+	structlog.reset_defaults()
+	structlog.configure(
+		processors=[
+			structlog.contextvars.merge_contextvars,
+			bot_context_processor,
+			structlog.processors.add_log_level,
+			structlog.dev.set_exc_info,
+			structlog.processors.TimeStamper(),
+			reorder_keys_processor,
+			renderer,
+		],
+		context_class=dict,
+		logger_factory=factory,
+		cache_logger_on_first_use=cache,
+		wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+	)
+	logger_module._min_level = logging.INFO
+
+
+def measure(calls: int, log: Callable[[int], None]) -> float:
+	"""Средняя стоимость вызова в микросекундах."""
+	for i in range(min(calls, 1000)):
+		log(i)
+	start = time.perf_counter()
+	for i in range(calls):
+		log(i)
+	return (time.perf_counter() - start) / calls * 1e6
+
+
+def handle_update(logger: StructLogger, i: int) -> None:
+	"""Типичный вызов из кода бота, на глубине нескольких кадров."""
+	logger.info("Update handled", update_type="message", user_id=i, took=0.001)
+
+
+def nested(depth: int, fn: Callable[[], None]) -> None:
+	if depth:
+		nested(depth - 1, fn)
+	else:
+		fn()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark logger call cost.")
+	parser.add_argument("--calls", type=int, default=20000)
+	parser.add_argument(
+		"--depth",
+		type=int,
+		default=20,
+		help="Extra stack frames under the call site (default: 20)",
+	)
+	args = parser.parse_args()
+	devnull = open(os.devnull, "w")  # noqa: SIM115
+
+	results: list[tuple[str, float, float]] = []
+
+	def run(name: str, logger: StructLogger) -> None:
+		box: dict[str, float] = {}
+
+		def body() -> None:
+			box["debug"] = measure(
+				args.calls,
+				lambda i: logger.debug("Update received", user_id=i),
+			)
+			box["info"] = measure(args.calls, lambda i: handle_update(logger, i))
+
+		nested(args.depth, body)
+		results.append((name, box["debug"], box["info"]))
+
+	configure(
+		structlog.processors.JSONRenderer(),
+		structlog.PrintLoggerFactory(devnull),
+		cache=False,
+	)
+	run("legacy (inspect.stack, sync)", LegacyStructLogger())
+
+	configure(
+		structlog.processors.JSONRenderer(),
+		structlog.PrintLoggerFactory(devnull),
+		cache=True,
+	)
+	run("fast path, sync stdout", StructLogger())
+
+	sink = QueueSink(devnull)
+	configure(pass_event_dict, QueueLoggerFactory(sink), cache=True)
+	run("fast path, queue sink", StructLogger())
+	drain_start = time.perf_counter()
+	sink.close(timeout=60)
+	drain = time.perf_counter() - drain_start
+
+	print(f"{'':32} {'debug (dropped)':>16} {'info (written)':>16}")
+	for name, debug, info in results:
+		print(f"{name:32} {debug:13.2f} us {info:13.2f} us")
+	print(f"queue sink drained the remaining backlog in {drain * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+	main()
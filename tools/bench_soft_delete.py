@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк фильтра мягкого удаления на SELECT с несколькими JOIN.
+
+Сравнивает прежний `filter_soft_deleted` (обход FROM-дерева и новая
+`with_loader_criteria` на каждый запрос) с текущим: опции берутся из
+`SoftDeletePlanner` готовыми. Меряется отдельно сам хук и полный
+`session.execute` на SQLite в памяти; размер кеша скомпилированных
+запросов показывает, что запросы с фильтром продолжают в него попадать.
+
+Пример:
+	python tools/bench_soft_delete.py --queries 5000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from sqlalchemy import (
+	ForeignKey,
+	Select,
+	and_,
+	create_engine,
+	event,
+	or_,
+	select,
+)
+from sqlalchemy.orm import (
+	Mapped,
+	ORMExecuteState,
+	Session,
+	mapped_column,
+	with_loader_criteria,
+)
+from sqlalchemy.sql.selectable import Join
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.db.soft_delete import filter_soft_deleted  # noqa: E402
+from src.models.base import Base  # noqa: E402
+from src.models.mixins import SoftDeleteMixin  # noqa: E402
+
+
+class BenchAuthor(Base, SoftDeleteMixin):
+	__tablename__ = "bench_authors"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+
+
+class BenchPost(Base, SoftDeleteMixin):
+	__tablename__ = "bench_posts"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+	author_id: Mapped[int] = mapped_column(ForeignKey("bench_authors.id"))
+
+
+class BenchComment(Base, SoftDeleteMixin):
+	__tablename__ = "bench_comments"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+	post_id: Mapped[int] = mapped_column(ForeignKey("bench_posts.id"))
+
+
+class BenchReaction(Base, SoftDeleteMixin):
+	__tablename__ = "bench_reactions"
+
+	id: Mapped[int] = mapped_column(primary_key=True)
+	comment_id: Mapped[int] = mapped_column(ForeignKey("bench_comments.id"))
+
+
+def legacy_filter_soft_deleted(execute_state: ORMExecuteState) -> None:
+	"""Прежняя реализация хука, без изменений."""
+	if not execute_state.is_select:
+		return
+
+	if execute_state.is_column_load or execute_state.is_relationship_load:
+		return
+
+	if execute_state.execution_options.get("include_deleted", False):
+		return
+
+	stmt = execute_state.statement
+	if not isinstance(stmt, Select):
+		execute_state.statement = execute_state.statement.options(
+			with_loader_criteria(
+				SoftDeleteMixin,
+				lambda cls: cls.deleted_at.is_(None),
+				include_aliases=True,
+			),
+		)
+		return
+
+	exclude_tables = execute_state.execution_options.get(
+		"exclude_tables_from_soft_delete",
+		set(),
+	)
+	exclude_set = frozenset(exclude_tables) if exclude_tables else frozenset()
+
+	conditions = []
+	processed_tables = set()
+
+	def extract_table_info(table: Any) -> Any:  # noqa: ANN401
+		if hasattr(table, "entity"):
+			return table.entity
+		if hasattr(table, "element"):
+			return extract_table_info(table.element)
+		return None
+
+	def is_outer_join(froms: Any, table_name: Any) -> bool:  # noqa: ANN401
+		for from_clause in froms:
+			if isinstance(from_clause, Join):
+				if from_clause.isouter and str(table_name) in str(from_clause):
+					return True
+				if hasattr(from_clause, "left") and is_outer_join(
+					[from_clause.left],
+					table_name,
+				):
+					return True
+				if hasattr(from_clause, "right") and is_outer_join(
+					[from_clause.right],
+					table_name,
+				):
+					return True
+		return False
+
+	for from_clause in stmt.get_final_froms():
+		tables_to_check = [from_clause]
+
+		while tables_to_check:
+			current = tables_to_check.pop(0)
+
+			if isinstance(current, Join):
+				if hasattr(current, "left"):
+					tables_to_check.append(current.left)
+				if hasattr(current, "right"):
+					tables_to_check.append(current.right)
+				continue
+
+			model = extract_table_info(current)
+			if model is None:
+				continue
+
+			if not hasattr(model, "deleted_at"):
+				continue
+
+			table_name = getattr(model, "__tablename__", None)
+			class_name = getattr(model, "__name__", None)
+
+			if (
+				table_name in processed_tables
+				or class_name in processed_tables
+			):
+				continue
+
+			if table_name in exclude_set or class_name in exclude_set:
+				continue
+
+			processed_tables.add(table_name or class_name)
+
+			is_outer = is_outer_join(
+				stmt.get_final_froms(),
+				table_name or class_name,
+			)
+
+			if is_outer and hasattr(model, "id"):
+				conditions.append(
+					or_(model.deleted_at.is_(None), model.id.is_(None)),
+				)
+			else:
+				conditions.append(model.deleted_at.is_(None))
+
+	if conditions:
+		modified_stmt = stmt.where(and_(*conditions))
+		execute_state.statement = modified_stmt
+	else:
+		execute_state.statement = execute_state.statement.options(
+			with_loader_criteria(
+				SoftDeleteMixin,
+				lambda cls: cls.deleted_at.is_(None),
+				include_aliases=True,
+			),
+		)
+
+
+def build_statement(i: int) -> Select[Any]:
+	"""Тот же запрос с разными параметрами: одна форма для кеша."""
+	return (
+		select(BenchAuthor, BenchPost, BenchComment, BenchReaction)
+		.join(BenchPost, BenchPost.author_id == BenchAuthor.id)
+		.outerjoin(BenchComment, BenchComment.post_id == BenchPost.id)
+		.outerjoin(BenchReaction, BenchReaction.comment_id == BenchComment.id)
+		.where(BenchAuthor.id > i % 10)
+		.limit(20)
+	)
+
+
+def measure(calls: int, fn: Callable[[int], None]) -> float:
+	"""Средняя стоимость вызова в микросекундах."""
+	for i in range(min(calls, 500)):
+		fn(i)
+	start = time.perf_counter()
+	for i in range(calls):
+		fn(i)
+	return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_hook(calls: int, hook: Callable[[Any], None]) -> float:
+	statement = build_statement(0)
+
+	def call(i: int) -> None:
+		state = SimpleNamespace(
+			is_select=True,
+			is_column_load=False,
+			is_relationship_load=False,
+			execution_options={},
+			statement=statement,
+		)
+		hook(state)
+
+	return measure(calls, call)
+
+
+def bench_execute(calls: int, hook: Callable[[Any], None]) -> tuple[float, int]:
+	engine = create_engine("sqlite://")
+	Base.metadata.create_all(
+		engine,
+		tables=[
+			BenchAuthor.__table__,
+			BenchPost.__table__,
+			BenchComment.__table__,
+			BenchReaction.__table__,
+		],
+	)
+	with Session(engine) as session:
+		for i in range(20):
+			session.add(BenchAuthor(id=i))
+			session.add(BenchPost(id=i, author_id=i))
+			session.add(BenchComment(id=i, post_id=i))
+			session.add(BenchReaction(id=i, comment_id=i))
+		session.commit()
+
+	event.listen(Session, "do_orm_execute", hook)
+	try:
+		with Session(engine) as session:
+			took = measure(calls, lambda i: session.execute(build_statement(i)).all())
+	finally:
+		event.remove(Session, "do_orm_execute", hook)
+	cached = len(engine._compiled_cache)
+	engine.dispose()
+	return took, cached
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark soft-delete filter.")
+	parser.add_argument("--queries", type=int, default=5000)
+	args = parser.parse_args()
+
+	print("4-table select (1 inner + 2 outer joins)")
+	print(f"{'':10} {'hook':>12} {'execute':>12} {'compiled cache':>16}")
+	for name, hook in (
+		("legacy", legacy_filter_soft_deleted),
+		("planner", filter_soft_deleted),
+	):
+		hook_time = bench_hook(args.queries, hook)
+		execute_time, cached = bench_execute(args.queries, hook)
+		print(
+			f"{name:10} {hook_time:9.1f} us {execute_time:9.1f} us "
+			f"{cached:10} entries",
+		)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Локальный «фейковый Telegram»: шлёт синтетические update'ы в webhook бота.
+
+Пример:
+	python tools/fake_telegram_sender.py --url http://127.0.0.1:8080/webhook \
+		--secret my-secret --count 1000 --concurrency 50
+
+Хендлеры, отвечающие через Bot API, с фейковым токеном получат ошибку
+от api.telegram.org — для проверки приёма update'ов это не мешает.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+import aiohttp
+
+_update_ids = itertools.count(1)
+
+
+def build_message_update(user_id: int, text: str) -> dict:
+	update_id = next(_update_ids)
+	return {
+		"update_id": update_id,
+		"message": {
+			"message_id": update_id,
+			"date": int(time.time()),
+			"chat": {"id": user_id, "type": "private", "first_name": "Fake"},
+			"from": {
+				"id": user_id,
+				"is_bot": False,
+				"first_name": "Fake",
+				"username": f"fake_{user_id}",
+			},
+			"text": text,
+		},
+	}
+
+
+async def send_updates(
+	url: str,
+	secret: str,
+	count: int,
+	concurrency: int,
+	users: int,
+	text: str,
+) -> None:
+	headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+	semaphore = asyncio.Semaphore(concurrency)
+	latencies: list[float] = []
+	statuses: dict[int, int] = {}
+
+	async with aiohttp.ClientSession() as session:
+
+		async def send_one() -> None:
+			update = build_message_update(random.randint(1, users), text)
+			async with semaphore:
+				start = time.perf_counter()
+				async with session.post(url, json=update, headers=headers) as resp:
+					await resp.read()
+					statuses[resp.status] = statuses.get(resp.status, 0) + 1
+				latencies.append(time.perf_counter() - start)
+
+		started = time.perf_counter()
+		await asyncio.gather(*(send_one() for _ in range(count)))
+		elapsed = time.perf_counter() - started
+
+	latencies.sort()
+	p50 = latencies[len(latencies) // 2] * 1000
+	p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+	print(f"sent:     {count} updates in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
+	print(f"statuses: {statuses}")
+	print(f"ack p50:  {p50:.2f} ms, p99: {p99:.2f} ms")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(
+		description="Send fake Telegram updates to a local webhook.",
+	)
+	parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+	parser.add_argument("--secret", default="")
+	parser.add_argument("--count", type=int, default=100)
+	parser.add_argument("--concurrency", type=int, default=20)
+	parser.add_argument(
+		"--users",
+		type=int,
+		default=50,
+		help="Number of distinct fake users (default: 50)",
+	)
+	parser.add_argument("--text", default="/start")
+	args = parser.parse_args()
+
+	asyncio.run(
+		send_updates(
+			url=args.url,
+			secret=args.secret,
+			count=args.count,
+			concurrency=args.concurrency,
+			users=args.users,
+			text=args.text,
+		),
+	)
+
+
+if __name__ == "__main__":
+	main()